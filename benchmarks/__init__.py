@@ -0,0 +1 @@
+"""Performance benchmarks of the data generator (see benchmarks.run)"""
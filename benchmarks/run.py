@@ -0,0 +1,255 @@
+"""Benchmark suite with JSON baselines and regression checks
+
+Measures records/sec and peak traced memory of data loading, record and
+ID generation and the exporters, for the 'pl' and 'de' locales.
+
+    python -m benchmarks.run                       # run everything, compare with the baseline if present
+    python -m benchmarks.run --sizes 1000,100000   # skip the 1M row runs
+    python -m benchmarks.run -k pl.generate_bulk   # only benchmarks whose name contains a substring
+    python -m benchmarks.run --save                # store the results as the new baseline
+
+The run fails (exit status 1) when a benchmark is slower, or uses more
+memory, than its baseline by more than --threshold.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators.data_loader import DataLoader
+from generators.dataset_registry import DEFAULT_DATA_PATH, DatasetRegistry
+from generators.id_generators import pesel_de, pesel_pl
+from generators.modular_generator import ModularDataGenerator
+from generators.schema import default_schema
+from sql.sql_generator import generate_sql
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (1000, 100000, 1000000)
+# Allowed slowdown or memory growth relative to the baseline (0.25 = 25%)
+DEFAULT_THRESHOLD = 0.25
+LOCALES = ("pl", "de")
+EXPORT_FIELDS = default_schema().default_fields()
+
+class Benchmark(NamedTuple):
+    """A measured operation; setup() returns the callable that is timed"""
+    name: str
+    records: int
+    setup: Callable[[], Callable[[], object]]
+
+def _loader_benchmarks(locale: str) -> List[Benchmark]:
+    def cold():
+        # Fresh loader parsing the text files
+        loader = DataLoader(DEFAULT_DATA_PATH, use_cache=False)
+        return lambda: loader.discover_data_types(locale).load_all()
+
+    def cached():
+        # Fresh loader mapping the compiled dataset cache, when one exists
+        loader = DataLoader(DEFAULT_DATA_PATH)
+        return lambda: loader.discover_data_types(locale).load_all()
+
+    def warm():
+        registry = DatasetRegistry()
+        registry.preload([locale])
+        return lambda: registry.get_data_types(locale)
+
+    records = sum(len(values) for values in _data_types(locale).values())
+    return [
+        Benchmark(f"{locale}.loader.cold", records, cold),
+        Benchmark(f"{locale}.loader.cached", records, cached),
+        Benchmark(f"{locale}.loader.warm", records, warm),
+    ]
+
+def _data_types(locale: str):
+    data_types = DataLoader(DEFAULT_DATA_PATH).discover_data_types(locale)
+    data_types.load_all()
+    return data_types
+
+def _generation_benchmarks(locale: str, size: int) -> List[Benchmark]:
+    def generator():
+        return ModularDataGenerator(locale)
+
+    def generate_record():
+        gen = generator()
+        return lambda: [gen.generate_record() for _ in range(size)]
+
+    def generate_bulk():
+        gen = generator()
+        return lambda: gen.generate_bulk(size)
+
+    def to_csv():
+        gen = generator()
+        data = gen.generate_bulk(size)
+        path = os.path.join(_output_dir(), f"{locale}.csv")
+        return lambda: gen.to_csv(data, path)
+
+    def sql():
+        gen = generator()
+        data = gen.generate_bulk(size)
+        return lambda: generate_sql(data, locale)
+
+    return [
+        Benchmark(f"{locale}.generate_record.{size}", size, generate_record),
+        Benchmark(f"{locale}.generate_bulk.{size}", size, generate_bulk),
+        Benchmark(f"{locale}.to_csv.{size}", size, to_csv),
+        Benchmark(f"{locale}.generate_sql.{size}", size, sql),
+    ]
+
+def _id_benchmarks(size: int) -> List[Benchmark]:
+    return [
+        Benchmark(f"pl.generate_pesel.{size}", size,
+                  lambda: lambda: [pesel_pl.generate_pesel() for _ in range(size)]),
+        Benchmark(f"de.generate_id_number.{size}", size,
+                  lambda: lambda: [pesel_de.generate_id_number() for _ in range(size)]),
+    ]
+
+def _flask_benchmarks(locale: str, size: int) -> List[Benchmark]:
+    def endpoint():
+        from main import create_app
+        client = create_app(preload=False).test_client()
+        body = {'locale': locale, 'quantity': size, 'fields': EXPORT_FIELDS, 'format': 'csv'}
+
+        def run():
+            response = client.post('/generate', json=body)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            return response.get_data()
+        return run
+
+    return [Benchmark(f"{locale}.flask_generate.{size}", size, endpoint)]
+
+def _output_dir() -> str:
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def benchmarks(sizes: Iterable[int] = DEFAULT_SIZES) -> List[Benchmark]:
+    """Return the benchmarks of the suite for the given record counts"""
+    suite = []
+    for locale in LOCALES:
+        suite.extend(_loader_benchmarks(locale))
+    for size in sizes:
+        suite.extend(_id_benchmarks(size))
+        for locale in LOCALES:
+            suite.extend(_generation_benchmarks(locale, size))
+            suite.extend(_flask_benchmarks(locale, size))
+    return suite
+
+def measure(benchmark: Benchmark, repeat: int = 3, memory: bool = True) -> Dict[str, float]:
+    """Time a benchmark and trace its peak memory
+
+    The fastest of repeat runs is reported. Memory is traced in a separate
+    run, since tracing slows allocation down.
+
+    Returns:
+        Dictionary with records, seconds, records_per_sec and peak_memory_bytes
+    """
+    run = benchmark.setup()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    result = {
+        'records': benchmark.records,
+        'seconds': best,
+        'records_per_sec': benchmark.records / best if best > 0 else 0.0,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Return a description of every regression of results against a baseline
+
+    A benchmark regresses when its records/sec drop, or its peak memory
+    grows, by more than threshold (a fraction). Benchmarks missing from
+    either side are ignored.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['records_per_sec'] < expected['records_per_sec'] * (1 - threshold):
+            regressions.append(f"{name}: {result['records_per_sec']:,.0f} records/sec, "
+                               f"baseline {expected['records_per_sec']:,.0f}")
+        if ('peak_memory_bytes' in result and 'peak_memory_bytes' in expected
+                and result['peak_memory_bytes'] > expected['peak_memory_bytes'] * (1 + threshold)):
+            regressions.append(f"{name}: peak memory {result['peak_memory_bytes']:,} bytes, "
+                               f"baseline {expected['peak_memory_bytes']:,}")
+    return regressions
+
+def load_baseline(path: str) -> Optional[Dict[str, Dict[str, float]]]:
+    """Read the results of a baseline file, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]):
+    """Write results to a baseline file, with the machine they were measured on"""
+    baseline = {
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'results': results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the data generator benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated record counts")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (the best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory tracing")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed regression as a fraction (default 0.25)")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = {}
+    for benchmark in benchmarks(sizes):
+        if args.keyword and args.keyword not in benchmark.name:
+            continue
+        try:
+            result = measure(benchmark, args.repeat, memory=not args.no_memory)
+        except ImportError as e:
+            # The Flask benchmarks need the web interface dependencies
+            print(f"{benchmark.name:<32} skipped ({e})")
+            continue
+        results[benchmark.name] = result
+        memory = f"{result['peak_memory_bytes'] / 2**20:9.1f} MiB" if 'peak_memory_bytes' in result else ""
+        print(f"{benchmark.name:<32} {result['records_per_sec']:>14,.0f} records/sec {memory}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Headless batch generation from the command line
+
+    python main.py generate --locale pl --count 10000000 --format pgcopy --workers 4 --out - | psql mydb
+    python main.py generate --locale de --count 1000000 --fields Name,Surname,City --out people.csv.gz
+    python main.py generate --schema schemas/contacts.json --count 100000 --format sqlite --out contacts.db
+
+Records are generated chunk by chunk and each chunk is written before the
+next one is generated, so memory use does not grow with --count. A
+summary with the throughput and the peak memory of the process is printed
+to stderr once the output is complete.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import List, Optional, Tuple
+
+from generators.compression import available_compressions, compression_for_path
+from generators.data_loader import DataLoader
+from generators.exporters import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+from generators.modular_generator import ModularDataGenerator
+from generators.schema import Schema, default_schema, load_schema
+from sql.sqlite_writer import write_sqlite
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+WRITE_BUFFER_SIZE = 1 << 20
+
+def add_generate_command(subparsers):
+    """Register the generate subcommand on an argparse subparsers object"""
+    parser = subparsers.add_parser('generate', help='Generate records to a file or stdout without the web interface',
+                                   description='Generate records to a file or stdout without the web interface')
+    parser.add_argument('--locale', default='pl', help='Locale code (default: pl)')
+    parser.add_argument('--count', type=int, required=True, help='Number of records to generate')
+    parser.add_argument('--schema', help='Schema JSON file declaring the columns and SQL tables '
+                                         '(default: schemas/default.json)')
+    parser.add_argument('--fields', help="Comma-separated columns of the schema (default: its selected columns, "
+                                         f"for the default schema {','.join(default_schema().default_fields())})")
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Output format (default: csv)')
+    parser.add_argument('--seed', type=int, help='Seed for reproducible output')
+    parser.add_argument('--offset', type=int, default=0,
+                        help='Index of the first record of a seeded run, to generate one part of a larger dataset')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes generating records (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Records generated and written at a time (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--unique-ids', action='store_true', help='Never repeat an ID number')
+    parser.add_argument('--compression', choices=sorted(available_compressions()),
+                        help='Compress the output (default: taken from a .gz/.zst --out file name)')
+    parser.add_argument('--out', default='-', help="Output file, or - for stdout (default: -)")
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print the summary')
+    parser.set_defaults(command=lambda args: run_generate(args, parser))
+    return parser
+
+def _peak_memory_bytes() -> Optional[int]:
+    """Peak resident set size of this process and its finished worker processes"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _validate(args, parser: argparse.ArgumentParser) -> Tuple[Schema, List[str]]:
+    """Check the options of generate and return the schema and the requested fields"""
+    if args.count < 1:
+        parser.error('--count must be positive')
+    if args.workers < 1:
+        parser.error('--workers must be positive')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be positive')
+    if args.offset and args.seed is None:
+        parser.error('--offset requires --seed')
+    locales = DataLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")).discover_locales()
+    if args.locale not in locales:
+        parser.error(f"unknown locale {args.locale} (available: {', '.join(locales)})")
+    try:
+        schema = load_schema(args.schema) if args.schema else default_schema()
+    except (OSError, ValueError) as e:
+        parser.error(f"invalid schema: {e}")
+    if args.fields is None:
+        fields = schema.default_fields() or schema.column_names
+    else:
+        fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+    by_lower_name = {name.lower(): name for name in schema.column_names}
+    unknown = [field for field in fields if field.lower() not in by_lower_name]
+    if unknown or not fields:
+        parser.error(f"unknown fields: {', '.join(unknown)}" if unknown else 'no fields given')
+    if args.compression is None and args.out != '-':
+        args.compression = compression_for_path(args.out)
+    if args.compression is not None and not EXPORT_FORMATS[args.format].compressible:
+        parser.error(f'the {args.format} format is already compressed')
+    return schema, [by_lower_name[field.lower()] for field in fields]
+
+def _write(output, stream):
+    """Write encoded pieces of output to a binary stream"""
+    write = stream.write
+    for piece in output:
+        write(piece)
+
+def run_generate(args, parser: argparse.ArgumentParser) -> int:
+    """Run the generate subcommand
+
+    Returns:
+        Process exit status
+    """
+    schema, fields = _validate(args, parser)
+    logging.disable(logging.WARNING)
+    start = time.perf_counter()
+    try:
+        generator = ModularDataGenerator(args.locale, fields=fields, unique_ids=args.unique_ids, schema=schema)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        if args.format == 'sqlite' and args.compression is None and args.out != '-':
+            # Rows are inserted straight into the database file, without a temporary copy
+            write_sqlite(generator.iter_bulk(args.count, args.chunk_size, args.seed, args.workers, args.offset),
+                         args.out, args.locale, fields, schema=generator.schema, unique_keys=args.unique_ids)
+        else:
+            output = iter_export(generator, args.count, fields, args.format, chunk_size=args.chunk_size,
+                                 seed=args.seed, workers=args.workers, offset=args.offset,
+                                 compression=args.compression, binary=True)
+            if args.out == '-':
+                _write(output, sys.stdout.buffer)
+                sys.stdout.buffer.flush()
+            else:
+                with open(args.out, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                    _write(output, f)
+    except BrokenPipeError:
+        # The reading end (e.g. head) closed early; silence the flush at interpreter exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    except ValueError as e:
+        print(f"generate: error: {e}", file=sys.stderr)
+        return 1
+
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        summary = (f"Generated {args.count:,} records ({args.locale}, {args.format}) in {elapsed:.2f} s, "
+                   f"{args.count / elapsed if elapsed > 0 else 0:,.0f} records/s")
+        peak = _peak_memory_bytes()
+        if peak is not None:
+            summary += f", peak memory {peak / 2**20:,.1f} MiB"
+        print(summary, file=sys.stderr)
+    return 0
@@ -2,9 +2,15 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from generators.modular_generator import ModularDataGenerator
 from generators.data_loader import DataLoader
+from generators.compression import COMPRESSIONS, available_compressions, compression_for_path
+from generators.exporters import EXPORT_FORMATS
+from generators.schema import default_schema
 import logging
 import os
-from sql.sql_generator import generate_sql
+from desktop_gui.export_worker import ExportWorker
+
+# Milliseconds between progress updates of a running export
+PROGRESS_INTERVAL = 200
 
 class DataGeneratorApp:
     def __init__(self, root):
@@ -29,7 +35,9 @@ class DataGeneratorApp:
         # Initialize UI
         self.selected_locale = tk.StringVar(value=self.locales[0])
         self.generator = None
+        self.worker = None
         self.create_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def create_ui(self):
         """Create dynamic UI based on available locales"""
@@ -73,68 +81,53 @@ class DataGeneratorApp:
             variable=self.output_format,
             value='sql'
         ).grid(row=0, column=1, padx=5)
+        ttk.Radiobutton(
+            format_frame,
+            text="PostgreSQL COPY",
+            variable=self.output_format,
+            value='pgcopy'
+        ).grid(row=0, column=2, padx=5)
+        ttk.Radiobutton(
+            format_frame,
+            text="MySQL LOAD DATA",
+            variable=self.output_format,
+            value='mysql'
+        ).grid(row=0, column=3, padx=5)
+        ttk.Radiobutton(
+            format_frame,
+            text="SQLite",
+            variable=self.output_format,
+            value='sqlite'
+        ).grid(row=0, column=4, padx=5)
 
         # Output fields selection
         fields_frame = ttk.LabelFrame(self.root, text="Include Fields", padding=10)
         fields_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        # Personal info fields
-        self.include_name = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="Name",
-            variable=self.include_name
-        ).grid(row=0, column=0, padx=5, sticky="w")
-
-        self.include_surname = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="Surname",
-            variable=self.include_surname
-        ).grid(row=0, column=1, padx=5, sticky="w")
-
-        self.include_id = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="ID",
-            variable=self.include_id
-        ).grid(row=0, column=2, padx=5, sticky="w")
-
-        self.include_birthdate = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="Birth Date",
-            variable=self.include_birthdate
-        ).grid(row=0, column=3, padx=5, sticky="w")
-
-        # Address fields
-        self.include_street = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="Street",
-            variable=self.include_street
-        ).grid(row=1, column=0, padx=5, sticky="w")
-
-        self.include_city = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="City",
-            variable=self.include_city
-        ).grid(row=1, column=1, padx=5, sticky="w")
-
-        self.include_country = tk.BooleanVar(value=True)
-        ttk.Checkbutton(
-            fields_frame,
-            text="Country",
-            variable=self.include_country
-        ).grid(row=1, column=2, padx=5, sticky="w")
+        # One checkbox per schema column, the selected ones checked
+        self.include_fields = {}
+        for i, column in enumerate(default_schema().columns):
+            self.include_fields[column.name] = tk.BooleanVar(value=column.selected)
+            ttk.Checkbutton(
+                fields_frame,
+                text=column.name,
+                variable=self.include_fields[column.name]
+            ).grid(row=i // 4, column=i % 4, padx=5, sticky="w")
         
-        # Generate button
-        ttk.Button(
+        # Generate and cancel buttons
+        self.generate_button = ttk.Button(
             control_frame,
             text="Generate",
             command=self.on_generate_data
-        ).grid(row=0, column=2, padx=5)
+        )
+        self.generate_button.grid(row=0, column=2, padx=5)
+        self.cancel_button = ttk.Button(
+            control_frame,
+            text="Cancel",
+            command=self.on_cancel,
+            state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=0, column=3, padx=5)
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -143,6 +136,8 @@ class DataGeneratorApp:
             textvariable=self.status_var,
             relief=tk.SUNKEN
         ).pack(fill=tk.X, side=tk.BOTTOM)
+        self.progress = ttk.Progressbar(self.root, mode='determinate')
+        self.progress.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=2)
         
         # Initialize generator for default locale
         self.change_locale()
@@ -162,6 +157,8 @@ class DataGeneratorApp:
         if not self.generator:
             messagebox.showerror("Error", "No generator initialized!")
             return
+        if self.worker is not None:
+            return
             
         # Get and validate quantity
         try:
@@ -173,56 +170,79 @@ class DataGeneratorApp:
             return
             
         # Get selected fields
-        selected_fields = []
-        if self.include_name.get():
-            selected_fields.append("Name")
-        if self.include_surname.get():
-            selected_fields.append("Surname")
-        if self.include_id.get() and hasattr(self.generator, 'id_generator'):
-            selected_fields.append("ID")
-        if self.include_birthdate.get() and hasattr(self.generator, 'id_generator'):
-            selected_fields.append("Birth Date")
-        if self.include_street.get():
-            selected_fields.append("Street")
-        if self.include_city.get():
-            selected_fields.append("City")
-        if self.include_country.get():
-            selected_fields.append("Country")
+        selected_fields = [field for field, include in self.include_fields.items() if include.get()]
 
         if not selected_fields:
             messagebox.showerror("Error", "No fields selected for output!")
             return
             
         format = self.output_format.get()
-        if format == 'csv':
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv")],
-                title="Save generated data as..."
-            )
-            ext = '.csv'
-        else:
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".sql",
-                filetypes=[("SQL files", "*.sql")],
-                title="Save generated data as..."
-            )
-            ext = '.sql'
+        export_format = EXPORT_FORMATS[format]
+        filetypes = [(f"{export_format.label} files", f"*{export_format.extension}")]
+        if export_format.compressible:
+            # Choosing a compressed file type compresses the output while it is written
+            filetypes += [(f"{export_format.label} files ({COMPRESSIONS[name].label})",
+                           f"*{export_format.extension}{COMPRESSIONS[name].extension}")
+                          for name in available_compressions()]
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=export_format.extension,
+            filetypes=filetypes,
+            title="Save generated data as..."
+        )
 
         if file_path:
-            try:
-                data = self.generator.generate_bulk(quantity)
-                if format == 'csv':
-                    self.generator.to_csv(data, file_path, fields=selected_fields)
-                else:
-                    sql_content = generate_sql(data, self.selected_locale.get())
-                    with open(file_path, 'w') as f:
-                        f.write(sql_content)
-                messagebox.showinfo("Success", 
-                    f"Successfully saved {len(data)} records ({format.upper()}) with fields: {', '.join(selected_fields)}")
-            except Exception as e:
-                self.logger.error(f"Error generating data: {e}")
-                messagebox.showerror("Error", f"Failed to generate data: {e}")
+            compression = compression_for_path(file_path) if export_format.compressible else None
+            # Records are generated and written on a worker thread, chunk by chunk
+            self.worker = ExportWorker(self.generator, quantity, selected_fields, format, file_path,
+                                       compression=compression).start()
+            self.generate_button.configure(state=tk.DISABLED)
+            self.cancel_button.configure(state=tk.NORMAL)
+            self.progress.configure(maximum=quantity, value=0)
+            self.status_var.set(f"Generating {quantity:,} records...")
+            self.root.after(PROGRESS_INTERVAL, self.poll_export)
+
+    def poll_export(self):
+        """Show the progress of the running export, and its outcome once finished"""
+        worker = self.worker
+        if worker is None:
+            return
+        self.progress.configure(value=worker.records)
+        if not worker.finished:
+            self.status_var.set(f"Generated {worker.records:,} / {worker.quantity:,} records "
+                                f"({worker.records_per_sec:,.0f} records/s)")
+            self.root.after(PROGRESS_INTERVAL, self.poll_export)
+            return
+
+        self.worker = None
+        self.generate_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+        export_format = EXPORT_FORMATS[worker.format]
+        if worker.cancelled:
+            self.progress.configure(value=0)
+            self.status_var.set(f"Cancelled after {worker.records:,} records")
+        elif worker.error is not None:
+            self.logger.error(f"Error generating data: {worker.error}")
+            self.status_var.set("Generation failed")
+            messagebox.showerror("Error", f"Failed to generate data: {worker.error}")
+        else:
+            self.status_var.set(f"Saved {worker.quantity:,} records in {worker.elapsed:.1f} s "
+                                f"({worker.records_per_sec:,.0f} records/s)")
+            messagebox.showinfo("Success",
+                f"Successfully saved {worker.quantity} records ({export_format.label}) with fields: {', '.join(worker.fields)}")
+
+    def on_cancel(self):
+        """Handle cancel button click"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.configure(state=tk.DISABLED)
+            self.status_var.set("Cancelling...")
+
+    def on_close(self):
+        """Stop a running export, removing its partial file, before closing the window"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.join()
+        self.root.destroy()
 
 def run_desktop_app():
     root = tk.Tk()
@@ -0,0 +1,118 @@
+"""Background file exports for the desktop GUI
+
+An ExportWorker generates records chunk by chunk on its own thread and
+writes each chunk to the output file before the next one is generated, so
+the Tk main loop stays responsive and memory use is bounded by the chunk
+size rather than by the number of records. The GUI polls records,
+records_per_sec and finished from the main thread.
+"""
+import os
+import time
+import threading
+from typing import Iterator, List, Optional
+from generators.compression import iter_compressed
+from generators.exporters import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_chunks
+from sql.sqlite_writer import write_sqlite
+
+class ExportCancelled(Exception):
+    """Raised inside the worker thread when the export is cancelled"""
+
+class ExportWorker:
+    """Writes generated records to a file on a background thread
+
+    Args:
+        generator: ModularDataGenerator producing the records
+        quantity: Number of records to generate
+        fields: List of field names to include
+        format: Output format, a key of EXPORT_FORMATS
+        file_path: File to write (removed again if the export fails or is cancelled)
+        compression: Optional compression method, a key of generators.compression.COMPRESSIONS
+        chunk_size: Number of records generated and written at a time
+    """
+
+    def __init__(self, generator, quantity: int, fields: List[str], format: str, file_path: str,
+                 compression: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported output format: {format}")
+        self.generator = generator
+        self.quantity = quantity
+        self.fields = fields
+        self.format = format
+        self.file_path = file_path
+        self.compression = compression
+        self.chunk_size = chunk_size
+        # Records generated so far, written by the worker thread only
+        self.records = 0
+        self.error: Optional[BaseException] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="export-worker", daemon=True)
+
+    def start(self) -> "ExportWorker":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the worker to stop after the chunk being generated"""
+        self._cancel.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def cancelled(self) -> bool:
+        return isinstance(self.error, ExportCancelled)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def records_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self.records / elapsed if elapsed > 0 else 0.0
+
+    def _chunks(self) -> Iterator:
+        for chunk in self.generator.iter_bulk(self.quantity, self.chunk_size):
+            if self._cancel.is_set():
+                raise ExportCancelled()
+            self.records += len(chunk)
+            yield chunk
+        if self._cancel.is_set():
+            raise ExportCancelled()
+
+    def _run(self):
+        try:
+            self._write()
+        except BaseException as e:
+            self.error = e
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def _write(self):
+        locale = self.generator.locale
+        if self.format == 'sqlite' and self.compression is None:
+            # Rows are inserted straight into the database file
+            write_sqlite(self._chunks(), self.file_path, locale, self.fields, schema=self.generator.schema,
+                         unique_keys=self.generator.unique_ids)
+            return
+        output = export_chunks(self._chunks(), locale, self.fields, self.format, self.generator.schema,
+                               unique_keys=self.generator.unique_ids)
+        if self.compression is not None:
+            output = iter_compressed(output, self.compression)
+        if EXPORT_FORMATS[self.format].binary or self.compression is not None:
+            with open(self.file_path, 'wb') as f:
+                f.writelines(output)
+        else:
+            with open(self.file_path, 'w', encoding='utf-8', newline='') as f:
+                f.writelines(output)
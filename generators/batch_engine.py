@@ -0,0 +1,209 @@
+import random
+import logging
+from array import array
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from . import vectorized
+from .record_batch import CategoricalColumn, ConcatenatedValues
+
+ADDRESS_FIELDS = ("Street", "City", "Postal Code", "Gmina", "Powiat", "Wojewodztwo", "Country")
+# Fields of a generated record, in column order
+RECORD_FIELDS = ("Name", "Surname", "ID", "Birth Date") + ADDRESS_FIELDS
+# Address fields taken from the chosen postal code entry, with their postal index keys
+POSTAL_COLUMNS = (("City", "miejscowosc"), ("Postal Code", "pna"), ("Gmina", "gmina"),
+                  ("Powiat", "powiat"), ("Wojewodztwo", "wojewodztwo"))
+
+class GenerationPlan(NamedTuple):
+    """Generation steps needed for a set of requested fields"""
+    name: bool
+    surname: bool
+    ids: bool
+    street: bool
+    postal_columns: Tuple[Tuple[str, str], ...]
+    city: bool
+    country: bool
+
+    @classmethod
+    def for_fields(cls, fields: Optional[frozenset]) -> "GenerationPlan":
+        """Build the plan of a field set (None for all fields)"""
+        def wants(field: str) -> bool:
+            return fields is None or field in fields
+        return cls(
+            name=wants("Name"),
+            surname=wants("Surname"),
+            ids=wants("ID") or wants("Birth Date"),
+            street=wants("Street"),
+            postal_columns=tuple(column for column in POSTAL_COLUMNS if wants(column[0])),
+            city=wants("City"),
+            country=wants("Country"),
+        )
+
+    @property
+    def gender(self) -> bool:
+        # Names, Polish surnames and PESELs depend on the gender
+        return self.name or self.surname or self.ids
+
+    @property
+    def address(self) -> bool:
+        return self.street or self.city or self.country or bool(self.postal_columns)
+
+class ColumnarBatchEngine:
+    """Generates many records at once, one column at a time
+
+    All random draws for a column are taken in a single pass over the batch,
+    so per-record dictionary lookups, locale branching and function calls of
+    ModularDataGenerator.generate_record are paid once per batch instead.
+    Field semantics are the same as generate_record. Values taken from the
+    data lists are returned as CategoricalColumn codes into those lists.
+
+    Only the columns of the generator's GenerationPlan are generated, and
+    the generator's SchemaPlan then derives the output columns from them. When
+    rng provides per-slot streams (slot(name) -> random.Random, see
+    generators.sharding.SlotStreams), every step draws from its own slot, so
+    skipping a field does not shift the values of the others. With NumPy
+    installed, the draws are taken as arrays (see generators.vectorized).
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.logger = logging.getLogger(__name__)
+        self._warned_no_postal_data = False
+        self._combined: Dict[tuple, ConcatenatedValues] = {}
+
+    def _codes(self, values: Sequence[str], quantity: int, rng) -> array:
+        """Draw quantity indices into values, by weight for weighted data types"""
+        if vectorized.available(rng):
+            return vectorized.to_codes(vectorized.sample_indices(values, quantity, vectorized.generator(rng)))
+        alias_table = getattr(values, "alias_table", None)
+        if alias_table is not None:
+            return alias_table.sample(quantity, rng)
+        count = len(values)
+        if quantity and not count:
+            raise IndexError("Cannot choose from an empty sequence")
+        rand = rng.random
+        return array("I", [int(rand() * count) for _ in range(quantity)])
+
+    def _choices(self, values: Sequence[str], quantity: int, rng) -> CategoricalColumn:
+        """Draw quantity values with replacement, uniformly or by weight"""
+        return CategoricalColumn(self._codes(values, quantity, rng), values)
+
+    def _choices_by_gender(self, female: Sequence[bool], female_values: Sequence[str],
+                           male_values: Sequence[str], rng) -> CategoricalColumn:
+        """Draw one value per record from the list matching its gender"""
+        # Male values follow the female ones in the combined categories
+        offset = len(female_values)
+        if vectorized.available(rng):
+            numpy = vectorized.numpy
+            generator = vectorized.generator(rng)
+            female = numpy.asarray(female, dtype=bool)
+            female_count = int(female.sum())
+            codes = numpy.empty(len(female), dtype=numpy.uint32)
+            codes[female] = vectorized.sample_indices(female_values, female_count, generator)
+            codes[~female] = vectorized.sample_indices(male_values, len(female) - female_count, generator) + offset
+            return CategoricalColumn(vectorized.to_codes(codes), self._combined_values(female_values, male_values))
+        female_codes = iter(self._codes(female_values, sum(female), rng))
+        male_codes = iter(self._codes(male_values, len(female) - sum(female), rng))
+        codes = array("I", [next(female_codes) if is_female else next(male_codes) + offset
+                            for is_female in female])
+        return CategoricalColumn(codes, self._combined_values(female_values, male_values))
+
+    def _combined_values(self, female_values: Sequence[str], male_values: Sequence[str]) -> ConcatenatedValues:
+        """Return the shared view of both value lists, so batches can be concatenated without decoding"""
+        key = (id(female_values), id(male_values))
+        combined = self._combined.get(key)
+        if combined is None or combined.parts[0] is not female_values or combined.parts[1] is not male_values:
+            combined = self._combined[key] = ConcatenatedValues(female_values, male_values)
+        return combined
+
+    def generate_columns(self, quantity: int, rng=random, position: Optional[int] = None,
+                         seed: Optional[int] = None) -> Dict[str, Sequence[str]]:
+        """Generate quantity records as a mapping of field name to column values
+
+        Args:
+            quantity: Number of records to generate
+            rng: Source of randomness (random module or a random.Random instance)
+            position: Position of the first record of a seeded run (unique IDs)
+            seed: Master seed of a seeded run (unique IDs)
+
+        Returns:
+            Dictionary of equally long columns, in schema order and limited to the
+            columns the generator was created for
+        """
+        slot = getattr(rng, "slot", None)
+        if slot is None:
+            # A single stream serves every step
+            def slot(name):
+                return rng
+        columns = self._generate_fields(quantity, slot, position, seed)
+        return self.generator.schema_plan.apply(self, columns, quantity, slot)
+
+    def _generate_fields(self, quantity: int, slot, position: Optional[int],
+                         seed: Optional[int]) -> Dict[str, Sequence[str]]:
+        """Generate the built-in record fields of the generator's GenerationPlan"""
+        generator = self.generator
+        data_types = generator.data_types
+        plan = generator.plan
+        columns: Dict[str, Sequence[str]] = {}
+
+        # One flag per record, a boolean array when drawn with NumPy
+        female: Sequence[bool] = []
+        if plan.gender:
+            gender_rng = slot("gender")
+            if vectorized.available(gender_rng):
+                female = vectorized.generator(gender_rng).random(quantity) < 0.5
+            else:
+                rand = gender_rng.random
+                female = [rand() < 0.5 for _ in range(quantity)]
+        if plan.name:
+            columns["Name"] = self._choices_by_gender(
+                female, data_types.get("ImionaZenskie", []), data_types.get("ImionaMeskie", []), slot("name"))
+
+        if not plan.surname:
+            pass
+        elif generator.locale == "de":
+            # German uses combined surnames
+            columns["Surname"] = self._choices(data_types.get("Nazwiska", []), quantity, slot("surname"))
+        else:
+            # Polish uses gender-specific surnames
+            columns["Surname"] = self._choices_by_gender(
+                female, data_types.get("NazwiskaZenskie", []), data_types.get("NazwiskaMeskie", []), slot("surname"))
+
+        if generator.id_generator and plan.ids:
+            # IDs carry the same gender as the generated name
+            columns["ID"], columns["Birth Date"] = generator.generate_id_numbers(
+                quantity, female, slot("id"), position, seed)
+
+        if not plan.address:
+            return columns
+        countries = data_types.get("countries") if plan.country else None
+        if generator.parsed_postal_codes_data:
+            postal_index = generator.parsed_postal_codes_data
+            if plan.street or plan.postal_columns:
+                rows = generator.postal_sampler.sample(quantity, slot("address"))
+                if plan.street:
+                    columns["Street"] = postal_index.streets(rows, slot("house"))
+                for field, key in plan.postal_columns:
+                    columns[field] = postal_index.categorical(key, rows)
+            if plan.country:
+                columns["Country"] = (self._choices(countries, quantity, slot("country")) if countries
+                                      else ["Poland"] * quantity)
+        else:
+            if quantity and not self._warned_no_postal_data:
+                self.logger.warning("No postal code data available, generating simplified address.")
+                self._warned_no_postal_data = True
+            streets = data_types.get("streets") if plan.street else None
+            if streets:
+                street_rng = slot("street")
+                names = self._choices(streets, quantity, street_rng).decode()
+                if vectorized.available(street_rng):
+                    house_numbers = vectorized.generator(street_rng).integers(1, 151, quantity).tolist()
+                    columns["Street"] = [f"{street} {number}" for street, number in zip(names, house_numbers)]
+                else:
+                    rand = street_rng.random
+                    columns["Street"] = [f"{street} {int(rand() * 150) + 1}" for street in names]
+            cities = data_types.get("cities") if plan.city else None
+            if cities:
+                columns["City"] = self._choices(cities, quantity, slot("city"))
+            if countries:
+                columns["Country"] = self._choices(countries, quantity, slot("country"))
+
+        return columns
@@ -0,0 +1,118 @@
+"""Streaming compression of export output
+
+Output pieces are fed to an incremental compressor as they are generated,
+so compressed exports are produced chunk by chunk without buffering the
+whole document. gzip is always available; zstd needs the optional
+zstandard package.
+"""
+import gzip
+import zlib
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class Compression(NamedTuple):
+    """File naming, content type and HTTP content coding of a compression method"""
+    label: str
+    extension: str
+    mimetype: str
+    encoding: str
+
+COMPRESSIONS = {
+    'gzip': Compression('gzip', '.gz', 'application/gzip', 'gzip'),
+    'zstd': Compression('Zstandard', '.zst', 'application/zstd', 'zstd'),
+}
+# Preferred first when a client accepts several content codings
+_PREFERENCE = ('zstd', 'gzip')
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+
+def available_compressions() -> List[str]:
+    """Return the compression methods usable in this environment"""
+    return [name for name in COMPRESSIONS if name != 'zstd' or zstandard is not None]
+
+def check_compression(compression: str):
+    """Raise ValueError unless the compression method is known and available"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression not in available_compressions():
+        raise ValueError(f"Compression {compression} requires the zstandard package")
+
+def compression_for_path(path: str) -> Optional[str]:
+    """Return the compression method implied by a file name extension, if any"""
+    for name, compression in COMPRESSIONS.items():
+        if path.endswith(compression.extension):
+            return name
+    return None
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Choose the preferred available compression accepted by an Accept-Encoding header
+
+    Returns:
+        Compression name, or None if the client accepts none of them
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, parameters = part.strip().partition(";")
+        quality = 1.0
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                quality = float(parameter[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    available = available_compressions()
+    candidates = [name for name in _PREFERENCE if name in available
+                  and accepted.get(COMPRESSIONS[name].encoding, accepted.get("*", 0.0)) > 0]
+    if not candidates:
+        return None
+    # Highest quality wins, ties go to the preferred method
+    return max(candidates, key=lambda name: accepted.get(COMPRESSIONS[name].encoding, accepted.get("*", 0.0)))
+
+def iter_compressed(pieces: Iterable, compression: str = 'gzip', level: Optional[int] = None) -> Iterator[bytes]:
+    """Compress pieces of output incrementally
+
+    Args:
+        pieces: Iterable of str (encoded as UTF-8) or bytes pieces
+        compression: Compression method, a key of COMPRESSIONS
+        level: Compression level (the method's default when None)
+
+    Returns:
+        Iterator over compressed blocks, yielded as soon as the compressor emits them
+
+    Raises:
+        ValueError: On an unsupported or unavailable compression method
+    """
+    check_compression(compression)
+    level = DEFAULT_LEVELS[compression] if level is None else level
+    if compression == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    else:
+        # wbits=31 writes the gzip container
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return _compress(pieces, compressor)
+
+def _compress(pieces: Iterable, compressor) -> Iterator[bytes]:
+    for piece in pieces:
+        block = compressor.compress(piece.encode("utf-8") if isinstance(piece, str) else piece)
+        if block:
+            yield block
+    yield compressor.flush()
+
+def open_text(path: str, compression: Optional[str] = None):
+    """Open a text file for writing, compressed with the given method
+
+    Raises:
+        ValueError: On an unsupported or unavailable compression method
+    """
+    if compression is None:
+        return open(path, "w", encoding="utf-8")
+    check_compression(compression)
+    if compression == 'zstd':
+        return zstandard.open(path, "wt", encoding="utf-8", cctx=zstandard.ZstdCompressor(level=DEFAULT_LEVELS['zstd']))
+    return gzip.open(path, "wt", encoding="utf-8", compresslevel=DEFAULT_LEVELS['gzip'])
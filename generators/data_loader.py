@@ -1,12 +1,69 @@
 import os
+import time
 import logging
-from typing import Dict, List
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from . import dataset_cache, metrics
+from .weighted import parse_lines
+
+class LazyDataTypes(Mapping):
+    """Data types of a locale, each loaded on first access
+
+    Membership and iteration only use the discovered names, so checking
+    for a data type does not load it.
+    """
+
+    def __init__(self, names: List[str], load: Callable[[str], Sequence[str]]):
+        self._names = dict.fromkeys(names)
+        self._load = load
+        self._values: Dict[str, Sequence[str]] = {}
+        self._lock = threading.Lock()
+        # Called with the name and the load time in seconds of every data type loaded
+        self.on_load: Optional[Callable[[str, float], None]] = None
+
+    def __getitem__(self, name: str) -> Sequence[str]:
+        values = self._values.get(name)
+        if values is not None:
+            return values
+        if name not in self._names:
+            raise KeyError(name)
+        with self._lock:
+            values = self._values.get(name)
+            if values is None:
+                start = time.perf_counter()
+                values = self._values[name] = self._load(name)
+                if self.on_load is not None:
+                    self.on_load(name, time.perf_counter() - start)
+        return values
+
+    def __contains__(self, name) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def loaded(self) -> List[str]:
+        """Return the names of the data types loaded so far"""
+        return list(self._values)
+
+    def load_all(self):
+        """Load every data type"""
+        for name in self._names:
+            self[name]
+
+    def __repr__(self) -> str:
+        return f"LazyDataTypes({list(self._names)}, loaded={self.loaded()})"
 
 class DataLoader:
     """Handles dynamic discovery and loading of data files"""
     
-    def __init__(self, base_data_path: str):
+    def __init__(self, base_data_path: str, use_cache: bool = True):
         self.base_data_path = base_data_path
+        self.use_cache = use_cache
         self.logger = logging.getLogger(__name__)
         
     def discover_locales(self) -> List[str]:
@@ -18,28 +75,56 @@ class DataLoader:
             self.logger.error(f"Error discovering locales: {e}")
             return []
 
-    def discover_data_types(self, locale: str) -> Dict[str, List[str]]:
-        """Discover available data types for a locale"""
-        data_types = {}
+    def discover_data_types(self, locale: str) -> Mapping[str, Sequence[str]]:
+        """Discover available data types for a locale
+
+        Text files are read lazily, on first access to their data type
+        (see LazyDataTypes). A fresh compiled cache (see
+        generators.dataset_cache) is memory-mapped instead of parsing the
+        text files.
+        """
         locale_path = os.path.join(self.base_data_path, locale)
+
+        if self.use_cache and os.path.isdir(locale_path):
+            cached = dataset_cache.load_cache(locale_path)
+            metrics.CACHE_LOOKUPS.inc(cache="compiled", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
         
         try:
+            filenames = {}
             if os.path.exists(locale_path):
                 for filename in os.listdir(locale_path):
                     if filename.endswith('.txt'):
-                        data_type = filename.split('.')[0]
-                        data_types[data_type] = self._load_file(locale_path, filename)
-            return data_types
+                        filenames[filename.split('.')[0]] = filename
+            return LazyDataTypes(list(filenames), lambda name: self._load_file(locale_path, filenames[name]))
         except Exception as e:
             self.logger.error(f"Error discovering data types for {locale}: {e}")
             return {}
 
+    def compile_cache(self, locale: str) -> str:
+        """Compile the text data files of a locale into a binary cache
+
+        Returns:
+            Path of the written cache file
+        """
+        locale_path = os.path.join(self.base_data_path, locale)
+        data_types = {}
+        for filename in os.listdir(locale_path):
+            if filename.endswith('.txt'):
+                data_types[filename.split('.')[0]] = self._load_file(locale_path, filename)
+        return dataset_cache.write_cache(locale_path, data_types)
+
     def _load_file(self, locale_path: str, filename: str) -> List[str]:
-        """Load data from a single file"""
+        """Load data from a single file
+
+        Lines may carry a tab-separated weight; such files are returned as
+        WeightedValues with a prebuilt alias table (see generators.weighted).
+        """
         file_path = os.path.join(locale_path, filename)
         try:
             with open(file_path, encoding='utf-8') as f:
-                return [line.strip() for line in f if line.strip()]
+                return parse_lines(line.strip() for line in f if line.strip())
         except FileNotFoundError:
             self.logger.error(f"File not found: {file_path}")
             return []
@@ -0,0 +1,271 @@
+"""Precompiled binary cache of locale data files
+
+A locale directory is compiled into a single artifact holding, for every
+data type, a packed UTF-8 blob and an array of uint32 offsets, plus the
+alias table (float64 probabilities, uint32 aliases) of weighted data types.
+Loading maps the artifact into memory, so values are decoded only when
+accessed instead of materialising one str object per line.
+
+Layout (little-endian):
+    magic (8 bytes) | manifest length (u32) | JSON manifest | padding | sections
+
+Run ``python -m generators.dataset_cache [locale ...]`` to compile the caches.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import logging
+from array import array
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+from .weighted import AliasTable, WeightedValues
+
+CACHE_FILENAME = "dataset.cache"
+# Data types up to this size are decoded into plain lists, larger ones stay packed
+EAGER_DECODE_LIMIT = 10000
+MAGIC = b"DGCACHE2"
+_HEADER = struct.Struct("<8sI")
+_ALIGNMENT = 8
+
+logger = logging.getLogger(__name__)
+
+class PackedStringList(Sequence):
+    """Read-only sequence of strings backed by a packed UTF-8 blob and offsets"""
+
+    __slots__ = ("_offsets", "_blob", "_buffer")
+
+    def __init__(self, offsets: memoryview, blob: memoryview, buffer=None):
+        self._offsets = offsets
+        self._blob = blob
+        self._buffer = buffer  # Keeps the underlying mmap alive
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PackedStringList index out of range")
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def take(self, indices: List[int]) -> List[str]:
+        """Decode the values at the given indices in one pass"""
+        offsets = self._offsets
+        blob = self._blob
+        return [str(blob[offsets[i]:offsets[i + 1]], "utf-8") for i in indices]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PackedStringList, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PackedStringList(<{len(self)} items>)"
+
+def _source_files(locale_path: str) -> List[str]:
+    return sorted(f for f in os.listdir(locale_path) if f.endswith('.txt'))
+
+def source_signature(locale_path: str) -> List[list]:
+    """Return [filename, size, mtime_ns] for every data file of a locale"""
+    signature = []
+    for filename in _source_files(locale_path):
+        stat = os.stat(os.path.join(locale_path, filename))
+        signature.append([filename, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+def source_checksum(locale_path: str) -> str:
+    """Return the SHA-256 of the names and contents of all data files of a locale"""
+    digest = hashlib.sha256()
+    for filename in _source_files(locale_path):
+        digest.update(filename.encode("utf-8") + b"\0")
+        with open(os.path.join(locale_path, filename), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _pad(output, position: int) -> int:
+    padding = -position % _ALIGNMENT
+    output.write(b"\0" * padding)
+    return position + padding
+
+def write_cache(locale_path: str, data_types: Dict[str, List[str]], cache_path: Optional[str] = None) -> str:
+    """Compile already loaded data types of a locale into a binary cache file
+
+    Args:
+        locale_path: Locale directory the data types were loaded from
+        data_types: Mapping of data type name to its values
+        cache_path: Output file (defaults to <locale_path>/dataset.cache)
+
+    Returns:
+        Path of the written cache file
+    """
+    cache_path = cache_path or os.path.join(locale_path, CACHE_FILENAME)
+    # (name, count, [(section key, bytes)]) per data type
+    sections = []
+    for name, values in sorted(data_types.items()):
+        parts = []
+        if isinstance(values, WeightedValues):
+            parts.append(("prob", array("d", values.alias_table.prob).tobytes()))
+            parts.append(("alias", array("I", values.alias_table.alias).tobytes()))
+            values = values.values
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = array("I", [0])
+        total = 0
+        for value in encoded:
+            total += len(value)
+            offsets.append(total)
+        parts[:0] = [("offsets", offsets.tobytes()), ("blob", b"".join(encoded))]
+        sections.append((name, len(encoded), parts))
+
+    # Section positions are relative to the start of the data area
+    types = {}
+    position = 0
+    for name, count, parts in sections:
+        section = {"count": count}
+        for key, data in parts:
+            position += -position % _ALIGNMENT
+            section[key] = position
+            position += len(data)
+        section["blob_len"] = len(parts[1][1])
+        types[name] = section
+
+    manifest = json.dumps({
+        "sources": source_signature(locale_path),
+        "checksum": source_checksum(locale_path),
+        "types": types,
+    }).encode("utf-8")
+
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as output:
+        output.write(_HEADER.pack(MAGIC, len(manifest)))
+        output.write(manifest)
+        _pad(output, _HEADER.size + len(manifest))
+        position = 0
+        for name, count, parts in sections:
+            for key, data in parts:
+                position = _pad(output, position)
+                output.write(data)
+                position += len(data)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+_SECTION_KEYS = ("count", "offsets", "blob", "blob_len")
+
+def _manifest_complete(manifest) -> bool:
+    """Check that a manifest has every key load_cache reads"""
+    if not isinstance(manifest, dict) or not {"sources", "checksum", "types"} <= manifest.keys():
+        return False
+    types = manifest["types"]
+    return isinstance(types, dict) and all(
+        isinstance(section, dict) and all(key in section for key in _SECTION_KEYS) for section in types.values())
+
+def _rewrite_manifest(cache_path: str, manifest: Dict, data: memoryview):
+    """Replace the manifest of a cache file, keeping its data sections"""
+    encoded = json.dumps(manifest).encode("utf-8")
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as output:
+            output.write(_HEADER.pack(MAGIC, len(encoded)))
+            output.write(encoded)
+            _pad(output, _HEADER.size + len(encoded))
+            output.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # The cache stays valid, later loads just check the contents again
+        logger.warning(f"Could not update dataset cache manifest {cache_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_cache(locale_path: str, cache_path: Optional[str] = None,
+               eager_limit: int = EAGER_DECODE_LIMIT) -> Optional[Dict[str, Sequence]]:
+    """Memory-map a compiled cache of a locale
+
+    Args:
+        locale_path: Locale directory the cache was compiled from
+        cache_path: Cache file (defaults to <locale_path>/dataset.cache)
+        eager_limit: Data types with at most this many values are returned as plain lists
+
+    Returns:
+        Lazy mapping of data type name to its values, or None when the cache
+        is missing, unreadable or stale with respect to the source files
+    """
+    cache_path = cache_path or os.path.join(locale_path, CACHE_FILENAME)
+    # Arrays are mapped as native types, the artifact stores them little-endian
+    if sys.byteorder != "little" or not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, manifest_len = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            logger.warning(f"Ignoring dataset cache with unknown format: {cache_path}")
+            return None
+        manifest = json.loads(buffer[_HEADER.size:_HEADER.size + manifest_len].decode("utf-8"))
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Error reading dataset cache {cache_path}: {e}")
+        return None
+
+    if not _manifest_complete(manifest):
+        logger.warning(f"Ignoring dataset cache with an incomplete manifest: {cache_path}")
+        return None
+
+    from .data_loader import LazyDataTypes
+
+    data_start = _HEADER.size + manifest_len
+    data_start += -data_start % _ALIGNMENT
+    view = memoryview(buffer)
+    types = manifest["types"]
+
+    # Size and mtime are checked first; the checksum only decides when they differ (e.g. after a checkout)
+    signature = source_signature(locale_path)
+    if manifest["sources"] != signature:
+        if manifest["checksum"] != source_checksum(locale_path):
+            logger.warning(f"Dataset cache {cache_path} is stale, falling back to text files")
+            return None
+        # Same contents: store the new sizes and mtimes so later loads skip the checksum
+        _rewrite_manifest(cache_path, dict(manifest, sources=signature), view[data_start:])
+
+    def load_section(name: str) -> Sequence:
+        section = types[name]
+        offsets_start = data_start + section["offsets"]
+        offsets_end = offsets_start + (section["count"] + 1) * 4
+        blob_start = data_start + section["blob"]
+        values = PackedStringList(
+            view[offsets_start:offsets_end].cast("I"),
+            view[blob_start:blob_start + section["blob_len"]],
+            buffer,
+        )
+        if len(values) <= eager_limit:
+            values = list(values)
+        if "prob" in section:
+            prob_start = data_start + section["prob"]
+            alias_start = data_start + section["alias"]
+            values = WeightedValues(values, AliasTable(
+                view[prob_start:prob_start + section["count"] * 8].cast("d"),
+                view[alias_start:alias_start + section["count"] * 4].cast("I"),
+            ))
+        return values
+
+    # Sections are decoded on first access
+    return LazyDataTypes(list(types), load_section)
+
+def main(argv: Optional[List[str]] = None):
+    """Compile dataset caches for the given locales (all locales by default)"""
+    from .data_loader import DataLoader
+    from .dataset_registry import DEFAULT_DATA_PATH
+
+    logging.basicConfig(level=logging.INFO)
+    data_loader = DataLoader(DEFAULT_DATA_PATH, use_cache=False)
+    locales = (argv if argv is not None else sys.argv[1:]) or data_loader.discover_locales()
+    for locale in locales:
+        cache_path = data_loader.compile_cache(locale)
+        print(f"Compiled {locale} -> {cache_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
+from . import metrics
+from .data_loader import DataLoader, LazyDataTypes
+from .postal_index import PostalIndex
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), "../data/")
+
+class DatasetRegistry:
+    """Process-wide, thread-safe cache of locale data types
+
+    Each locale is loaded once through DataLoader and shared by every
+    generator. An entry is reloaded when the size or modification time of
+    any data file in the locale directory changes, together with the
+    structures derived from it (the postal index).
+    """
+
+    def __init__(self, base_data_path: str = DEFAULT_DATA_PATH):
+        self.data_loader = DataLoader(base_data_path)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._locale_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, Tuple[tuple, Dict[str, List[str]]]] = {}
+        self._postal_indexes: Dict[str, Tuple[Dict[str, List[str]], PostalIndex]] = {}
+        # Locales whose current data is fully loaded
+        self._warm: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, locale: str) -> tuple:
+        """Return (filename, mtime_ns, size) for every data file of a locale"""
+        locale_path = os.path.join(self.data_loader.base_data_path, locale)
+        try:
+            signature = []
+            for entry in os.scandir(locale_path):
+                if entry.name.endswith('.txt'):
+                    stat = entry.stat()
+                    signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+            return tuple(sorted(signature))
+        except OSError:
+            return ()
+
+    def get_data_types(self, locale: str) -> Mapping[str, Sequence[str]]:
+        """Return the data types of a locale, discovering them on first use
+
+        Data types are read lazily on first access (see DataLoader). The
+        returned mapping is shared between callers and must not be modified.
+        """
+        signature = self._signature(locale)
+        with self._lock:
+            entry = self._entries.get(locale)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                metrics.CACHE_LOOKUPS.inc(cache="registry", result="hit")
+                return entry[1]
+            locale_lock = self._locale_locks.setdefault(locale, threading.Lock())
+
+        # Load outside the registry lock so different locales load concurrently
+        with locale_lock:
+            with self._lock:
+                entry = self._entries.get(locale)
+                if entry is not None and entry[0] == signature:
+                    self.hits += 1
+                    metrics.CACHE_LOOKUPS.inc(cache="registry", result="hit")
+                    return entry[1]
+                self.misses += 1
+                metrics.CACHE_LOOKUPS.inc(cache="registry", result="miss")
+            if entry is not None:
+                self.logger.info(f"Data files for locale {locale} changed, reloading")
+            data_types = self._load(locale)
+            with self._lock:
+                self._entries[locale] = (signature, data_types)
+                self._warm.discard(locale)
+            return data_types
+
+    def _load(self, locale: str) -> Mapping[str, Sequence[str]]:
+        """Discover the data types of a locale, timing the discovery and each later data type load"""
+        label = metrics.locale_label(locale)
+        start = time.perf_counter()
+        data_types = self.data_loader.discover_data_types(locale)
+        metrics.DATASET_LOAD_SECONDS.observe(time.perf_counter() - start, locale=label)
+        if isinstance(data_types, LazyDataTypes):
+            data_types.on_load = lambda name, seconds: metrics.DATASET_LOAD_SECONDS.observe(seconds, locale=label)
+        return data_types
+
+    def get_postal_index(self, locale: str) -> PostalIndex:
+        """Return the postal index of a locale, built once per loaded version of its data"""
+        data_types = self.get_data_types(locale)
+        with self._lock:
+            entry = self._postal_indexes.get(locale)
+            if entry is not None and entry[0] is data_types:
+                return entry[1]
+            locale_lock = self._locale_locks.setdefault(locale, threading.Lock())
+        with locale_lock:
+            with self._lock:
+                entry = self._postal_indexes.get(locale)
+                if entry is not None and entry[0] is data_types:
+                    return entry[1]
+            postal_index = PostalIndex(data_types.get('kody_pocztowe', []))
+            with self._lock:
+                self._postal_indexes[locale] = (data_types, postal_index)
+            return postal_index
+
+    def _load_all(self, locale: str) -> Mapping[str, Sequence[str]]:
+        data_types = self.get_data_types(locale)
+        load_all = getattr(data_types, "load_all", None)
+        if load_all is not None:
+            load_all()
+        with self._lock:
+            if self._entries.get(locale, (None, None))[1] is data_types:
+                self._warm.add(locale)
+        return data_types
+
+    def preload(self, locales: Optional[List[str]] = None, max_workers: Optional[int] = None):
+        """Load every data type of the given locales (all discovered locales by default) in parallel"""
+        if locales is None:
+            locales = self.data_loader.discover_locales()
+        if not locales:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers or len(locales)) as executor:
+            for locale, data_types in zip(locales, executor.map(self._load_all, locales)):
+                self.logger.info(f"Preloaded locale {locale} ({len(data_types)} data types)")
+
+    def start_preload(self, locales: Optional[List[str]] = None, max_workers: Optional[int] = None) -> threading.Thread:
+        """Run preload in a background thread, so callers need not wait for it"""
+        thread = threading.Thread(target=self.preload, args=(locales, max_workers), name="dataset-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def warm_locales(self) -> List[str]:
+        """Return the locales whose data types are all loaded"""
+        with self._lock:
+            return sorted(self._warm)
+
+    def invalidate(self, locale: Optional[str] = None):
+        """Drop the cached entry of a locale, or of all locales"""
+        with self._lock:
+            if locale is None:
+                self._entries.clear()
+                self._postal_indexes.clear()
+                self._warm.clear()
+            else:
+                self._entries.pop(locale, None)
+                self._postal_indexes.pop(locale, None)
+                self._warm.discard(locale)
+
+    def stats(self) -> Dict[str, object]:
+        """Return cache hit/miss counters and the currently loaded locales"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'locales': sorted(self._entries),
+            }
+
+_default_registry: Optional[DatasetRegistry] = None
+_default_registry_lock = threading.Lock()
+
+def get_registry() -> DatasetRegistry:
+    """Return the process-wide registry used by generators by default"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = DatasetRegistry()
+        return _default_registry
@@ -0,0 +1,131 @@
+import io
+import csv
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+from . import metrics
+from .compression import iter_compressed
+from .record_batch import iter_rows
+
+DEFAULT_CHUNK_SIZE = 10000
+
+class ExportFormat(NamedTuple):
+    """File naming and content type of an output format"""
+    label: str
+    extension: str
+    mimetype: str
+    binary: bool
+    # Worth compressing; archives are compressed already
+    compressible: bool = True
+
+EXPORT_FORMATS = {
+    'csv': ExportFormat('CSV', '.csv', 'text/csv', False),
+    'sql': ExportFormat('SQL', '.sql', 'application/sql', False),
+    'pgcopy': ExportFormat('PostgreSQL COPY', '.copy.sql', 'application/sql', False),
+    'mysql': ExportFormat('MySQL LOAD DATA', '.mysql.zip', 'application/zip', True, compressible=False),
+    'sqlite': ExportFormat('SQLite', '.db', 'application/vnd.sqlite3', True),
+}
+
+def iter_csv(chunks: Iterable[Sequence[Dict[str, str]]], fields: List[str]) -> Iterator[str]:
+    """Generate CSV output incrementally, one piece per chunk of records
+
+    Args:
+        chunks: Iterable of RecordBatch chunks or record lists
+        fields: List of field names to write, in column order
+
+    Yields:
+        The header line with the rows of the first chunk, then the rows of each further chunk
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(fields)
+    # The first chunk is generated before anything is yielded, so generation
+    # errors surface before a streamed response has started
+    for records in chunks:
+        writer.writerows(iter_rows(records, fields))
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    if output.tell():
+        # No records: just the header
+        yield output.getvalue()
+
+def iter_encoded(pieces: Iterable) -> Iterator[bytes]:
+    """Encode text pieces of output as UTF-8, passing bytes pieces through"""
+    for piece in pieces:
+        yield piece.encode("utf-8") if isinstance(piece, str) else piece
+
+def iter_export(generator, quantity: int, fields: List[str], format: str = 'csv',
+                chunk_size: int = DEFAULT_CHUNK_SIZE, seed: Optional[int] = None, workers: int = 1,
+                offset: int = 0, compression: Optional[str] = None, binary: bool = False,
+                **sql_options) -> Iterator[str]:
+    """Stream quantity generated records in the requested output format
+
+    Records are generated chunk by chunk while the output is consumed, so
+    memory use is bounded by chunk_size rather than by quantity.
+
+    Args:
+        generator: ModularDataGenerator producing the records
+        quantity: Number of records to generate
+        fields: List of field names to include
+        format: Output format, a key of EXPORT_FORMATS
+        chunk_size: Number of records generated per chunk (unseeded runs)
+        seed: Master seed making the output reproducible
+        workers: Number of worker processes generating records
+        offset: Position of the first seeded record, for paginated exports
+        compression: Optional compression method, a key of generators.compression.COMPRESSIONS
+        binary: Encode text output as UTF-8, for writers of binary streams
+        **sql_options: Options of sql.sql_generator.iter_sql (batch_size, transaction)
+
+    Returns:
+        Iterator over pieces of the output document (bytes for binary formats,
+        compressed or binary output, str otherwise)
+
+    Raises:
+        ValueError: On an unsupported format or compression method
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported output format: {format}")
+    if compression is not None and not EXPORT_FORMATS[format].compressible:
+        raise ValueError(f"Output format {format} is already compressed")
+    chunks = generator.iter_bulk(quantity, chunk_size, seed, workers, offset)
+    trace = metrics.export_trace(generator.locale, format)
+    if trace is not None:
+        chunks = trace.chunks(chunks)
+    output = export_chunks(chunks, generator.locale, fields, format, generator.schema,
+                           unique_keys=generator.unique_ids, **sql_options)
+    if compression is not None:
+        output = iter_compressed(output, compression)
+    elif binary and not EXPORT_FORMATS[format].binary:
+        output = iter_encoded(output)
+    return output if trace is None else trace.pieces(output)
+
+def export_chunks(chunks: Iterable[Sequence[Dict[str, str]]], locale: str, fields: List[str],
+                  format: str = 'csv', schema=None, unique_keys: bool = False, **sql_options) -> Iterator[str]:
+    """Write already generated chunks of records in the requested output format
+
+    Args:
+        chunks: Iterable of RecordBatch chunks or record lists
+        locale: Locale code (e.g. 'pl', 'de')
+        fields: List of field names to include
+        format: Output format, a key of EXPORT_FORMATS
+        schema: generators.schema.Schema with the SQL table layout (the default schema if None)
+        unique_keys: The records have unique IDs, so SQLite tables get primary and foreign keys
+        **sql_options: Options of sql.sql_generator.iter_sql (batch_size, transaction)
+
+    Returns:
+        Iterator over pieces of the output document (bytes for binary formats, str otherwise)
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported output format: {format}")
+    if format == 'sql':
+        from sql.sql_generator import iter_sql
+        return iter_sql(chunks, locale, fields, schema=schema, **sql_options)
+    if format == 'pgcopy':
+        from sql.bulk_load import iter_pg_copy
+        return iter_pg_copy(chunks, locale, fields, schema)
+    if format == 'mysql':
+        from sql.bulk_load import iter_mysql_load_data
+        return iter_mysql_load_data(chunks, locale, fields, schema)
+    if format == 'sqlite':
+        from sql.sqlite_writer import iter_sqlite
+        return iter_sqlite(chunks, locale, fields, schema=schema, unique_keys=unique_keys)
+    return iter_csv(chunks, fields)
@@ -1,4 +1,7 @@
 import random
+from datetime import date
+from .. import vectorized
+from ..permutation import FeistelPermutation
 
 def generate_id_number(year: int = None, month: int = None, day: int = None, gender: str = None):
     """
@@ -48,3 +51,189 @@ def generate_id_number(year: int = None, month: int = None, day: int = None, gen
     id_number = id_base + str(checksum)
 
     return id_number, birth_date
+
+
+_batch_tables = None
+
+def _get_batch_tables():
+    """Build (once) the lookup tables used by generate_id_numbers
+
+    Date parts are stored pre-formatted with their digit sums; the digit sum of
+    the random part is looked up in three-digit groups.
+    """
+    global _batch_tables
+    if _batch_tables is None:
+        year_month_codes = []  # "YYMM" per (year, month)
+        year_month_sums = []
+        year_month_days = []
+        birth_prefixes = []  # "YYYY-MM-"
+        for year in range(1900, 2100):
+            for month in range(1, 13):
+                code = f"{year % 100:02d}{month:02d}"
+                year_month_codes.append(code)
+                year_month_sums.append(sum(int(d) for d in code))
+                year_month_days.append(31 if month in {1, 3, 5, 7, 8, 10, 12} else
+                                       30 if month in {4, 6, 9, 11} else
+                                       28 if year % 4 != 0 or (year % 100 == 0 and year % 400 != 0) else 29)
+                birth_prefixes.append(f"{year}-{month:02d}-")
+        day_codes = [f"{day:02d}" for day in range(32)]
+        group_sums = [sum(int(d) for d in str(value)) for value in range(1000)]
+        _batch_tables = (year_month_codes, year_month_sums, year_month_days, birth_prefixes, day_codes, group_sums)
+    return _batch_tables
+
+_numpy_tables = None
+
+def _get_numpy_tables():
+    """Build (once) the batch tables as NumPy arrays, strings as character codes"""
+    global _numpy_tables
+    if _numpy_tables is None:
+        numpy = vectorized.numpy
+        year_month_codes, year_month_sums, year_month_days, birth_prefixes, day_codes, group_sums = _get_batch_tables()
+        _numpy_tables = (vectorized.char_table(year_month_codes), numpy.array(year_month_sums),
+                         numpy.array(year_month_days), vectorized.char_table(birth_prefixes),
+                         vectorized.char_table(day_codes), numpy.array(group_sums),
+                         vectorized.char_table([f"{value:03d}" for value in range(1000)]))
+    return _numpy_tables
+
+def _generate_id_numbers_numpy(n: int, rng):
+    """generate_id_numbers with NumPy: the same draws, assembled as character code arrays"""
+    numpy = vectorized.numpy
+    (year_month_codes, year_month_sums, year_month_days, birth_prefixes,
+     day_codes, group_sums, group_codes) = _get_numpy_tables()
+    generator = vectorized.generator(rng)
+
+    year_months = generator.integers(0, 2400, n)
+    days = (generator.random(n) * year_month_days[year_months]).astype(numpy.intp) + 1
+    random_parts = generator.integers(0, 1000000000, n)
+
+    groups = (random_parts // 1000000, random_parts // 1000 % 1000, random_parts % 1000)
+    checksums = (year_month_sums[year_months] + group_sums[days]
+                 + group_sums[groups[0]] + group_sums[groups[1]] + group_sums[groups[2]]) % 10
+    # Random parts are written with nine digits, IDs NUL padded to 16 characters
+    id_numbers = numpy.zeros((n, 16), dtype=numpy.uint32)
+    id_numbers[:, 0:4] = year_month_codes[year_months]
+    id_numbers[:, 4:6] = day_codes[days]
+    for index, group in enumerate(groups):
+        id_numbers[:, 6 + 3 * index:9 + 3 * index] = group_codes[group]
+    id_numbers[:, 15] = checksums + ord("0")
+    # Shorter random parts lose their leading zeros down to four digits ("{:04d}")
+    short = numpy.flatnonzero(random_parts < 100000000)
+    if len(short):
+        widths = 4 + (random_parts[short, None] >= numpy.array([10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7])).sum(axis=1)
+        shift = (9 - widths)[:, None]
+        columns = numpy.arange(6, 16)
+        sources = numpy.minimum(columns + shift, 15)
+        id_numbers[short, 6:16] = numpy.where(columns < 16 - shift,
+                                              numpy.take_along_axis(id_numbers[short], sources, axis=1), 0)
+    birth_dates = numpy.empty((n, 10), dtype=numpy.uint32)
+    birth_dates[:, 0:8] = birth_prefixes[year_months]
+    birth_dates[:, 8:10] = id_numbers[:, 4:6]
+    return vectorized.strings(id_numbers), vectorized.strings(birth_dates)
+
+def generate_id_numbers(n: int, gender_mask=None, rng=random):
+    """
+    Generates n German-style ID numbers with their birth dates in one batch.
+
+    Draws follow the same distribution as generate_id_number with random arguments.
+
+    Args:
+        n: Number of ID numbers to generate
+        gender_mask: Not used in German IDs (maintained for compatibility)
+        rng: Source of randomness (random module or a random.Random instance)
+
+    Returns:
+        Tuple of (list of ID numbers, list of birth dates as YYYY-MM-DD)
+    """
+    if vectorized.available(rng):
+        return _generate_id_numbers_numpy(n, rng)
+    year_month_codes, year_month_sums, year_month_days, birth_prefixes, day_codes, group_sums = _get_batch_tables()
+    rand = rng.random
+
+    # A uniform (year, month) index is a uniform year and month, drawn at once
+    year_months = [int(rand() * 2400) for _ in range(n)]
+    days = [int(rand() * year_month_days[ym]) + 1 for ym in year_months]
+    random_parts = [int(rand() * 1000000000) for _ in range(n)]
+
+    # Simple checksum (sum of digits mod 10); zero padding does not change the digit sum
+    checksums = [
+        (year_month_sums[ym] + group_sums[day] + group_sums[random_part // 1000000]
+         + group_sums[random_part // 1000 % 1000] + group_sums[random_part % 1000]) % 10
+        for ym, day, random_part in zip(year_months, days, random_parts)
+    ]
+    id_numbers = [
+        f"{year_month_codes[ym]}{day_codes[day]}{random_part:04d}{checksum}"
+        for ym, day, random_part, checksum in zip(year_months, days, random_parts, checksums)
+    ]
+    birth_dates = [birth_prefixes[ym] + day_codes[day] for ym, day in zip(year_months, days)]
+    return id_numbers, birth_dates
+
+MIN_BIRTH_DATE = date(1900, 1, 1)
+MAX_BIRTH_DATE = date(2099, 12, 31)
+_RANDOM_PARTS = 1000000000
+
+def capacity(start: date = MIN_BIRTH_DATE, end: date = MAX_BIRTH_DATE) -> int:
+    """Return the number of unique ID numbers UniqueIdSpace provides for a birth date range"""
+    return UniqueIdSpace(0, start, end).capacity
+
+class UniqueIdSpace:
+    """Enumerates distinct German-style ID numbers in a keyed, shuffled order
+
+    Position i of the space is mapped through a format-preserving permutation
+    to a (birth date, random part) combination. IDs only hold a two-digit
+    year, so dates a century apart share their date digits; the random parts
+    are therefore split between the centuries of the range, keeping every
+    ID distinct.
+
+    Args:
+        key: Key of the permutation (the same key gives the same order)
+        start: Earliest birth date
+        end: Latest birth date
+    """
+
+    def __init__(self, key: int, start: date = MIN_BIRTH_DATE, end: date = MAX_BIRTH_DATE):
+        if not MIN_BIRTH_DATE <= start <= end <= MAX_BIRTH_DATE:
+            raise ValueError(f"Birth dates must satisfy {MIN_BIRTH_DATE} <= start <= end <= {MAX_BIRTH_DATE}")
+        self.start = start
+        self.end = end
+        self._centuries = end.year // 100 - start.year // 100 + 1
+        self._parts_per_day = _RANDOM_PARTS // self._centuries
+        self.capacity = (end.toordinal() - start.toordinal() + 1) * self._parts_per_day
+        self._permutation = FeistelPermutation(self.capacity, key)
+
+    def id_numbers(self, start: int, stop: int, gender_mask=None, rng=random):
+        """
+        Returns the ID numbers at positions [start, stop) with their birth dates.
+
+        Args:
+            start: Position of the first ID
+            stop: Position after the last ID
+            gender_mask: Not used in German IDs (maintained for compatibility)
+            rng: Not used, the IDs depend on the key and positions only
+
+        Returns:
+            Tuple of (list of ID numbers, list of birth dates as YYYY-MM-DD)
+
+        Raises:
+            ValueError: If stop exceeds the capacity of the space
+        """
+        if stop > self.capacity:
+            raise ValueError(f"Only {self.capacity} unique ID numbers exist for birth dates "
+                             f"{self.start} to {self.end}, {stop} requested")
+        year_month_codes, year_month_sums, _, birth_prefixes, day_codes, group_sums = _get_batch_tables()
+        first_day = self.start.toordinal()
+        first_century = self.start.year // 100
+        centuries = self._centuries
+
+        id_numbers = []
+        birth_dates = []
+        for value in self._permutation.take(start, stop):
+            day_index, part = divmod(value, self._parts_per_day)
+            birth_date = date.fromordinal(first_day + day_index)
+            ym = (birth_date.year - 1900) * 12 + birth_date.month - 1
+            day = birth_date.day
+            random_part = part * centuries + birth_date.year // 100 - first_century
+            checksum = (year_month_sums[ym] + group_sums[day] + group_sums[random_part // 1000000]
+                        + group_sums[random_part // 1000 % 1000] + group_sums[random_part % 1000]) % 10
+            id_numbers.append(f"{year_month_codes[ym]}{day_codes[day]}{random_part:04d}{checksum}")
+            birth_dates.append(birth_prefixes[ym] + day_codes[day])
+        return id_numbers, birth_dates
@@ -1,4 +1,7 @@
 import random
+from datetime import date
+from .. import vectorized
+from ..permutation import FeistelPermutation
 
 def generate_id_number(year: int = None, month: int = None, day: int = None, gender: str = None):
     """Alias for generate_pesel to maintain compatibility with the generator."""
@@ -93,4 +96,190 @@ def generate_pesel(year: int = None, month: int = None, day: int = None, gender:
 
     pesel = pesel_base + str(control_digit)
 
-    return pesel, birth_date
\ No newline at end of file
+    return pesel, birth_date
+
+_MONTH_OFFSETS = {18: 80, 19: 0, 20: 20, 21: 40, 22: 60}
+_WEIGHTS = [1, 3, 7, 9, 1, 3, 7, 9, 1, 3]
+_CONTROL_DIGITS = [str((10 - checksum) % 10) for checksum in range(10)]
+_batch_tables = None
+
+def _get_batch_tables():
+    """Build (once) the lookup tables used by generate_id_numbers
+
+    Every PESEL part is stored pre-formatted together with its weighted digit
+    sum, so a batch only concatenates strings and adds small integers.
+    """
+    global _batch_tables
+    if _batch_tables is None:
+        year_month_codes = []  # "YYMM" with century offset, per (year, month)
+        year_month_sums = []
+        year_month_days = []
+        birth_prefixes = []  # "YYYY-MM-"
+        for year in range(1800, 2300):
+            for month in range(1, 13):
+                code = f"{year % 100:02d}{month + _MONTH_OFFSETS[year // 100]:02d}"
+                year_month_codes.append(code)
+                year_month_sums.append((year % 100 // 10) * _WEIGHTS[0] + (year % 10) * _WEIGHTS[1]
+                                       + (int(code[2]) * _WEIGHTS[2] + int(code[3]) * _WEIGHTS[3]))
+                year_month_days.append(get_days_in_month(year, month))
+                birth_prefixes.append(f"{year}-{month:02d}-")
+        day_codes = [f"{day:02d}" for day in range(32)]
+        day_sums = [int(code[0]) * _WEIGHTS[4] + int(code[1]) * _WEIGHTS[5] for code in day_codes]
+        # Serial number and gender digit ("SSSG") indexed by serial * 10 + gender_digit
+        serial_codes = [f"{value:04d}" for value in range(10000)]
+        w6, w7, w8, w9 = _WEIGHTS[6:10]
+        serial_sums = [a * w6 + b * w7 + c * w8 + d * w9
+                       for a in range(10) for b in range(10) for c in range(10) for d in range(10)]
+        _batch_tables = (year_month_codes, year_month_sums, year_month_days, birth_prefixes,
+                         day_codes, day_sums, serial_codes, serial_sums)
+    return _batch_tables
+
+_numpy_tables = None
+
+def _get_numpy_tables():
+    """Build (once) the batch tables as NumPy arrays, strings as character codes"""
+    global _numpy_tables
+    if _numpy_tables is None:
+        numpy = vectorized.numpy
+        (year_month_codes, year_month_sums, year_month_days, birth_prefixes,
+         day_codes, day_sums, serial_codes, serial_sums) = _get_batch_tables()
+        _numpy_tables = (vectorized.char_table(year_month_codes), numpy.array(year_month_sums),
+                         numpy.array(year_month_days), vectorized.char_table(birth_prefixes),
+                         vectorized.char_table(day_codes), numpy.array(day_sums),
+                         vectorized.char_table(serial_codes), numpy.array(serial_sums),
+                         vectorized.char_table(_CONTROL_DIGITS)[:, 0])
+    return _numpy_tables
+
+def _generate_id_numbers_numpy(n: int, gender_mask, rng):
+    """generate_id_numbers with NumPy: the same draws, assembled as character code arrays"""
+    numpy = vectorized.numpy
+    (year_month_codes, year_month_sums, year_month_days, birth_prefixes,
+     day_codes, day_sums, serial_codes, serial_sums, control_digits) = _get_numpy_tables()
+    generator = vectorized.generator(rng)
+
+    year_months = generator.integers(0, 6000, n)
+    days = (generator.random(n) * year_month_days[year_months]).astype(numpy.intp) + 1
+    if gender_mask is None:
+        serials = generator.integers(0, 10000, n)
+    else:
+        # Even gender digit for women, odd for men
+        serials = generator.integers(0, 5000, n) * 2 + ~numpy.asarray(gender_mask, dtype=bool)
+
+    pesels = numpy.empty((n, 11), dtype=numpy.uint32)
+    pesels[:, 0:4] = year_month_codes[year_months]
+    pesels[:, 4:6] = day_codes[days]
+    pesels[:, 6:10] = serial_codes[serials]
+    pesels[:, 10] = control_digits[(year_month_sums[year_months] + day_sums[days] + serial_sums[serials]) % 10]
+    birth_dates = numpy.empty((n, 10), dtype=numpy.uint32)
+    birth_dates[:, 0:8] = birth_prefixes[year_months]
+    birth_dates[:, 8:10] = pesels[:, 4:6]
+    return vectorized.strings(pesels), vectorized.strings(birth_dates)
+
+def generate_id_numbers(n: int, gender_mask=None, rng=random):
+    """
+    Generates n valid PESEL numbers with their birth dates in one batch.
+
+    Draws follow the same distribution as generate_pesel with random arguments.
+
+    Args:
+        n: Number of PESEL numbers to generate
+        gender_mask: Optional sequence of n booleans, True for female ('K'), False for male ('M')
+        rng: Source of randomness (random module or a random.Random instance)
+
+    Returns:
+        Tuple of (list of PESEL numbers, list of birth dates as YYYY-MM-DD)
+    """
+    if vectorized.available(rng):
+        return _generate_id_numbers_numpy(n, gender_mask, rng)
+    (year_month_codes, year_month_sums, year_month_days, birth_prefixes,
+     day_codes, day_sums, serial_codes, serial_sums) = _get_batch_tables()
+    rand = rng.random
+
+    # One draw per part: a uniform (year, month) index is a uniform year and month,
+    # and a uniform serial number and gender digit pair is a uniform serial and digit
+    year_months = [int(rand() * 6000) for _ in range(n)]
+    days = [int(rand() * year_month_days[ym]) + 1 for ym in year_months]
+    if gender_mask is None:
+        serials = [int(rand() * 10000) for _ in range(n)]
+    else:
+        # Even gender digit for women, odd for men
+        serials = [int(rand() * 5000) * 2 + (not is_female) for is_female in gender_mask]
+
+    pesels = [
+        f"{year_month_codes[ym]}{day_codes[day]}{serial_codes[serial]}"
+        f"{_CONTROL_DIGITS[(year_month_sums[ym] + day_sums[day] + serial_sums[serial]) % 10]}"
+        for ym, day, serial in zip(year_months, days, serials)
+    ]
+    birth_dates = [birth_prefixes[ym] + day_codes[day] for ym, day in zip(year_months, days)]
+    return pesels, birth_dates
+
+MIN_BIRTH_DATE = date(1800, 1, 1)
+MAX_BIRTH_DATE = date(2299, 12, 31)
+# (serial number, gender digit pair) combinations per birth date; each record takes one pair
+_PAIRS_PER_DAY = 1000 * 5
+
+def capacity(start: date = MIN_BIRTH_DATE, end: date = MAX_BIRTH_DATE) -> int:
+    """Return the number of unique PESEL numbers UniqueIdSpace provides for a birth date range"""
+    return UniqueIdSpace(0, start, end).capacity
+
+class UniqueIdSpace:
+    """Enumerates distinct PESEL numbers in a keyed, shuffled order
+
+    Position i of the space is mapped through a format-preserving permutation
+    to a (birth date, serial number, gender digit pair) combination. The
+    gender picks the even (female) or odd (male) digit of the pair, so two
+    positions never share a PESEL whatever their genders are.
+
+    Args:
+        key: Key of the permutation (the same key gives the same order)
+        start: Earliest birth date
+        end: Latest birth date
+    """
+
+    def __init__(self, key: int, start: date = MIN_BIRTH_DATE, end: date = MAX_BIRTH_DATE):
+        if not MIN_BIRTH_DATE <= start <= end <= MAX_BIRTH_DATE:
+            raise ValueError(f"Birth dates must satisfy {MIN_BIRTH_DATE} <= start <= end <= {MAX_BIRTH_DATE}")
+        self.start = start
+        self.end = end
+        self.capacity = (end.toordinal() - start.toordinal() + 1) * _PAIRS_PER_DAY
+        self._permutation = FeistelPermutation(self.capacity, key)
+
+    def id_numbers(self, start: int, stop: int, gender_mask=None, rng=random):
+        """
+        Returns the PESEL numbers at positions [start, stop) with their birth dates.
+
+        Args:
+            start: Position of the first ID
+            stop: Position after the last ID
+            gender_mask: Optional sequence of stop - start booleans, True for female ('K')
+            rng: Source of randomness for the gender digits when no mask is given
+
+        Returns:
+            Tuple of (list of PESEL numbers, list of birth dates as YYYY-MM-DD)
+
+        Raises:
+            ValueError: If stop exceeds the capacity of the space
+        """
+        if stop > self.capacity:
+            raise ValueError(f"Only {self.capacity} unique PESEL numbers exist for birth dates "
+                             f"{self.start} to {self.end}, {stop} requested")
+        (year_month_codes, year_month_sums, _, birth_prefixes,
+         day_codes, day_sums, serial_codes, serial_sums) = _get_batch_tables()
+        if gender_mask is None:
+            rand = rng.random
+            gender_mask = [rand() < 0.5 for _ in range(stop - start)]
+        first_day = self.start.toordinal()
+
+        pesels = []
+        birth_dates = []
+        for value, is_female in zip(self._permutation.take(start, stop), gender_mask):
+            day_index, pair = divmod(value, _PAIRS_PER_DAY)
+            birth_date = date.fromordinal(first_day + day_index)
+            ym = (birth_date.year - 1800) * 12 + birth_date.month - 1
+            day = birth_date.day
+            # Serial number, then the even (female) or odd (male) digit of the pair
+            serial = pair * 2 + (not is_female)
+            pesels.append(f"{year_month_codes[ym]}{day_codes[day]}{serial_codes[serial]}"
+                          f"{_CONTROL_DIGITS[(year_month_sums[ym] + day_sums[day] + serial_sums[serial]) % 10]}")
+            birth_dates.append(birth_prefixes[ym] + day_codes[day])
+        return pesels, birth_dates
@@ -0,0 +1,357 @@
+"""Background generation jobs for datasets too large for one request
+
+A JobManager runs exports on a bounded thread pool and writes each result
+to a local spool directory, so clients poll for progress and download the
+finished file instead of holding a connection open while it is generated.
+Finished results expire after a time to live.
+"""
+import os
+import re
+import time
+import uuid
+import queue
+import atexit
+import logging
+import tempfile
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Dict, Iterable, Iterator, List, Optional
+from . import metrics
+from .compression import COMPRESSIONS, check_compression, iter_compressed
+from .exporters import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_chunks, iter_encoded
+
+DEFAULT_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "data-generator-jobs")
+# Finished results are kept this many seconds
+DEFAULT_RESULT_TTL = 3600
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Seconds a cancelled job gets at exit to stop and remove its partial file
+EXIT_GRACE_PERIOD = 5.0
+
+# Names of the result files of jobs: the job id, the output extension, ".part" while written
+_SPOOL_FILE = re.compile(r"[0-9a-f]{32}(\..+?)(\.part)?")
+
+def _is_spool_file(filename: str) -> bool:
+    match = _SPOOL_FILE.fullmatch(filename)
+    if match is None:
+        return False
+    extensions = {format.extension + compression
+                  for format in EXPORT_FORMATS.values()
+                  for compression in [""] + [method.extension for method in COMPRESSIONS.values()]}
+    return match.group(1) in extensions
+
+class _DaemonThreadPool:
+    """Minimal thread pool whose workers are daemon threads
+
+    ThreadPoolExecutor joins its workers before the interpreter exits, so a
+    running job would hold the process open until it was generated to the
+    end; daemon workers leave exiting to the atexit hook of this module.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._threads = [threading.Thread(target=self._work, name=f"{thread_name_prefix}_{index}", daemon=True)
+                         for index in range(max_workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args) -> Future:
+        """Schedule fn(*args), returning its future"""
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new jobs after shutdown")
+            future = Future()
+            self._queue.put((future, fn, args))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the scheduled calls have run"""
+        with self._lock:
+            if not self._shutdown:
+                self._shutdown = True
+                for _ in self._threads:
+                    self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+class JobQueueFull(RuntimeError):
+    """Raised when the manager already holds its maximum number of unfinished jobs"""
+
+class JobCancelled(Exception):
+    """Raised inside a running job when it is cancelled"""
+
+class Job:
+    """State and progress of one background export"""
+
+    def __init__(self, locale: str, quantity: int, format: str, spool_dir: str, compression: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.locale = locale
+        self.quantity = quantity
+        self.format = format
+        self.compression = compression
+        self.path = os.path.join(spool_dir, self.id + self.extension)
+        self.status = QUEUED
+        self.rows_done = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def extension(self) -> str:
+        extension = EXPORT_FORMATS[self.format].extension
+        if self.compression is not None:
+            extension += COMPRESSIONS[self.compression].extension
+        return extension
+
+    @property
+    def mimetype(self) -> str:
+        if self.compression is not None:
+            return COMPRESSIONS[self.compression].mimetype
+        return EXPORT_FORMATS[self.format].mimetype
+
+    @property
+    def filename(self) -> str:
+        return f"generated_data_{self.locale}{self.extension}"
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def track(self, chunks: Iterable[List]) -> Iterator[List]:
+        """Count the rows of chunks as they are generated, stopping when cancelled"""
+        for chunk in chunks:
+            if self._cancel.is_set():
+                raise JobCancelled()
+            yield chunk
+            self.rows_done += len(chunk)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the job has finished"""
+        if self.future is not None and not self.future.cancelled():
+            self.future.exception(timeout)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return the status, progress and timing of the job"""
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rows_per_second = self.rows_done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == RUNNING and rows_per_second > 0:
+            eta = (self.quantity - self.rows_done) / rows_per_second
+        return {
+            'id': self.id,
+            'status': self.status,
+            'locale': self.locale,
+            'format': self.format,
+            'compression': self.compression,
+            'rows_done': self.rows_done,
+            'total_rows': self.quantity,
+            'rows_per_second': round(rows_per_second, 1),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+class JobManager:
+    """Runs generation jobs on a bounded thread pool, spooling results to disk
+
+    Args:
+        spool_dir: Directory the results are written to
+        max_workers: Number of jobs generated at the same time
+        max_pending: Maximum number of unfinished (queued or running) jobs
+        result_ttl: Seconds a finished job and its result are kept
+    """
+
+    def __init__(self, spool_dir: str = DEFAULT_SPOOL_DIR, max_workers: int = 2, max_pending: int = 32,
+                 result_ttl: float = DEFAULT_RESULT_TTL):
+        self.spool_dir = spool_dir
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.logger = logging.getLogger(__name__)
+        self._executor = _DaemonThreadPool(max_workers, thread_name_prefix="generation-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        os.makedirs(spool_dir, exist_ok=True)
+        self.sweep_spool_dir()
+        _managers.add(self)
+
+    def submit_export(self, generator, quantity: int, fields: List[str], format: str = 'csv',
+                      seed: Optional[int] = None, offset: int = 0, compression: Optional[str] = None,
+                      **sql_options) -> Job:
+        """Queue an export of quantity generated records (same options as exporters.iter_export)
+
+        Raises:
+            ValueError: On an unsupported format or compression method
+            JobQueueFull: When max_pending jobs are unfinished
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported output format: {format}")
+        if compression is not None:
+            check_compression(compression)
+            if not EXPORT_FORMATS[format].compressible:
+                raise ValueError(f"Output format {format} is already compressed")
+        self.cleanup()
+        with self._lock:
+            if sum(not job.finished for job in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull(f"Too many unfinished jobs (limit {self.max_pending})")
+            job = Job(generator.locale, quantity, format, self.spool_dir, compression)
+            self._jobs[job.id] = job
+
+        def produce():
+            chunks = job.track(generator.iter_bulk(quantity, DEFAULT_CHUNK_SIZE, seed, offset=offset))
+            trace = metrics.export_trace(generator.locale, format)
+            if trace is not None:
+                chunks = trace.chunks(chunks)
+            output = export_chunks(chunks, generator.locale, fields, format, generator.schema,
+                                   unique_keys=generator.unique_ids, **sql_options)
+            # Encoded before the trace, which counts the bytes written
+            output = iter_compressed(output, compression) if compression is not None else iter_encoded(output)
+            return output if trace is None else trace.pieces(output)
+
+        job.future = self._executor.submit(self._run, job, produce)
+        return job
+
+    def _run(self, job: Job, produce):
+        if job._cancel.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        partial_path = job.path + ".part"
+        try:
+            with open(partial_path, "wb") as output:
+                for piece in produce():
+                    output.write(piece)
+            if job._cancel.is_set():
+                raise JobCancelled()
+            os.replace(partial_path, job.path)
+            job.status = COMPLETED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            self.logger.error(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            if job.status != COMPLETED and os.path.exists(partial_path):
+                os.remove(partial_path)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if it is unknown or expired"""
+        self.cleanup()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """Return the known jobs, oldest first"""
+        self.cleanup()
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are left as they are"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            # Never started
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        return job
+
+    def cleanup(self, now: Optional[float] = None):
+        """Forget finished jobs older than the time to live and delete their results"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished and job.finished_at is not None and now - job.finished_at >= self.result_ttl]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            try:
+                if os.path.exists(job.path):
+                    os.remove(job.path)
+            except OSError as e:
+                self.logger.warning(f"Could not remove result of job {job.id}: {e}")
+
+    def sweep_spool_dir(self, now: Optional[float] = None):
+        """Delete job results older than the time to live that no job of this manager owns
+
+        Removes what earlier processes left behind in the spool directory:
+        results never downloaded and partial files of interrupted jobs.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            owned = {os.path.basename(job.path) for job in self._jobs.values()}
+        try:
+            entries = list(os.scandir(self.spool_dir))
+        except OSError as e:
+            self.logger.warning(f"Could not list spool directory {self.spool_dir}: {e}")
+            return
+        for entry in entries:
+            if entry.name in owned or not _is_spool_file(entry.name):
+                continue
+            try:
+                if entry.is_file() and now - entry.stat().st_mtime >= self.result_ttl:
+                    os.remove(entry.path)
+            except OSError as e:
+                self.logger.warning(f"Could not remove stale spool file {entry.path}: {e}")
+
+    def shutdown(self, wait: bool = True):
+        """Cancel unfinished jobs and stop the worker threads"""
+        with self._lock:
+            jobs = list(self._jobs)
+        for job_id in jobs:
+            self.cancel(job_id)
+        self._executor.shutdown(wait=wait)
+
+_managers: "weakref.WeakSet[JobManager]" = weakref.WeakSet()
+
+def _cancel_all_jobs():
+    """Cancel the unfinished jobs of every manager before the interpreter exits
+
+    The workers are daemon threads, so exiting does not wait for them; running
+    jobs get a short grace period to notice the cancellation and remove their
+    partial files.
+    """
+    managers = list(_managers)
+    for manager in managers:
+        manager.shutdown(wait=False)
+    deadline = time.monotonic() + EXIT_GRACE_PERIOD
+    for manager in managers:
+        for job in manager.list_jobs():
+            try:
+                job.wait(max(deadline - time.monotonic(), 0))
+            except Exception:
+                pass
+
+atexit.register(_cancel_all_jobs)
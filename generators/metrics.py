@@ -0,0 +1,279 @@
+"""In-process metrics in the Prometheus text exposition format
+
+Counters, gauges and histograms are kept per label set and rendered by
+render() for the /metrics endpoint. Metrics are enabled by default and
+switched off with DATA_GENERATOR_METRICS=0 or disable(); when disabled,
+every update returns after a single flag check and exports are not
+wrapped at all.
+"""
+import os
+import time
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = os.environ.get("DATA_GENERATOR_METRICS", "1").lower() not in ("0", "false", "no", "off")
+
+def enable(enabled: bool = True):
+    """Switch metric collection on or off"""
+    global _enabled
+    _enabled = enabled
+
+def disable():
+    enable(False)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """Value per label set that goes up and down"""
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Histogram(_Metric):
+    """Distribution of observed values per label set, in cumulative buckets"""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _render_value(self, key: Tuple[str, ...], state) -> List[str]:
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state[0]):
+            total += count
+            labels = _format_labels(self.labels, key, f'le="{_format_value(float(bound))}"')
+            lines.append(f"{self.name}_bucket{labels} {total}")
+        labels = _format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state[1])}")
+        lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset the values of every metric"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "datagen_stage_seconds", "Time spent per stage of an export (generation, serialization, write)",
+    ("stage", "locale", "format"))
+DATASET_LOAD_SECONDS = REGISTRY.histogram(
+    "datagen_dataset_load_seconds",
+    "Time spent loading locale data, per discovery of a locale and per data type read on first access",
+    ("locale",))
+RECORDS = REGISTRY.counter("datagen_records_total", "Records exported", ("locale", "format"))
+BYTES = REGISTRY.counter("datagen_bytes_total", "Bytes of export output produced", ("locale", "format"))
+CACHE_LOOKUPS = REGISTRY.counter(
+    "datagen_dataset_cache_lookups_total",
+    "Dataset lookups by cache (registry: loaded locales, compiled: dataset.cache files) and result (hit, miss)",
+    ("cache", "result"))
+IN_FLIGHT = REGISTRY.gauge("datagen_requests_in_flight", "HTTP requests being served", ("endpoint",))
+
+def render() -> str:
+    """Return the default metrics in the Prometheus text format"""
+    return REGISTRY.render()
+
+OTHER_LOCALE = "other"
+_known_locales: Optional[frozenset] = None
+
+def locale_label(locale) -> str:
+    """Return the locale label of a request, "other" for locales without a data directory
+
+    Keeps the number of label sets bounded whatever locales clients ask for.
+    """
+    global _known_locales
+    if _known_locales is None:
+        from .dataset_registry import get_registry
+        _known_locales = frozenset(get_registry().data_loader.discover_locales())
+    return locale if locale in _known_locales else OTHER_LOCALE
+
+class ExportTrace:
+    """Splits the time of one streamed export into its stages
+
+    chunks() wraps the generated record chunks and pieces() the serialized
+    output. Time spent producing chunks is generation, the rest of producing
+    a piece is serialization, and time between handing out a piece and
+    being asked for the next one is the write of that piece by the consumer.
+    The stages and the record and byte counts are recorded once the output
+    is exhausted or closed. Bytes are counted on encoded output; text pieces
+    are encoded only to be measured, so writers should pass encoded output
+    (see generators.exporters.iter_export(binary=True)).
+    """
+
+    def __init__(self, locale: str, format: str):
+        self.locale = locale_label(locale)
+        self.format = format
+        self.generation = 0.0
+        self.serialization = 0.0
+        self.write = 0.0
+        self.records = 0
+        self.bytes = 0
+
+    def chunks(self, chunks: Iterable[Sequence]) -> Iterator[Sequence]:
+        iterator = iter(chunks)
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                self.generation += clock() - start
+                return
+            self.generation += clock() - start
+            self.records += len(chunk)
+            yield chunk
+
+    def pieces(self, pieces: Iterable) -> Iterator:
+        iterator = iter(pieces)
+        clock = time.perf_counter
+        try:
+            while True:
+                start = clock()
+                generation = self.generation
+                try:
+                    piece = next(iterator)
+                except StopIteration:
+                    self.serialization += clock() - start - (self.generation - generation)
+                    return
+                self.serialization += clock() - start - (self.generation - generation)
+                self.bytes += len(piece) if isinstance(piece, bytes) else len(piece.encode("utf-8"))
+                handed_out = clock()
+                yield piece
+                self.write += clock() - handed_out
+        finally:
+            self.finish()
+
+    def finish(self):
+        labels = {"locale": self.locale, "format": self.format}
+        STAGE_SECONDS.observe(self.generation, stage="generation", **labels)
+        STAGE_SECONDS.observe(self.serialization, stage="serialization", **labels)
+        STAGE_SECONDS.observe(self.write, stage="write", **labels)
+        RECORDS.inc(self.records, **labels)
+        BYTES.inc(self.bytes, **labels)
+
+def export_trace(locale: str, format: str) -> Optional[ExportTrace]:
+    """Return a trace for one export, or None when metrics are disabled"""
+    return ExportTrace(locale, format) if _enabled else None
@@ -1,130 +1,231 @@
-import os
 import random
 import importlib
+import threading
 import logging
-from typing import Dict, List, Optional
-from .data_loader import DataLoader
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from .dataset_registry import DatasetRegistry, get_registry
+from .batch_engine import ColumnarBatchEngine, GenerationPlan
+from .postal_index import PostalIndex
+from .weighted import choice
+from .compression import compression_for_path, open_text
+from .record_batch import RecordBatch, iter_rows, merge_columns
+from .schema import Schema, default_schema
+from .sharding import BLOCK_SIZE, SlotStreams, derive_seed, iter_sharded_columns
 
 class ModularDataGenerator:
     """Enhanced generator with dynamic data loading capabilities"""
     
-    def __init__(self, locale: str = "pl"):
+    def __init__(self, locale: str = "pl", registry: Optional[DatasetRegistry] = None,
+                 region: Optional[Mapping[str, str]] = None, fields: Optional[Iterable[str]] = None,
+                 unique_ids: bool = False, schema: Optional[Schema] = None):
+        """
+        Args:
+            locale: Locale code (e.g. 'pl', 'de')
+            registry: Registry sharing loaded data (the process-wide one by default)
+            region: Optional address filter, e.g. {'wojewodztwo': 'małopolskie', 'city': 'Kraków'};
+                keys are 'wojewodztwo', 'powiat', 'gmina' and 'city'
+            fields: Columns the batch methods generate (case-insensitive, None for all);
+                only the data files these columns need are loaded
+            unique_ids: Never repeat an ID number, by enumerating the locale's ID space in a
+                keyed shuffled order (needs an ID generator providing UniqueIdSpace)
+            schema: Output columns and SQL table layout (schemas/default.json by default)
+
+        Raises:
+            ValueError: If a region is given but no postal code entry matches it, unique
+                IDs are requested for a locale whose ID generator cannot provide them, or
+                a schema column reads a data type file the locale does not have
+        """
         self.locale = locale
+        self.region = dict(region) if region else None
+        self.schema = schema or default_schema()
+        # Compiled once: the built-in fields and derived columns the requested columns need
+        self.schema_plan = self.schema.compile(fields)
+        self.columns = self.schema_plan.fields
+        self.fields = self.schema_plan.source_fields
+        # Steps generate_record and the batch engine perform for these fields
+        self.plan = GenerationPlan.for_fields(self.fields)
         self.logger = logging.getLogger(__name__)
-        self.data_loader = DataLoader(os.path.join(os.path.dirname(__file__), "../data/"))
-        self.data_types = self.data_loader.discover_data_types(locale)
-        self.parsed_postal_codes_data: List[Dict[str, str]] = []
+        # Data types are shared through a process-wide registry instead of being re-read per instance
+        self.registry = registry or get_registry()
+        self.data_loader = self.registry.data_loader
+        self.data_types = self.registry.get_data_types(locale)
+        missing_data_types = sorted(self.schema_plan.data_types - set(self.data_types))
+        if missing_data_types:
+            raise ValueError(f"Locale {locale} has no data files for: {', '.join(missing_data_types)}")
+        self.parsed_postal_codes_data = PostalIndex([])
+        # Entries drawn for addresses, restricted to the region if one is given
+        self.postal_sampler = self.parsed_postal_codes_data.sampler()
+        self._postal_data_loaded = False
         self._initialize_data()  # Nowa metoda do inicjalizacji i parsowania danych
 
         self.id_generator = self._load_id_generator()
+        self.unique_ids = unique_ids
+        if unique_ids and getattr(self.id_generator, "UniqueIdSpace", None) is None:
+            raise ValueError(f"The ID generator of locale {self.locale} does not support unique IDs")
+        # Unseeded runs take consecutive positions of a space keyed per generator
+        self._id_key = random.getrandbits(64)
+        self._next_id_position = 0
+        self._id_position_lock = threading.Lock()
+        self._unique_id_spaces = {}
+        self.batch_engine = ColumnarBatchEngine(self)
 
     def _initialize_data(self):
         """
-        Inicjalizuje i parsuje dane, w tym dane z kodów pocztowych.
+        Inicjalizuje dane, w tym indeks kodów pocztowych (budowany raz na locale przez rejestr).
+        Dane są wczytywane leniwie, tylko dla potrzebnych pól.
         """
+        if self.region or self.plan.address:
+            self._load_postal_data()
+
+    def _load_postal_data(self):
+        """Wczytuje indeks kodów pocztowych i przygotowuje losowanie wpisów (z filtrem regionu)"""
+        self._postal_data_loaded = True
         if 'kody_pocztowe' in self.data_types:
-            raw_postal_lines = self.data_types['kody_pocztowe']
-            self.parsed_postal_codes_data = self._parse_postal_codes_data(raw_postal_lines)
+            self.parsed_postal_codes_data = self.registry.get_postal_index(self.locale)
             self.logger.info(f"Loaded and parsed {len(self.parsed_postal_codes_data)} postal code entries.")
         else:
             self.logger.warning("No 'kody_pocztowe.txt' found for the current locale.")
+        if self.region and not self.parsed_postal_codes_data:
+            raise ValueError(f"Region filters require postal code data, which locale {self.locale} does not have")
+        self.postal_sampler = self.parsed_postal_codes_data.sampler(self.region)
 
-    def _parse_postal_codes_data(self, raw_lines: List[str]) -> List[Dict[str, str]]:
-        """
-        Parsuje surowe linie z pliku kodów pocztowych do listy słowników.
-        Oczekiwany format: PNA;MIEJSCOWOŚĆ;ULICA;NUMERY;GMINA;POWIAT;WOJEWÓDZTWO
-        """
-        postal_codes_list = []
-        for line in raw_lines:
-            parts = line.split(';')
-            if len(parts) >= 7:
-                postal_code_entry = {
-                    'pna': parts[0].strip(),
-                    'miejscowosc': parts[1].strip(),
-                    'ulica': parts[2].strip() if parts[2].strip() else None,
-                    'numery': parts[3].strip() if parts[3].strip() else None,
-                    'gmina': parts[4].strip(),
-                    'powiat': parts[5].strip(),
-                    'wojewodztwo': parts[6].strip()
-                }
-                postal_codes_list.append(postal_code_entry)
-            else:
-                self.logger.warning(f"Skipping malformed line in postal codes data: {line}")
-        return postal_codes_list
-        
     def _load_id_generator(self):
-        """Dynamically load ID generator module if available"""
+        """Dynamically load ID generator module if available
+
+        Plugins may also provide the batch entry point
+        generate_id_numbers(n, gender_mask=None, rng=random), which is preferred
+        by generate_id_numbers; otherwise the scalar generate_id_number is used.
+        """
         module_path = f"generators.id_generators.pesel_{self.locale}"
         try:
-            return importlib.import_module(module_path)
+            module = importlib.import_module(module_path)
         except ImportError:
             self.logger.warning(f"No ID generator found for locale {self.locale}")
+            self._batch_id_generator = None
             return None
+        self._batch_id_generator = getattr(module, "generate_id_numbers", None)
+        return module
+
+    def generate_id_numbers(self, quantity: int, gender_mask: Optional[List[bool]] = None,
+                            rng=random, position: Optional[int] = None,
+                            seed: Optional[int] = None) -> Tuple[List[str], List[str]]:
+        """Generate quantity ID numbers and birth dates with the locale ID generator
+
+        Args:
+            quantity: Number of IDs to generate
+            gender_mask: Optional sequence of booleans, True for female records
+            rng: Source of randomness for batch-capable plugins
+            position: Position of the first record of a seeded run (unique IDs)
+            seed: Master seed of a seeded run (unique IDs)
+
+        Returns:
+            Tuple of (list of ID numbers, list of birth dates)
+
+        Raises:
+            ValueError: If unique IDs are requested past the capacity of the ID space
+        """
+        if self.unique_ids:
+            space = self.unique_id_space(seed)
+            if position is None:
+                with self._id_position_lock:
+                    position = self._next_id_position
+                    self._next_id_position += quantity
+            return space.id_numbers(position, position + quantity, gender_mask, rng)
+        if self._batch_id_generator is not None:
+            return self._batch_id_generator(quantity, gender_mask=gender_mask, rng=rng)
+        generate_id_number = self.id_generator.generate_id_number
+        if gender_mask is None:
+            results = [generate_id_number() for _ in range(quantity)]
+        else:
+            results = [generate_id_number(gender='K' if is_female else 'M') for is_female in gender_mask]
+        return [id_number for id_number, _ in results], [birth_date for _, birth_date in results]
+
+    def unique_id_space(self, seed: Optional[int] = None):
+        """Return the UniqueIdSpace of the locale ID generator, keyed by the seed of a run"""
+        key = self._id_key if seed is None else derive_seed(seed, "unique-ids")
+        space = self._unique_id_spaces.get(key)
+        if space is None:
+            space = self._unique_id_spaces[key] = self.id_generator.UniqueIdSpace(key)
+        return space
+
+    def id_capacity(self) -> Optional[int]:
+        """Return how many unique IDs the locale ID generator provides, or None if it cannot"""
+        capacity = getattr(self.id_generator, "capacity", None)
+        return capacity() if capacity is not None else None
+
+    def generate_record(self, fields: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Generate a single record with locale-aware name/surname matching and address
+
+        Args:
+            fields: Columns to generate (None for the generator's columns); the work
+                for other columns is skipped
+        """
+        schema_plan = self.schema_plan if fields is None else self.schema.compile(fields)
+        plan = self.plan if fields is None else GenerationPlan.for_fields(schema_plan.source_fields)
+        record = self._generate_record_fields(plan)
+        if schema_plan.identity:
+            return record
+        columns = schema_plan.apply(self.batch_engine, {field: [value] for field, value in record.items()}, 1,
+                                    lambda name: random)
+        return {name: values[0] for name, values in columns.items()}
 
-    def generate_record(self) -> Dict[str, str]:
-        """Generate a single record with locale-aware name/surname matching and address"""
+    def _generate_record_fields(self, plan: GenerationPlan) -> Dict[str, str]:
+        """Generate the built-in fields of a GenerationPlan for one record"""
         record = {}
-        is_female = random.choice([True, False])
+        is_female = random.choice([True, False]) if plan.gender else False
         
         # Handle name selection
-        if is_female:
-            record["Name"] = random.choice(self.data_types.get("ImionaZenskie", []))
-        else:
-            record["Name"] = random.choice(self.data_types.get("ImionaMeskie", []))
+        if plan.name:
+            if is_female:
+                record["Name"] = choice(self.data_types.get("ImionaZenskie", []))
+            else:
+                record["Name"] = choice(self.data_types.get("ImionaMeskie", []))
             
         # Handle surname selection based on locale
-        if self.locale == "de":
+        if not plan.surname:
+            pass
+        elif self.locale == "de":
             # German uses combined surnames
-            record["Surname"] = random.choice(self.data_types.get("Nazwiska", []))
+            record["Surname"] = choice(self.data_types.get("Nazwiska", []))
         else:
             # Polish uses gender-specific surnames
             if is_female:
-                record["Surname"] = random.choice(self.data_types.get("NazwiskaZenskie", []))
+                record["Surname"] = choice(self.data_types.get("NazwiskaZenskie", []))
             else:
-                record["Surname"] = random.choice(self.data_types.get("NazwiskaMeskie", []))
+                record["Surname"] = choice(self.data_types.get("NazwiskaMeskie", []))
         
-        # Add ID number and birth date if generator available
-        if self.id_generator:
-            id_number, birth_date = self.id_generator.generate_id_number()
+        # Add ID number and birth date if generator available, with the gender of the name
+        if self.id_generator and plan.ids:
+            (id_number,), (birth_date,) = self.generate_id_numbers(1, [is_female])
             record["ID"] = id_number
             record["Birth Date"] = birth_date
 
+        if not plan.address:
+            return record
+        if not self._postal_data_loaded:
+            self._load_postal_data()
+
         # Generate address components
         if self.parsed_postal_codes_data:
-            chosen_entry = random.choice(self.parsed_postal_codes_data)
-
-            # Generowanie numeru domu z danych lub losowo
-            house_number_suffix = ""
-            if chosen_entry['numery']:
-                if '-' in chosen_entry['numery']:  # Obsługa zakresów np. "1-10"
-                    try:
-                        start_num, end_num = map(int, chosen_entry['numery'].split('-'))
-                        house_number_suffix = str(random.randint(start_num, end_num))
-                    except ValueError:
-                        house_number_suffix = chosen_entry['numery']  # W przypadku błędu, użyj surowego ciągu
-                elif ',' in chosen_entry['numery']:  # Obsługa list np. "1,3,5"
-                    possible_numbers = [n.strip() for n in chosen_entry['numery'].split(',')]
-                    house_number_suffix = random.choice(possible_numbers)
-                else:  # Konkretny numer
-                    house_number_suffix = chosen_entry['numery']
-            else:
-                # Domyślny losowy numer, jeśli brak danych dla konkretnego wpisu
-                house_number_suffix = str(random.randint(1, 150))
-
-            # Użyj danych z pliku kody_pocztowe.txt dla wszystkich pól adresowych
-            # Zmiana 1: Jeśli ulica jest pusta, użyj miejscowości + numeru domu
-            record["Street"] = f"{chosen_entry['ulica']} {house_number_suffix}".strip() if chosen_entry['ulica'] else \
-                f"{chosen_entry['miejscowosc']} {house_number_suffix}".strip()
-
-            record["City"] = chosen_entry['miejscowosc']
-            record["Postal Code"] = chosen_entry['pna']
-            record["Gmina"] = chosen_entry['gmina']
-            record["Powiat"] = chosen_entry['powiat']
-            record["Wojewodztwo"] = chosen_entry['wojewodztwo']
+            postal_index = self.parsed_postal_codes_data
+            row = self.postal_sampler.sample(1)[0]
+
+            if plan.street:
+                # Generowanie numeru domu z danych lub losowo
+                house_number_suffix = postal_index.house_number(row)
+
+                # Użyj danych z pliku kody_pocztowe.txt dla wszystkich pól adresowych
+                # Zmiana 1: Jeśli ulica jest pusta, użyj miejscowości + numeru domu
+                record["Street"] = postal_index.street(row, house_number_suffix)
+
+            for field, key in plan.postal_columns:
+                record[field] = postal_index.value(key, row)
             
             # Always include country from countries.txt if available
-            if "countries" in self.data_types and self.data_types["countries"]:
-                record["Country"] = random.choice(self.data_types["countries"])
+            if not plan.country:
+                pass
+            elif "countries" in self.data_types and self.data_types["countries"]:
+                record["Country"] = choice(self.data_types["countries"])
             else:
                 record["Country"] = "Poland"  # Default fallback
 
@@ -133,37 +234,105 @@ class ModularDataGenerator:
         else:
             # Fallback do starej logiki, jeśli brak danych o kodach pocztowych
             self.logger.warning("No postal code data available, generating simplified address.")
-            if "streets" in self.data_types and self.data_types["streets"]:  # Sprawdź, czy lista nie jest pusta
-                street = random.choice(self.data_types["streets"])
+            if not plan.street:
+                pass
+            elif "streets" in self.data_types and self.data_types["streets"]:  # Sprawdź, czy lista nie jest pusta
+                street = choice(self.data_types["streets"])
                 house_num = random.randint(1, 150)
                 record["Street"] = f"{street} {house_num}"
             else:  # Dodany else, aby w przypadku braku streets.txt nie dodawać pustego Street
                 self.logger.warning("No 'streets.txt' data available for fallback.")
 
-            if "cities" in self.data_types and self.data_types["cities"]:  # Sprawdź, czy lista nie jest pusta
-                record["City"] = random.choice(self.data_types["cities"])
+            if not plan.city:
+                pass
+            elif "cities" in self.data_types and self.data_types["cities"]:  # Sprawdź, czy lista nie jest pusta
+                record["City"] = choice(self.data_types["cities"])
             else:
                 self.logger.warning("No 'cities.txt' data available for fallback.")
 
-            if "countries" in self.data_types and self.data_types["countries"]:  # Sprawdź, czy lista nie jest pusta
-                record["Country"] = random.choice(self.data_types["countries"])
+            if not plan.country:
+                pass
+            elif "countries" in self.data_types and self.data_types["countries"]:  # Sprawdź, czy lista nie jest pusta
+                record["Country"] = choice(self.data_types["countries"])
             else:
                 self.logger.warning("No 'countries.txt' data available for fallback.")
             # Brak pełnych pól adresowych bez danych z kodów pocztowych (Postal Code, Gmina, Powiat, Wojewodztwo)
 
         return record
 
-    def generate_bulk(self, quantity: int) -> List[Dict[str, str]]:
-        """Generate multiple records"""
-        return [self.generate_record() for _ in range(quantity)]
+    def generate_block(self, seed: int, index: int) -> Dict[str, Sequence[str]]:
+        """Generate the columns of one keyed block of a seeded run (see generators.sharding)"""
+        return self.batch_engine.generate_columns(BLOCK_SIZE, SlotStreams(seed, index), index * BLOCK_SIZE, seed)
+
+    def generate_range(self, seed: int, start: int, stop: int) -> Dict[str, Sequence[str]]:
+        """Generate the seeded records at positions [start, stop) as columns
+
+        Record i depends only on (seed, i), so any range, e.g. one page of a
+        larger dataset, is regenerated without producing the preceding records.
+        """
+        if not 0 <= start <= stop:
+            raise ValueError("Range must satisfy 0 <= start <= stop")
+        parts = []
+        for index in range(start // BLOCK_SIZE, -(-stop // BLOCK_SIZE)):
+            block = self.generate_block(seed, index)
+            block_start = index * BLOCK_SIZE
+            low = max(start, block_start) - block_start
+            high = min(stop, block_start + BLOCK_SIZE) - block_start
+            parts.append({field: values[low:high] for field, values in block.items()})
+        return merge_columns(parts)
+
+    def generate_columns(self, quantity: int, seed: Optional[int] = None, workers: int = 1,
+                         offset: int = 0) -> Dict[str, Sequence[str]]:
+        """Generate multiple records as columns (field name -> list of values)
+
+        Only the fields the generator was created for are generated.
+
+        Args:
+            quantity: Number of records to generate
+            seed: Master seed; the same seed always produces the same records
+            workers: Number of worker processes sharing the work
+            offset: Position of the first seeded record
+        """
+        if seed is None and workers <= 1:
+            return self.batch_engine.generate_columns(quantity)
+        if seed is None:
+            seed = random.getrandbits(64)
+        return merge_columns(iter_sharded_columns(self, seed, offset, offset + quantity, workers))
+
+    def generate_bulk(self, quantity: int, seed: Optional[int] = None, workers: int = 1,
+                      offset: int = 0) -> RecordBatch:
+        """Generate multiple records, optionally seeded and spread over worker processes
+
+        Returns:
+            RecordBatch; indexing it gives dict-like records
+        """
+        return RecordBatch(self.generate_columns(quantity, seed, workers, offset))
+
+    def iter_bulk(self, quantity: int, chunk_size: int = 10000, seed: Optional[int] = None,
+                  workers: int = 1, offset: int = 0) -> Iterator[RecordBatch]:
+        """Generate multiple records lazily, in chunks of at most chunk_size records
+
+        Seeded or parallel runs yield one chunk per shard, in order, so the
+        chunking does not depend on the worker count.
+        """
+        if seed is None and workers <= 1:
+            for start in range(0, quantity, chunk_size):
+                yield self.generate_bulk(min(chunk_size, quantity - start))
+            return
+        if seed is None:
+            seed = random.getrandbits(64)
+        for shard_columns in iter_sharded_columns(self, seed, offset, offset + quantity, workers):
+            yield RecordBatch(shard_columns)
 
-    def to_csv(self, data: List[Dict[str, str]], file_path: str, fields: List[str] = None):
+    def to_csv(self, data: Sequence[Dict[str, str]], file_path: str, fields: List[str] = None,
+               compression: Optional[str] = None):
         """Save generated data to CSV file with optional field filtering
         
         Args:
-            data: List of records to save
+            data: RecordBatch or list of records to save
             file_path: Output file path
             fields: List of field names to include (None for all fields)
+            compression: 'gzip' or 'zstd'; by default taken from the file extension (.gz, .zst)
         """
         if not data:
             raise ValueError("No data to save")
@@ -176,7 +345,9 @@ class ModularDataGenerator:
             if field not in data[0]:
                 raise ValueError(f"Field '{field}' not found in generated data")
                 
-        with open(file_path, "w", encoding="utf-8") as f:
+        if compression is None:
+            compression = compression_for_path(file_path)
+        with open_text(file_path, compression) as f:
             f.write(",".join(headers) + "\n")  # Write header
-            for record in data:
-                f.write(",".join(str(record[h]) for h in headers) + "\n")
+            for row in iter_rows(data, headers):
+                f.write(",".join(map(str, row)) + "\n")
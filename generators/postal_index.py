@@ -0,0 +1,234 @@
+"""Columnar index of the postal code data (kody_pocztowe.txt)
+
+Every field is interned: rows store 32-bit codes into per-field tables of
+distinct values, so repeated gminas, powiats, voivodeships, cities and
+street names are kept once. The 'numery' house number specification is
+compiled once per distinct value into a sampler (a range or a candidate
+tuple), so generating an address is a handful of index lookups.
+
+Region filters are served by a hierarchical index built on first use:
+entries are ordered by województwo, powiat, gmina and city, so every
+region is a few contiguous ranges of that order, found by name.
+"""
+import random
+import logging
+import itertools
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from .record_batch import CategoricalColumn
+
+# Field names in file column order: PNA;MIEJSCOWOŚĆ;ULICA;NUMERY;GMINA;POWIAT;WOJEWÓDZTWO
+POSTAL_FIELDS = ('pna', 'miejscowosc', 'ulica', 'numery', 'gmina', 'powiat', 'wojewodztwo')
+
+# Region filter names mapped to postal fields, from the widest to the narrowest level
+REGION_LEVELS = {'wojewodztwo': 'wojewodztwo', 'powiat': 'powiat', 'gmina': 'gmina', 'city': 'miejscowosc'}
+
+# House number sampler kinds
+HOUSE_RANGE, HOUSE_CHOICE, HOUSE_FIXED = range(3)
+# House numbers drawn when an entry has no 'numery' specification
+DEFAULT_HOUSE_NUMBERS = (1, 150)
+
+def compile_house_numbers(numery: Optional[str]) -> Tuple[int, object]:
+    """Compile a 'numery' specification into a (kind, value) sampler
+
+    A missing specification draws from DEFAULT_HOUSE_NUMBERS, "1-10" draws
+    from the range, "1,3,5" picks one of the listed numbers and anything else
+    (including malformed ranges) is used as is.
+    """
+    if not numery:
+        return HOUSE_RANGE, DEFAULT_HOUSE_NUMBERS
+    if '-' in numery:
+        try:
+            start, end = map(int, numery.split('-'))
+        except ValueError:
+            return HOUSE_FIXED, numery
+        if start > end:
+            return HOUSE_FIXED, numery
+        return HOUSE_RANGE, (start, end)
+    if ',' in numery:
+        return HOUSE_CHOICE, tuple(number.strip() for number in numery.split(','))
+    return HOUSE_FIXED, numery
+
+class _InternedColumn:
+    """Codes of one field and the table of its distinct values"""
+
+    __slots__ = ("codes", "values", "_lookup")
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[Optional[str]] = []
+        self._lookup: Dict[Optional[str], int] = {}
+
+    def append(self, value: Optional[str]):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def freeze(self):
+        # The lookup is only needed while building
+        self._lookup = None
+
+class RegionSampler:
+    """Uniform sampler of the entries of one region
+
+    The region is a list of (start, stop) ranges of an ordering of the
+    entries; order None stands for the entries themselves.
+    """
+
+    __slots__ = ("order", "ranges", "_ends", "size")
+
+    def __init__(self, order: Optional[array], ranges: List[Tuple[int, int]]):
+        self.order = order
+        self.ranges = ranges
+        self._ends = list(itertools.accumulate(stop - start for start, stop in ranges))
+        self.size = self._ends[-1] if ranges else 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def sample(self, quantity: int, rng=random) -> array:
+        """Draw quantity entry rows uniformly, with replacement"""
+        if quantity and not self.size:
+            raise IndexError("Cannot choose from an empty region")
+        rand = rng.random
+        size = self.size
+        if len(self.ranges) == 1:
+            start = self.ranges[0][0]
+            positions = [start + int(rand() * size) for _ in range(quantity)]
+        else:
+            ends, ranges = self._ends, self.ranges
+            positions = []
+            for _ in range(quantity):
+                position = int(rand() * size)
+                part = bisect_right(ends, position)
+                positions.append(ranges[part][1] - (ends[part] - position))
+        if self.order is None:
+            return array("I", positions)
+        return array("I", map(self.order.__getitem__, positions))
+
+class PostalIndex(Sequence):
+    """Parsed postal code entries stored column by column
+
+    Indexing returns the entry as a dict (as the former list of parsed
+    entries did); generators should use the column and sampler methods.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.logger = logging.getLogger(__name__)
+        self._columns = {field: _InternedColumn() for field in POSTAL_FIELDS}
+        columns = [self._columns[field] for field in POSTAL_FIELDS]
+        for line in lines:
+            parts = line.split(';')
+            if len(parts) < 7:
+                self.logger.warning(f"Skipping malformed line in postal codes data: {line}")
+                continue
+            for column, part in zip(columns, parts):
+                column.append(part.strip())
+        # Empty street and house number fields are stored as None
+        for field in ('ulica', 'numery'):
+            values = self._columns[field].values
+            if '' in values:
+                values[values.index('')] = None
+        for column in columns:
+            column.freeze()
+
+        # One sampler per distinct house number specification
+        self._house_samplers = [compile_house_numbers(numery) for numery in self._columns['numery'].values]
+        # Street names fall back to the city name
+        streets = self._columns['ulica']
+        cities = self._columns['miejscowosc']
+        self._street_names = [streets.values[street] or cities.values[city]
+                              for street, city in zip(streets.codes, cities.codes)]
+        self._regions = None
+        self._samplers: Dict[tuple, RegionSampler] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns['pna'].codes)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        return {field: column.values[column.codes[row]] for field, column in self._columns.items()}
+
+    def value(self, field: str, row: int) -> Optional[str]:
+        """Return one field of one entry"""
+        column = self._columns[field]
+        return column.values[column.codes[row]]
+
+    def categorical(self, field: str, rows: Iterable[int]) -> CategoricalColumn:
+        """Return a field of the given entries as codes into the interned values"""
+        column = self._columns[field]
+        return CategoricalColumn(array("I", map(column.codes.__getitem__, rows)), column.values)
+
+    def house_number(self, row: int, rng=random) -> str:
+        """Draw a house number allowed for an entry"""
+        kind, value = self._house_samplers[self._columns['numery'].codes[row]]
+        if kind == HOUSE_RANGE:
+            return str(rng.randint(*value))
+        if kind == HOUSE_CHOICE:
+            return rng.choice(value)
+        return value
+
+    def street(self, row: int, house_number: str) -> str:
+        """Return the street address of an entry, using the city name when it has no street"""
+        return f"{self._street_names[row]} {house_number}".strip()
+
+    def streets(self, rows: Iterable[int], rng=random) -> List[str]:
+        """Return street addresses with drawn house numbers for many entries"""
+        house_number = self.house_number
+        street_names = self._street_names
+        return [f"{street_names[row]} {house_number(row, rng)}".strip() for row in rows]
+
+    def _build_regions(self):
+        """Order the entries by region and record the ranges of every region at every level"""
+        level_columns = [self._columns[field] for field in REGION_LEVELS.values()]
+        keys = [tuple(column.values[column.codes[row]].casefold() for column in level_columns)
+                for row in range(len(self))]
+        order = sorted(range(len(self)), key=keys.__getitem__)
+        # regions[depth][name] -> [(path of names down to depth, start, stop)]
+        regions: List[Dict[str, List[Tuple[tuple, int, int]]]] = []
+        for depth in range(len(level_columns)):
+            level: Dict[str, List[Tuple[tuple, int, int]]] = {}
+            start = 0
+            for path, rows in itertools.groupby(order, key=lambda row: keys[row][:depth + 1]):
+                stop = start + sum(1 for _ in rows)
+                level.setdefault(path[-1], []).append((path, start, stop))
+                start = stop
+            regions.append(level)
+        return array("I", order), regions
+
+    def sampler(self, region: Optional[Mapping[str, str]] = None) -> RegionSampler:
+        """Return the sampler of the entries within a region, built once per region
+
+        Args:
+            region: Mapping of REGION_LEVELS names ('wojewodztwo', 'powiat',
+                'gmina', 'city') to case-insensitive names; None for all entries
+
+        Raises:
+            ValueError: On unknown filter names or when no entry matches the region
+        """
+        if not region:
+            return RegionSampler(None, [(0, len(self))] if len(self) else [])
+        unknown = set(region) - set(REGION_LEVELS)
+        if unknown:
+            raise ValueError(f"Unknown region filter: {', '.join(sorted(unknown))}")
+        wanted = [str(region[name]).casefold() if name in region else None for name in REGION_LEVELS]
+        key = tuple(wanted)
+        sampler = self._samplers.get(key)
+        if sampler is not None:
+            return sampler
+
+        if self._regions is None:
+            self._regions = self._build_regions()
+        order, regions = self._regions
+        depth = max(i for i, name in enumerate(wanted) if name is not None)
+        ranges = [(start, stop) for path, start, stop in regions[depth].get(wanted[depth], [])
+                  if all(name is None or name == part for name, part in zip(wanted, path))]
+        if not ranges:
+            raise ValueError(f"No postal code entries found in region {dict(region)}")
+        sampler = self._samplers[key] = RegionSampler(order, ranges)
+        return sampler
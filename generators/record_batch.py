@@ -0,0 +1,226 @@
+"""Compact containers for generated records
+
+A RecordBatch stores one column per field instead of one dict per record.
+Values drawn from the locale data lists (names, surnames, cities...) are kept
+as a CategoricalColumn: an array of 32-bit codes into the shared data list.
+Rows are exposed as lazy read-only mappings, so code written against the
+list-of-dicts API keeps working.
+"""
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Sequence
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+def take_values(values: Sequence, indices: Iterable[int]) -> List[str]:
+    """Look up many indices at once, using the bulk decoder of packed data types"""
+    take = getattr(values, "take", None)
+    if take is not None:
+        return take(indices)
+    return list(map(values.__getitem__, indices))
+
+class ConcatenatedValues(Sequence):
+    """Read-only view of several value lists as one, without copying them"""
+
+    def __init__(self, *parts: Sequence):
+        self.parts = parts
+        self._starts = []
+        total = 0
+        for part in parts:
+            self._starts.append(total)
+            total += len(part)
+        self._length = total
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ConcatenatedValues index out of range")
+        part = bisect_right(self._starts, index) - 1
+        return self.parts[part][index - self._starts[part]]
+
+    def take(self, indices: Iterable[int]) -> List[str]:
+        indices = list(indices)
+        result = [None] * len(indices)
+        for part, start in zip(self.parts, self._starts):
+            stop = start + len(part)
+            positions = [position for position, index in enumerate(indices) if start <= index < stop]
+            values = take_values(part, [indices[position] - start for position in positions])
+            for position, value in zip(positions, values):
+                result[position] = value
+        return result
+
+class CategoricalColumn(Sequence):
+    """Column of values stored as codes into a shared list of categories"""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes, categories: Sequence):
+        self.codes = codes if isinstance(codes, array) else array("I", codes)
+        self.categories = categories
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CategoricalColumn(self.codes[index], self.categories)
+        return self.categories[self.codes[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.decode())
+
+    def decode(self) -> List[str]:
+        """Return the column values as a plain list"""
+        return take_values(self.categories, self.codes)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and self.decode() == list(other)
+
+    def __reduce__(self):
+        # The categories are whole data lists; other processes receive the values instead
+        return list, (self.decode(),)
+
+    def __repr__(self) -> str:
+        return f"CategoricalColumn({len(self)} values, {len(self.categories)} categories)"
+
+def decode_column(values: Sequence) -> List[str]:
+    """Return the values of a column as a list"""
+    if isinstance(values, CategoricalColumn):
+        return values.decode()
+    return values if isinstance(values, list) else list(values)
+
+def concat_columns(parts: List[Sequence]) -> Sequence:
+    """Concatenate pieces of one column, keeping it categorical when all pieces share their categories"""
+    if parts and all(isinstance(part, CategoricalColumn) and part.categories is parts[0].categories
+                     for part in parts):
+        codes = array("I")
+        for part in parts:
+            codes.extend(part.codes)
+        return CategoricalColumn(codes, parts[0].categories)
+    values: List[str] = []
+    for part in parts:
+        values.extend(decode_column(part))
+    return values
+
+class RecordView(Mapping):
+    """Read-only dict-like view of one record of a RecordBatch"""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: Dict[str, Sequence], index: int):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, field: str) -> str:
+        return self._columns[field][self._index]
+
+    def __contains__(self, field) -> bool:
+        return field in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+class RecordBatch(Sequence):
+    """Fixed-schema batch of records stored column by column
+
+    Indexing returns a RecordView (or a RecordBatch for slices), so a batch
+    can be used wherever a list of record dicts was expected. Exporters
+    should read whole columns through rows() instead.
+    """
+
+    __slots__ = ("_columns", "_length")
+
+    def __init__(self, columns: Dict[str, Sequence]):
+        self._columns = columns
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns of a record batch must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def concat(cls, batches: Iterable["RecordBatch"]) -> "RecordBatch":
+        """Concatenate batches with the same fields"""
+        return cls(merge_columns(batch._columns for batch in batches))
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def columns(self) -> Dict[str, Sequence]:
+        return self._columns
+
+    def column(self, field: str) -> List[str]:
+        """Return the values of one field as a list"""
+        return decode_column(self._columns[field])
+
+    def rows(self, fields: List[str], default: str = '') -> Iterator[Tuple[str, ...]]:
+        """Iterate over the records as tuples of the given fields (default for missing fields)"""
+        columns = [self.column(field) if field in self._columns else repeat(default, self._length)
+                   for field in fields]
+        return zip(*columns)
+
+    def to_dicts(self) -> List[Dict[str, str]]:
+        """Return the records as a list of plain dicts"""
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in self.rows(fields)]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RecordBatch({field: values[index] for field, values in self._columns.items()})
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("RecordBatch index out of range")
+        return RecordView(self._columns, index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RecordBatch):
+            return self.fields == other.fields and all(
+                decode_column(values) == other.column(field) for field, values in self._columns.items())
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(record == row for record, row in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RecordBatch({self._length} records, fields={self.fields})"
+
+def merge_columns(parts: Iterable[Dict[str, Sequence]]) -> Dict[str, Sequence]:
+    """Concatenate column dictionaries in order"""
+    pieces: Dict[str, List[Sequence]] = {}
+    for part in parts:
+        for field, values in part.items():
+            pieces.setdefault(field, []).append(values)
+    return {field: concat_columns(values) for field, values in pieces.items()}
+
+def record_fields(records: Sequence) -> List[str]:
+    """Return the field names present in a RecordBatch or a list of record dicts"""
+    if isinstance(records, RecordBatch):
+        return records.fields
+    fields: Dict[str, None] = {}
+    for record in records:
+        fields.update(dict.fromkeys(record))
+    return list(fields)
+
+def iter_rows(records: Sequence, fields: List[str], default: str = '') -> Iterator[Tuple[str, ...]]:
+    """Iterate over records as tuples of the given fields, for batches and lists of dicts alike"""
+    if isinstance(records, RecordBatch):
+        return records.rows(fields, default)
+    return (tuple(record.get(field, default) for field in fields) for record in records)
@@ -0,0 +1,420 @@
+"""Declarative output schemas compiled into generation plans
+
+A schema is a JSON document declaring the output columns, each mapped to
+a source, and the persons/addresses table layout of the SQL exports:
+
+    {
+      "columns": [
+        {"name": "First Name", "source": "field", "field": "Name", "selected": true},
+        {"name": "Email", "source": "format", "template": "{First Name}.{Surname}@example.com",
+         "transform": "ascii_lower"},
+        {"name": "Nationality", "source": "data", "data_type": "countries"},
+        {"name": "Status", "source": "constant", "value": "active"}
+      ],
+      "tables": {
+        "persons": [["ID", "id", "VARCHAR(50) PRIMARY KEY"], ["First Name", "first_name", "VARCHAR(100)"]],
+        "addresses": [["City", "city", "VARCHAR(100)"]]
+      }
+    }
+
+Column sources:
+    field: a built-in record field (RECORD_FIELDS: names, the ID plugin
+        output, postal fields), named by "field" when it differs from the
+        column name
+    data: values drawn from a data type file of the locale, by weight
+        for weighted files
+    constant: "value" in every record
+    format: "template" over other columns, with an optional "transform"
+        (see TRANSFORMS)
+
+Columns marked "selected" are the ones frontends include by default, and
+"label" is their display name. The first persons column is the key the
+addresses rows reference.
+
+Schema.compile() resolves the dependencies of the requested columns once.
+Only the built-in fields and data files they need are generated, and the
+derived columns are computed a whole column at a time, in dependency
+order, after the columnar batch engine has generated the built-in ones.
+"""
+import os
+import json
+import threading
+import unicodedata
+from array import array
+from itertools import chain
+from string import Formatter
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from .batch_engine import RECORD_FIELDS
+from .record_batch import CategoricalColumn, ConcatenatedValues, decode_column, take_values
+
+DEFAULT_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "../schemas/default.json")
+SOURCES = ('field', 'data', 'constant', 'format')
+TABLES = ('persons', 'addresses')
+
+# Letters without a decomposition into an ASCII base letter
+_ASCII_LETTERS = str.maketrans({"ł": "l", "Ł": "L", "ß": "ss", "ø": "o", "Ø": "O", "đ": "d", "Đ": "D"})
+
+def _ascii(value: str) -> str:
+    value = unicodedata.normalize("NFKD", value.translate(_ASCII_LETTERS))
+    return value.encode("ascii", "ignore").decode("ascii")
+
+TRANSFORMS: Dict[str, Callable[[str], str]] = {
+    'lower': str.lower,
+    'upper': str.upper,
+    'ascii': _ascii,
+    'ascii_lower': lambda value: _ascii(value).lower(),
+}
+
+class SchemaColumn(NamedTuple):
+    """One output column and its source"""
+    name: str
+    source: str
+    # Built-in record field of a 'field' column
+    field: Optional[str] = None
+    # Data type file of a 'data' column
+    data_type: Optional[str] = None
+    # Value of a 'constant' column
+    value: Optional[str] = None
+    # Template and transform of a 'format' column
+    template: Optional[str] = None
+    transform: Optional[str] = None
+    label: Optional[str] = None
+    selected: bool = False
+
+    def dependencies(self) -> List[str]:
+        """Return the names of the columns a format column reads, in template order"""
+        if self.source != 'format':
+            return []
+        return [field_name for _, field_name, _, _ in Formatter().parse(self.template) if field_name is not None]
+
+class _Step(NamedTuple):
+    """Derived column computed after the built-in fields"""
+    name: str
+    dependencies: Tuple[str, ...]
+    generate: Callable
+
+class SchemaPlan:
+    """Execution plan of a schema for a set of requested columns
+
+    Attributes:
+        fields: Output column names, in schema order
+        source_fields: Built-in record fields the batch engine has to generate
+        data_types: Data type files read by 'data' columns
+    """
+
+    def __init__(self, fields: Tuple[str, ...], source_fields: frozenset, renames: Tuple[Tuple[str, str], ...],
+                 steps: List[_Step], data_types: frozenset):
+        self.fields = fields
+        self.source_fields = source_fields
+        self.data_types = data_types
+        self._renames = renames
+        self._steps = steps
+        # The built-in fields pass through unchanged, in the engine's order
+        self.identity = (not steps and all(name == field for name, field in renames)
+                         and list(fields) == [field for field in RECORD_FIELDS if field in fields])
+
+    def apply(self, engine, columns: Dict[str, Sequence[str]], quantity: int, slot) -> Dict[str, Sequence[str]]:
+        """Turn the built-in field columns of a batch into the output columns
+
+        Args:
+            engine: ColumnarBatchEngine drawing the values of 'data' columns
+            columns: Columns generated by the engine, by built-in field name
+            quantity: Number of records in the batch
+            slot: Function returning the random stream of a generation slot
+
+        Returns:
+            Output columns in schema order; columns whose inputs the locale
+            cannot provide (e.g. IDs without an ID generator) are left out
+        """
+        if self.identity:
+            return columns
+        values: Dict[str, Sequence[str]] = {}
+        for name, field in self._renames:
+            if field in columns:
+                values[name] = columns[field]
+        for step in self._steps:
+            if all(dependency in values for dependency in step.dependencies):
+                values[step.name] = step.generate(engine, values, quantity, slot)
+        return {name: values[name] for name in self.fields if name in values}
+
+class Schema:
+    """Output columns and SQL table layout
+
+    Args:
+        columns: Output columns, in output order
+        tables: Mapping of table name ('persons', 'addresses') to (column name, SQL column, SQL type) triples
+
+    Raises:
+        ValueError: On an invalid column definition, an unknown column reference or a dependency cycle
+    """
+
+    def __init__(self, columns: Iterable[SchemaColumn], tables: Mapping[str, Iterable[Sequence[str]]]):
+        self.columns = tuple(columns)
+        self.tables = {table: [tuple(entry) for entry in tables.get(table, [])] for table in TABLES}
+        self._by_name = {}
+        for column in self.columns:
+            self._check_column(column)
+            if column.name in self._by_name:
+                raise ValueError(f"Duplicate schema column: {column.name}")
+            self._by_name[column.name] = column
+        for column in self.columns:
+            for dependency in column.dependencies():
+                if dependency not in self._by_name:
+                    raise ValueError(f"Column {column.name} references unknown column {dependency}")
+        self._check_tables(tables)
+        # Raises on dependency cycles
+        self._dependency_order([column.name for column in self.columns])
+        self._plans: Dict[Optional[frozenset], SchemaPlan] = {}
+
+    @staticmethod
+    def _check_column(column: SchemaColumn):
+        if not column.name:
+            raise ValueError("Schema columns need a name")
+        if column.source not in SOURCES:
+            raise ValueError(f"Column {column.name}: unsupported source {column.source!r}")
+        if column.source == 'field' and (column.field or column.name) not in RECORD_FIELDS:
+            raise ValueError(f"Column {column.name}: unknown field {column.field or column.name!r}")
+        if column.source == 'data' and not column.data_type:
+            raise ValueError(f"Column {column.name}: data columns need a data_type")
+        if column.source == 'constant' and column.value is None:
+            raise ValueError(f"Column {column.name}: constant columns need a value")
+        if column.source == 'format':
+            if not column.template:
+                raise ValueError(f"Column {column.name}: format columns need a template")
+            try:
+                parts = list(Formatter().parse(column.template))
+            except ValueError as e:
+                raise ValueError(f"Column {column.name}: invalid template: {e}")
+            for _, field_name, format_spec, conversion in parts:
+                # Plain column references only; no attribute or index access
+                if field_name is not None and (format_spec or conversion or not field_name):
+                    raise ValueError(f"Column {column.name}: templates may only reference columns by name")
+            if column.transform is not None and column.transform not in TRANSFORMS:
+                raise ValueError(f"Column {column.name}: unknown transform {column.transform!r}")
+
+    def _check_tables(self, tables: Mapping[str, Iterable[Sequence[str]]]):
+        unknown_tables = set(tables) - set(TABLES)
+        if unknown_tables:
+            raise ValueError(f"Unknown tables: {', '.join(sorted(unknown_tables))}")
+        for table, entries in self.tables.items():
+            for entry in entries:
+                if len(entry) != 3:
+                    raise ValueError(f"Table {table}: entries are [column name, SQL column, SQL type]")
+                if entry[0] not in self._by_name:
+                    raise ValueError(f"Table {table} references unknown column {entry[0]}")
+        if not self.tables['persons']:
+            raise ValueError("The persons table needs at least its key column")
+
+    def _dependency_order(self, names: Iterable[str]) -> List[str]:
+        """Return names and their transitive dependencies, every column after its dependencies"""
+        order: List[str] = []
+        state: Dict[str, bool] = {}
+
+        def visit(name: str):
+            if state.get(name) is True:
+                return
+            if state.get(name) is False:
+                raise ValueError(f"Dependency cycle through column {name}")
+            state[name] = False
+            for dependency in self._by_name[name].dependencies():
+                visit(dependency)
+            state[name] = True
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def __getstate__(self):
+        # Compiled plans hold closures; worker processes compile their own
+        state = self.__dict__.copy()
+        state['_plans'] = {}
+        return state
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Schema":
+        """Build a schema from its JSON document
+
+        Raises:
+            ValueError: On an invalid document
+        """
+        if not isinstance(data, Mapping) or not isinstance(data.get('columns'), list):
+            raise ValueError("A schema needs a list of columns")
+        columns = []
+        for position, column in enumerate(data['columns'], 1):
+            if not isinstance(column, Mapping):
+                raise ValueError(f"Schema column {position} must be an object")
+            name = column.get('name', f"#{position}")
+            missing_keys = [key for key in ('name', 'source') if key not in column]
+            if missing_keys:
+                raise ValueError(f"Column {name}: missing {', '.join(missing_keys)}")
+            unknown_keys = set(column) - set(SchemaColumn._fields)
+            if unknown_keys:
+                raise ValueError(f"Column {name}: unknown keys {', '.join(sorted(unknown_keys))}")
+            for key in ('name', 'source', 'field', 'data_type', 'template', 'transform', 'label'):
+                if not isinstance(column.get(key, ''), str):
+                    raise ValueError(f"Column {name}: {key} must be a string")
+            columns.append(SchemaColumn(**column))
+        tables = data.get('tables', {})
+        if not isinstance(tables, Mapping):
+            raise ValueError("Schema tables must map table names to lists of columns")
+        for table, entries in tables.items():
+            if not isinstance(entries, list):
+                raise ValueError(f"Table {table}: expected a list of columns")
+            for entry in entries:
+                if not isinstance(entry, list) or not all(isinstance(item, str) for item in entry):
+                    raise ValueError(f"Table {table}: entries are [column name, SQL column, SQL type] lists, "
+                                     f"got {entry!r}")
+        return cls(columns, tables)
+
+    def to_dict(self) -> Dict:
+        """Return the JSON document of the schema"""
+        columns = []
+        for column in self.columns:
+            entry = {'name': column.name, 'source': column.source}
+            entry.update((key, value) for key, value in column._asdict().items()
+                         if key not in entry and value not in (None, False))
+            columns.append(entry)
+        return {'columns': columns, 'tables': {table: [list(entry) for entry in entries]
+                                               for table, entries in self.tables.items()}}
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def default_fields(self) -> List[str]:
+        """Return the columns frontends include by default"""
+        return [column.name for column in self.columns if column.selected]
+
+    def resolve(self, fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+        """Map requested names case-insensitively onto column names (unknown names are ignored)
+
+        Returns:
+            Matching column names in request order, or None for all columns
+        """
+        if not fields:
+            return None
+        by_lower_name = {name.lower(): name for name in self._by_name}
+        return [by_lower_name[field.lower()] for field in fields if field.lower() in by_lower_name]
+
+    def table_columns(self, table: str) -> List[Tuple[str, str, str]]:
+        """Return the (column name, SQL column, SQL type) triples of a table"""
+        return self.tables[table]
+
+    def compile(self, fields: Optional[Iterable[str]] = None) -> SchemaPlan:
+        """Compile the plan generating the requested columns (case-insensitive, None for all)
+
+        Plans are cached per requested column set.
+        """
+        resolved = self.resolve(fields)
+        key = None if resolved is None else frozenset(resolved)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self._compile(key)
+        return plan
+
+    def _compile(self, requested: Optional[frozenset]) -> SchemaPlan:
+        output = tuple(name for name in self._by_name if requested is None or name in requested)
+        renames = []
+        steps = []
+        data_types = set()
+        for name in self._dependency_order(output):
+            column = self._by_name[name]
+            if column.source == 'field':
+                renames.append((name, column.field or name))
+                continue
+            if column.source == 'data':
+                data_types.add(column.data_type)
+            steps.append(_Step(name, tuple(column.dependencies()), _column_generator(column)))
+        source_fields = frozenset(field for _, field in renames)
+        return SchemaPlan(output, source_fields, tuple(renames), steps, frozenset(data_types))
+
+# Transformed category lists shared by every schema, including per-request ones,
+# by transform and ids of the data lists (kept alive, so the ids stay theirs)
+_TRANSFORMED_CACHE_SIZE = 64
+_transformed: Dict[Tuple[str, Tuple[int, ...]], Tuple[Tuple[Sequence[str], ...], List[str]]] = {}
+_transformed_lock = threading.Lock()
+
+def _transformed_categories(transform: str, categories: Sequence[str]) -> List[str]:
+    """Return a category list with a transform applied, computed once per data list and transform"""
+    # Gender-combined views are created per generator; the data lists they join are shared
+    sources = categories.parts if isinstance(categories, ConcatenatedValues) else (categories,)
+    key = (transform, tuple(map(id, sources)))
+    entry = _transformed.get(key)
+    if entry is None or any(cached is not source for cached, source in zip(entry[0], sources)):
+        function = TRANSFORMS[transform]
+        entry = (sources, list(chain.from_iterable(map(function, source) for source in sources)))
+        with _transformed_lock:
+            _transformed[key] = entry
+            while len(_transformed) > _TRANSFORMED_CACHE_SIZE:
+                del _transformed[next(iter(_transformed))]
+    return entry[1]
+
+def _column_generator(column: SchemaColumn) -> Callable:
+    """Compile the whole-column generator of a derived column"""
+    if column.source == 'constant':
+        # Shared by every batch, so batches concatenate without decoding
+        categories = (str(column.value),)
+
+        def constant(engine, values, quantity, slot):
+            return CategoricalColumn(array("I", bytes(4 * quantity)), categories)
+        return constant
+
+    if column.source == 'data':
+        slot_name = f"column:{column.name}"
+
+        def data(engine, values, quantity, slot):
+            data_values = engine.generator.data_types.get(column.data_type, [])
+            return engine._choices(data_values, quantity, slot(slot_name))
+        return data
+
+    # Transforms map character by character, so they are applied to the template
+    # literals and the inputs instead of every rendered value
+    transform = TRANSFORMS[column.transform] if column.transform else None
+    pieces = []
+    dependencies = []
+    for literal, field_name, _, _ in Formatter().parse(column.template):
+        if transform is not None:
+            literal = transform(literal)
+        pieces.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field_name is not None:
+            pieces.append("{}")
+            dependencies.append(field_name)
+    # The template becomes a positional format string, applied to whole columns
+    render = "".join(pieces).format
+
+    def transformed_input(values: Sequence[str]) -> List[str]:
+        if transform is None:
+            return decode_column(values)
+        if not isinstance(values, CategoricalColumn):
+            return list(map(transform, values))
+        return take_values(_transformed_categories(column.transform, values.categories), values.codes)
+
+    def derived(engine, values, quantity, slot):
+        inputs = [transformed_input(values[dependency]) for dependency in dependencies]
+        if not inputs:
+            return [render()] * quantity
+        return [render(*row) for row in zip(*inputs)]
+    return derived
+
+def load_schema(path: str) -> Schema:
+    """Read a schema from a JSON file
+
+    Raises:
+        ValueError: On an invalid schema document
+    """
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid schema file {path}: {e}")
+    return Schema.from_dict(data)
+
+_default_schema: Optional[Schema] = None
+
+def default_schema() -> Schema:
+    """Return the built-in schema (schemas/default.json), loaded once"""
+    global _default_schema
+    if _default_schema is None:
+        _default_schema = load_schema(DEFAULT_SCHEMA_PATH)
+    return _default_schema
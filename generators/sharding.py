@@ -0,0 +1,102 @@
+"""Counter-based seeded generation and its sharding across processes
+
+Seeded records are addressed by their position. Record i belongs to block
+i // BLOCK_SIZE, and every generation step (slot) of a block draws from its
+own random.Random keyed by (master seed, block index, slot), like a
+counter-based generator whose counter is the block. Record i is therefore a
+function of (seed, i) only: any range can be regenerated in O(stop - start)
+time, and parallel shards need no coordination. Output is identical for any
+worker count, and a field keeps its values whichever other fields are
+generated.
+"""
+import random
+import hashlib
+import itertools
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Records drawn from one keyed stream; the smallest unit regenerated for a range
+BLOCK_SIZE = 1000
+# Records per task handed to a worker process (a multiple of BLOCK_SIZE)
+SHARD_SIZE = 10 * BLOCK_SIZE
+
+def derive_seed(seed: int, *keys) -> int:
+    """Derive an independent 64-bit seed from a master seed and a sequence of keys"""
+    material = "/".join(str(part) for part in (seed, *keys)).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "little")
+
+class SlotStreams:
+    """Independent random streams of one block, one per generation slot"""
+
+    __slots__ = ("seed", "index", "_streams")
+
+    def __init__(self, seed: int, index: int):
+        self.seed = seed
+        self.index = index
+        self._streams: Dict[str, random.Random] = {}
+
+    def slot(self, name: str) -> random.Random:
+        """Return the stream of a slot, created on first use"""
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = random.Random(derive_seed(self.seed, self.index, name))
+        return stream
+
+def iter_shards(start: int, stop: int, shard_size: int = SHARD_SIZE) -> Iterator[Tuple[int, int]]:
+    """Yield (start, stop) ranges covering [start, stop), aligned to multiples of shard_size"""
+    position = start
+    while position < stop:
+        shard_stop = min(stop, (position // shard_size + 1) * shard_size)
+        yield position, shard_stop
+        position = shard_stop
+
+# Generator of the current worker process, created once by _init_worker
+_worker_generator = None
+
+def _init_worker(locale: str, base_data_path: str, region: Optional[Dict[str, str]] = None,
+                 fields: Optional[Tuple[str, ...]] = None, unique_ids: bool = False, schema=None):
+    global _worker_generator
+    from .dataset_registry import DatasetRegistry, get_registry
+    from .modular_generator import ModularDataGenerator
+    registry = get_registry()
+    if registry.data_loader.base_data_path != base_data_path:
+        registry = DatasetRegistry(base_data_path)
+    _worker_generator = ModularDataGenerator(locale, registry=registry, region=region, fields=fields,
+                                             unique_ids=unique_ids, schema=schema)
+
+def _generate_range_in_worker(task: Tuple[int, int, int]) -> Dict[str, List[str]]:
+    return _worker_generator.generate_range(*task)
+
+def iter_sharded_columns(generator, seed: int, start: int, stop: int,
+                         workers: int = 1) -> Iterator[Dict[str, List[str]]]:
+    """Generate the seeded records [start, stop) shard by shard, yielding the columns of each shard in order
+
+    Args:
+        generator: ModularDataGenerator used in-process and as the template for workers
+        seed: Master seed
+        start: Position of the first record
+        stop: Position after the last record
+        workers: Number of worker processes (1 generates in the calling process)
+    """
+    tasks = [(seed, shard_start, shard_stop) for shard_start, shard_stop in iter_shards(start, stop)]
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield generator.generate_range(*task)
+        return
+
+    # Imported on first use, it is slow to import and most runs stay in-process
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(generator.locale, generator.data_loader.base_data_path,
+                                       generator.region, generator.columns, generator.unique_ids,
+                                       generator.schema)) as executor:
+        # Keep a bounded window of shards in flight and hand them out in order
+        task_iter = iter(tasks)
+        pending = deque(executor.submit(_generate_range_in_worker, task)
+                        for task in itertools.islice(task_iter, workers * 2))
+        while pending:
+            columns = pending.popleft().result()
+            next_task = next(task_iter, None)
+            if next_task is not None:
+                pending.append(executor.submit(_generate_range_in_worker, next_task))
+            yield columns
@@ -0,0 +1,56 @@
+"""Optional NumPy implementations of the batch generation hot paths
+
+With NumPy installed, the batch engine and the ID generators draw their
+random indices as arrays and assemble ID numbers and birth dates as arrays of
+character codes; without it they fall back to plain Python loops. Both paths
+draw from the same distributions but not the same values, so a seeded
+dataset is reproducible for a given installation, not across installations
+with and without NumPy.
+"""
+from array import array
+from typing import List, Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def available(rng) -> bool:
+    """Return whether NumPy is installed and rng can seed a NumPy generator"""
+    return numpy is not None and hasattr(rng, "getrandbits")
+
+def generator(rng) -> "numpy.random.Generator":
+    """Return a NumPy generator seeded from rng, so seeded runs stay reproducible"""
+    return numpy.random.Generator(numpy.random.PCG64(rng.getrandbits(64)))
+
+def sample_indices(values: Sequence, quantity: int, generator) -> "numpy.ndarray":
+    """Draw quantity indices into values, by weight for weighted data types"""
+    alias_table = getattr(values, "alias_table", None)
+    if alias_table is not None:
+        prob = numpy.asarray(alias_table.prob, dtype=numpy.float64)
+        alias = numpy.asarray(alias_table.alias, dtype=numpy.intp)
+        positions = generator.random(quantity) * len(prob)
+        columns = positions.astype(numpy.intp)
+        return numpy.where(positions - columns < prob[columns], columns, alias[columns])
+    count = len(values)
+    if not quantity:
+        return numpy.zeros(0, dtype=numpy.intp)
+    if not count:
+        raise IndexError("Cannot choose from an empty sequence")
+    return generator.integers(0, count, quantity)
+
+def to_codes(indices: "numpy.ndarray") -> array:
+    """Return an index array as the 32-bit codes of a CategoricalColumn"""
+    codes = array("I")
+    codes.frombytes(indices.astype(numpy.uint32).tobytes())
+    return codes
+
+def char_table(strings: Sequence[str]) -> "numpy.ndarray":
+    """Return equally long strings as a (len(strings), width) array of character codes"""
+    width = len(strings[0])
+    return numpy.array(strings, dtype=f"U{width}").view(numpy.uint32).reshape(len(strings), width)
+
+def strings(chars: "numpy.ndarray") -> List[str]:
+    """Return the rows of a character code array as strings, without trailing NUL characters"""
+    rows, width = chars.shape
+    return numpy.ascontiguousarray(chars, dtype=numpy.uint32).view(f"U{width}").reshape(rows).tolist()
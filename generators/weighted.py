@@ -0,0 +1,140 @@
+"""Frequency-weighted data types
+
+A data file may give each line a weight in a second, tab-separated column
+("Nowak<TAB>207000"); lines without one weigh 1. Weighted data types are
+loaded as WeightedValues, which carry a Walker/Vose alias table so every
+draw costs one random number and two array lookups.
+"""
+import random
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, List, Union
+
+WEIGHT_SEPARATOR = "\t"
+
+class AliasTable:
+    """Walker/Vose alias table over the indices 0..n-1
+
+    Args:
+        prob: Probability of keeping the column index, per column
+        alias: Index drawn instead of the column index otherwise
+    """
+
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, prob: Sequence, alias: Sequence):
+        if len(prob) != len(alias):
+            raise ValueError("Alias table columns must have the same length")
+        self.prob = prob
+        self.alias = alias
+
+    @classmethod
+    def from_weights(cls, weights: Sequence[float]) -> "AliasTable":
+        """Build the table of a discrete distribution with the given (unnormalised) weights
+
+        Raises:
+            ValueError: If a weight is negative or all weights are zero
+        """
+        count = len(weights)
+        total = sum(weights)
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Weights must not be negative")
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+        scaled = [weight * count / total for weight in weights]
+        prob = array("d", bytes(8 * count))
+        alias = array("I", bytes(4 * count))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Leftovers are 1 up to rounding errors
+        for i in large + small:
+            prob[i] = 1.0
+            alias[i] = i
+        return cls(prob, alias)
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, quantity: int, rng=random) -> array:
+        """Draw quantity indices, one random number per draw"""
+        rand = rng.random
+        prob, alias = self.prob, self.alias
+        count = len(prob)
+        codes = array("I")
+        for _ in range(quantity):
+            position = rand() * count
+            column = int(position)
+            codes.append(column if position - column < prob[column] else alias[column])
+        return codes
+
+class WeightedValues(Sequence):
+    """Values of a data type together with the alias table of their weights"""
+
+    __slots__ = ("values", "alias_table")
+
+    def __init__(self, values: Sequence[str], alias_table: AliasTable):
+        if len(values) != len(alias_table):
+            raise ValueError("Every value needs a weight")
+        self.values = values
+        self.alias_table = alias_table
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def take(self, indices: Iterable[int]) -> List[str]:
+        take = getattr(self.values, "take", None)
+        if take is not None:
+            return take(indices)
+        return list(map(self.values.__getitem__, indices))
+
+    def choice(self, rng=random) -> str:
+        """Draw one value according to the weights"""
+        return self.values[self.alias_table.sample(1, rng)[0]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, WeightedValues):
+            return list(self.values) == list(other.values) and list(self.alias_table.prob) == list(
+                other.alias_table.prob) and list(self.alias_table.alias) == list(other.alias_table.alias)
+        if isinstance(other, (list, tuple)):
+            return list(self.values) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WeightedValues(<{len(self)} items>)"
+
+def parse_lines(lines: Iterable[str]) -> Union[List[str], WeightedValues]:
+    """Split stripped data file lines into values and optional weights
+
+    Returns:
+        The plain list of values when no line has a weight, WeightedValues otherwise
+
+    Raises:
+        ValueError: If a weight is not a number
+    """
+    lines = list(lines)
+    if not any(WEIGHT_SEPARATOR in line for line in lines):
+        return lines
+    values, weights = [], []
+    for line in lines:
+        value, separator, weight = line.partition(WEIGHT_SEPARATOR)
+        values.append(value.strip())
+        try:
+            weights.append(float(weight) if separator else 1.0)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {value!r}: {weight!r}") from None
+    return WeightedValues(values, AliasTable.from_weights(weights))
+
+def choice(values: Sequence[str], rng=random) -> str:
+    """Draw one value of a data type, by weight when it has weights"""
+    if isinstance(values, WeightedValues):
+        return values.choice(rng)
+    return rng.choice(values)
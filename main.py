@@ -1,25 +1,46 @@
-from flask import Flask, request, jsonify, make_response, send_from_directory
-from desktop_gui.app import run_desktop_app
+from flask import Blueprint, Flask, Response, request, jsonify, send_file, send_from_directory, stream_with_context
 from generators.modular_generator import ModularDataGenerator
 from generators.data_loader import DataLoader
+from generators.dataset_registry import get_registry
+from generators import metrics
+from generators.compression import COMPRESSIONS, check_compression, negotiate
+from generators.exporters import EXPORT_FORMATS, iter_export
+from generators.schema import Schema, default_schema
+from generators.jobs import COMPLETED, DEFAULT_SPOOL_DIR, JobManager, JobQueueFull
 import os
-import io
-import csv
+import sys
+import itertools
 import argparse
+import threading
 
-app = Flask(__name__, static_folder='.')
+# Routes of the web interface, registered on the application by create_app
+api = Blueprint('api', __name__)
 
-@app.route('/')
+@api.before_app_request
+def _track_request_start():
+    if metrics.is_enabled():
+        request.metrics_endpoint = request.endpoint or 'unknown'
+        metrics.IN_FLIGHT.inc(endpoint=request.metrics_endpoint)
+
+@api.after_app_request
+def _track_request_end(response):
+    endpoint = getattr(request, 'metrics_endpoint', None)
+    if endpoint is not None:
+        # Streamed responses are closed once the whole body has been sent
+        response.call_on_close(lambda: metrics.IN_FLIGHT.dec(endpoint=endpoint))
+    return response
+
+@api.route('/')
 def serve_index():
     """Serve the main web UI page"""
     return send_from_directory('.', 'webui.html')
 
-@app.route('/<path:path>')
+@api.route('/<path:path>')
 def serve_static(path):
     """Serve static files from the root directory"""
     return send_from_directory('.', path)
 
-@app.route('/locales')
+@api.route('/locales')
 def get_locales():
     """API endpoint to get list of available locales
     
@@ -31,7 +52,52 @@ def get_locales():
     locales = data_loader.discover_locales()
     return jsonify(locales)
 
-@app.route('/generate', methods=['POST'])
+def _parse_generate_request(data):
+    """Read the generation options of a /generate or /jobs request body
+
+    Returns:
+        Tuple of (generator options, export options)
+
+    Raises:
+        ValueError: On invalid option combinations
+    """
+    format = data.get('format', 'csv')
+    if format not in EXPORT_FORMATS:
+        format = 'csv'
+    seed = data.get('seed')
+    seed = int(seed) if seed is not None else None
+    offset = int(data.get('offset', 0))
+    if offset and seed is None:
+        raise ValueError('offset requires a seed')
+    fields = data.get('fields', [])
+    generator_options = {
+        'locale': data.get('locale'),
+        'region': data.get('region'),
+        'unique_ids': bool(data.get('unique_ids', False)),
+        'schema': Schema.from_dict(data['schema']) if data.get('schema') is not None else None,
+        # Only the data files of the requested fields are loaded
+        'fields': fields,
+    }
+    export_options = {
+        'quantity': int(data.get('quantity')),
+        'fields': fields,
+        'format': format,
+        'seed': seed,
+        'offset': offset,
+    }
+    compression = data.get('compression')
+    if compression:
+        check_compression(compression)
+        if not EXPORT_FORMATS[format].compressible:
+            raise ValueError(f"Output format {format} is already compressed")
+        export_options['compression'] = compression
+    if 'batch_size' in data:
+        export_options['batch_size'] = int(data['batch_size'])
+    if 'transaction' in data:
+        export_options['transaction'] = bool(data['transaction'])
+    return generator_options, export_options
+
+@api.route('/generate', methods=['POST'])
 def generate_data():
     """API endpoint to generate data in requested format
     
@@ -39,57 +105,195 @@ def generate_data():
     - locale: locale code (e.g. 'pl')
     - quantity: number of records to generate
     - fields: array of field names to include
-    - format: output format ('csv' or 'sql')
+    - format: output format ('csv', 'sql', 'pgcopy' for a PostgreSQL COPY script,
+      'mysql' for a MySQL LOAD DATA archive or 'sqlite' for a SQLite database file)
+    - seed: optional integer seed making the output reproducible
+    - offset: optional position of the first record of a seeded dataset (pagination)
+    - region: optional address filter object with any of 'wojewodztwo', 'powiat',
+      'gmina' and 'city' (requires postal code data)
+    - unique_ids: optional flag guaranteeing that no ID number repeats
+    - schema: optional schema document declaring the output columns and SQL tables
+      (see GET /schema for the default one); fields then name its columns
+    - compression: optional 'gzip' or 'zstd' (with the zstandard package) for a
+      compressed download (e.g. .csv.gz); otherwise the response is compressed
+      on the fly when the client sends a matching Accept-Encoding
+    - batch_size: optional number of rows per SQL INSERT statement
+    - transaction: optional flag wrapping the SQL inserts in a transaction
     
     Returns:
         File attachment with generated data in requested format
     """
-    data = request.get_json()
-    locale = data.get('locale')
-    quantity = int(data.get('quantity'))
-    fields = data.get('fields', [])
-    format = data.get('format', 'csv')
+    try:
+        generator_options, export_options = _parse_generate_request(request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    locale = generator_options['locale']
+    format = export_options['format']
+    export_format = EXPORT_FORMATS[format]
+    # Explicitly requested compression changes the file, a negotiated one only the transfer
+    file_compression = export_options.get('compression')
+    transfer_compression = None
+    if file_compression is None and export_format.compressible:
+        transfer_compression = negotiate(request.headers.get('Accept-Encoding'))
+        export_options['compression'] = transfer_compression
     
     try:
-        generator = ModularDataGenerator(locale)
-        generated_data = generator.generate_bulk(quantity)
+        try:
+            generator = ModularDataGenerator(**generator_options)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        output = iter_export(generator, binary=True, **export_options)
         
-        if format == 'sql':
-            try:
-                from sql.sql_generator import generate_sql
-                sql_content = generate_sql(generated_data, locale, fields)
-                response = make_response(sql_content)
-                response.headers['Content-Disposition'] = f'attachment; filename=generated_data_{locale}.sql'
-                response.headers['Content-type'] = 'application/sql'
-            except Exception as e:
+        # Produce the first piece eagerly so invalid requests still get a JSON error
+        try:
+            first_piece = next(output, b'')
+        except Exception as e:
+            if format != 'csv':
                 return jsonify({'error': f'SQL generation failed: {str(e)}'}), 500
-        else:
-            # Generate CSV
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(fields)
-            for record in generated_data:
-                row = []
-                for field in fields:
-                    row.append(record.get(field, ''))
-                writer.writerow(row)
-            
-            # Prepare CSV response
-            response = make_response(output.getvalue())
-            response.headers['Content-Disposition'] = f'attachment; filename=generated_data_{locale}.csv'
-            response.headers['Content-type'] = 'text/csv'
+            raise
         
+        # Stream the rest while records are generated
+        response = Response(stream_with_context(itertools.chain([first_piece], output)))
+        filename = f'generated_data_{locale}{export_format.extension}'
+        mimetype = export_format.mimetype
+        if file_compression is not None:
+            filename += COMPRESSIONS[file_compression].extension
+            mimetype = COMPRESSIONS[file_compression].mimetype
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        response.headers['Content-type'] = mimetype
+        if transfer_compression is not None:
+            response.headers['Content-Encoding'] = COMPRESSIONS[transfer_compression].encoding
+        if export_format.compressible:
+            response.headers['Vary'] = 'Accept-Encoding'
         return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api.route('/schema')
+def get_schema():
+    """API endpoint returning the default schema: the available columns and the SQL table layout
+
+    Returns:
+        JSON schema document; columns marked selected are included by default
+    """
+    return jsonify(default_schema().to_dict())
+
+@api.route('/metrics')
+def get_metrics():
+    """API endpoint exposing generation metrics in the Prometheus text format"""
+    if not metrics.is_enabled():
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Return the job manager of the web interface, created on first use"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(os.environ.get('DATA_GENERATOR_SPOOL_DIR', DEFAULT_SPOOL_DIR))
+        return _job_manager
+
+@api.route('/jobs', methods=['POST'])
+def create_job():
+    """API endpoint to generate data in the background
+
+    Request body (JSON): the same as /generate
+
+    Returns:
+        202 with the job status (see GET /jobs/<id>); 429 when too many jobs are unfinished
+    """
+    try:
+        generator_options, export_options = _parse_generate_request(request.get_json())
+        generator = ModularDataGenerator(**generator_options)
+        job = get_job_manager().submit_export(generator, **export_options)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response
+
+@api.route('/jobs', methods=['GET'])
+def list_jobs():
+    """API endpoint to list the known jobs, oldest first"""
+    return jsonify([job.to_dict() for job in get_job_manager().list_jobs()])
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """API endpoint to get the status and progress of a job
+
+    Returns:
+        JSON with status ('queued', 'running', 'completed', 'failed' or 'cancelled'),
+        rows_done, total_rows, rows_per_second and eta_seconds
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@api.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """API endpoint to cancel a queued or running job"""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@api.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """API endpoint to download the result of a completed job (supports Range requests)"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != COMPLETED:
+        return jsonify({'error': f'Job is {job.status}', 'status': job.status}), 409
+    return send_file(job.path, mimetype=job.mimetype, as_attachment=True,
+                     download_name=job.filename, conditional=True)
+
+@api.route('/ready')
+def get_readiness():
+    """API endpoint reporting whether every locale is loaded
+
+    Returns:
+        JSON with ready and the warm and cold locales; 503 while locales are still loading
+    """
+    locales = DataLoader(os.path.join(os.path.dirname(__file__), "data")).discover_locales()
+    warm = get_registry().warm_locales()
+    cold = sorted(set(locales) - set(warm))
+    return jsonify({'ready': not cold, 'warm': warm, 'cold': cold}), 200 if not cold else 503
+
+def create_app(preload: bool = True) -> Flask:
+    """Create the Flask application of the web interface
+
+    Args:
+        preload: Load every locale in a background thread, so requests are
+            served at once and the first /generate calls hit a warm cache
+    """
+    app = Flask(__name__, static_folder='.')
+    app.register_blueprint(api)
+    if preload:
+        get_registry().start_preload()
+    return app
+
 if __name__ == "__main__":
+    from cli import add_generate_command
+
     parser = argparse.ArgumentParser(description='Data Generator Application')
     parser.add_argument('--gui', action='store_true', help='Run desktop GUI interface')
+    add_generate_command(parser.add_subparsers(title='commands'))
     args = parser.parse_args()
     
-    if args.gui:
+    if hasattr(args, 'command'):
+        sys.exit(args.command(args))
+    elif args.gui:
+        # Imported here, the web interface runs without tkinter
+        from desktop_gui.app import run_desktop_app
         run_desktop_app()
     else:
-        app.run(host='0.0.0.0', port=5000)
+        create_app().run(host='0.0.0.0', port=5000)
@@ -21,32 +21,45 @@ async function loadLocales() {
     }
 }
 
-// Load locales when page loads
+// Build the field checkboxes from the columns of the schema
+async function loadFields() {
+    try {
+        const response = await fetch('/schema');
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const schema = await response.json();
+
+        const group = document.getElementById('fields');
+        group.innerHTML = '';
+
+        schema.columns.forEach(column => {
+            const label = document.createElement('label');
+            const checkbox = document.createElement('input');
+            checkbox.type = 'checkbox';
+            checkbox.value = column.name;
+            checkbox.checked = Boolean(column.selected);
+            label.appendChild(checkbox);
+            label.append(` ${column.label || column.name}`);
+            group.appendChild(label);
+        });
+    } catch (error) {
+        console.error('Error loading fields:', error);
+    }
+}
+
+// Load locales and fields when page loads
 document.addEventListener('DOMContentLoaded', loadLocales);
+document.addEventListener('DOMContentLoaded', loadFields);
 
 async function generate() {
     const locale = document.getElementById('locale').value;
     const quantity = document.getElementById('quantity').value;
-    const name = document.getElementById('name').checked;
-    const surname = document.getElementById('surname').checked;
-    const id = document.getElementById('id').checked;
-    const birthdate = document.getElementById('birthdate').checked;
-    const street = document.getElementById('street').checked;
-    const city = document.getElementById('city').checked;
-    const country = document.getElementById('country').checked;
-    const postalCode = document.getElementById('postalCode').checked; // Nowy
 
     const format = document.getElementById('format').value;
+    const compress = document.getElementById('compress').checked && format !== 'mysql';
   
-    const fields = [];
-    if (name) fields.push("Name");
-    if (surname) fields.push("Surname");
-    if (id) fields.push("ID");
-    if (birthdate) fields.push("Birth Date");
-    if (street) fields.push("Street");
-    if (city) fields.push("City");
-    if (country) fields.push("Country");
-    if (postalCode) fields.push("Postal Code"); // Dodajemy tylko PNA
+    const fields = Array.from(document.querySelectorAll('#fields input:checked'), checkbox => checkbox.value);
 
     try {
         const response = await fetch('/generate', {
@@ -58,7 +71,8 @@ async function generate() {
                 locale,
                 quantity,
                 fields,
-                format
+                format,
+                ...(compress && { compression: 'gzip' })
             })
         });
 
@@ -70,8 +84,9 @@ async function generate() {
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement('a');
         a.href = url;
-        const extension = format === 'sql' ? '.sql' : '.csv';
-        a.download = `generated_data_${locale}${extension}`;
+        const extensions = { sql: '.sql', pgcopy: '.copy.sql', mysql: '.mysql.zip', sqlite: '.db' };
+        const extension = extensions[format] || '.csv';
+        a.download = `generated_data_${locale}${extension}${compress ? '.gz' : ''}`;
         document.body.appendChild(a);
         a.click();
         document.body.removeChild(a);
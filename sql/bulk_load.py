@@ -0,0 +1,150 @@
+"""Bulk-load exports: PostgreSQL COPY scripts and MySQL LOAD DATA archives
+
+Both use the persons/addresses schema of sql_generator and the tab-separated
+text format shared by COPY and LOAD DATA, where backslash, tab, newline and
+carriage return are escaped with a backslash.
+"""
+import io
+import zipfile
+import itertools
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from generators.record_batch import iter_rows, record_fields
+from generators.schema import Schema
+from .sql_generator import resolve_fields, table_layout, write_schema
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+class _RowTemplate:
+    """Column list and tab-separated row extraction of one table"""
+
+    def __init__(self, table: str, columns: List[Tuple[str, str]]):
+        self.table = table
+        self.fields = [field for field, _ in columns]
+        self.column_list = ", ".join(column for _, column in columns)
+
+    def rows(self, records: Sequence[Dict[str, str]]) -> str:
+        return "".join([
+            "\t".join([str(value).translate(_TEXT_ESCAPES) for value in row]) + "\n"
+            for row in iter_rows(records, self.fields)
+        ])
+
+def _prepare(chunks: Iterable[Sequence[Dict[str, str]]], fields: Optional[List[str]], schema: Optional[Schema]):
+    """Resolve the included fields from the first chunk and build the table templates"""
+    chunks = iter(chunks)
+    first_chunk = next(chunks, [])
+    included_fields = resolve_fields(set(record_fields(first_chunk)), fields)
+    person_columns, address_columns = table_layout(included_fields, schema)
+    templates = []
+    if person_columns:
+        templates.append(_RowTemplate("persons", person_columns))
+    # More than just person_id
+    if len(address_columns) > 1:
+        templates.append(_RowTemplate("addresses", address_columns))
+    return included_fields, templates, itertools.chain([first_chunk], chunks)
+
+def iter_pg_copy(chunks: Iterable[Sequence[Dict[str, str]]], locale: str, fields: List[str] = None,
+                 schema: Optional[Schema] = None) -> Iterator[str]:
+    """Generate a psql script with the schema and COPY ... FROM STDIN blocks
+
+    Args:
+        chunks: Iterable of RecordBatch chunks or record lists
+        locale: Locale code (e.g. 'pl', 'de')
+        fields: List of field names to include (None for all fields)
+        schema: Schema with the table layout (the default schema if None)
+
+    Yields:
+        The CREATE TABLE statements, then one COPY block per table and chunk
+    """
+    included_fields, templates, chunks = _prepare(chunks, fields, schema)
+    output = io.StringIO()
+    write_schema(output, included_fields, schema)
+    yield output.getvalue()
+
+    for data in chunks:
+        if not data:
+            continue
+        output = io.StringIO()
+        for template in templates:
+            output.write(f"COPY {template.table} ({template.column_list}) FROM STDIN;\n")
+            output.write(template.rows(data))
+            output.write("\\.\n")
+        yield output.getvalue()
+
+def _mysql_load_statement(template: _RowTemplate, filename: str) -> str:
+    """Return the LOAD DATA statement reading a tab-separated data file of one table"""
+    return (
+        f"LOAD DATA LOCAL INFILE '{filename}' INTO TABLE {template.table} CHARACTER SET utf8mb4\n"
+        "    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n'\n"
+        f"    ({template.column_list});\n"
+    )
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink collecting the bytes written by ZipFile between drains"""
+
+    def __init__(self):
+        self._pieces = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._pieces.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._pieces)
+        self._pieces.clear()
+        return data
+
+def iter_mysql_load_data(chunks: Iterable[Sequence[Dict[str, str]]], locale: str,
+                         fields: List[str] = None, schema: Optional[Schema] = None) -> Iterator[bytes]:
+    """Generate a ZIP archive for MySQL LOAD DATA, streamed while records are generated
+
+    The archive holds load_data.sql (schema and LOAD DATA statements) and one
+    <table>.tsv data file per table. Load it with
+    ``mysql --local-infile=1 <database> < load_data.sql`` from the extracted directory.
+
+    Args:
+        chunks: Iterable of RecordBatch chunks or record lists
+        locale: Locale code (e.g. 'pl', 'de')
+        fields: List of field names to include (None for all fields)
+        schema: Schema with the table layout (the default schema if None)
+
+    Yields:
+        Pieces of the ZIP archive
+    """
+    included_fields, templates, chunks = _prepare(chunks, fields, schema)
+    script = io.StringIO()
+    write_schema(script, included_fields, schema)
+    for template in templates:
+        script.write(_mysql_load_statement(template, f"{template.table}.tsv"))
+
+    sink = _ZipStream()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    archive.writestr("load_data.sql", script.getvalue())
+    yield sink.drain()
+
+    if templates:
+        # The first table is streamed into the archive, the others are spooled to disk meanwhile
+        spools = [tempfile.TemporaryFile() for _ in templates[1:]]
+        try:
+            with archive.open(f"{templates[0].table}.tsv", "w", force_zip64=True) as data_file:
+                for data in chunks:
+                    data_file.write(templates[0].rows(data).encode("utf-8"))
+                    for template, spool in zip(templates[1:], spools):
+                        spool.write(template.rows(data).encode("utf-8"))
+                    yield sink.drain()
+            for template, spool in zip(templates[1:], spools):
+                spool.seek(0)
+                with archive.open(f"{template.table}.tsv", "w", force_zip64=True) as data_file:
+                    for block in iter(lambda: spool.read(1 << 20), b""):
+                        data_file.write(block)
+                        yield sink.drain()
+                yield sink.drain()
+        finally:
+            for spool in spools:
+                spool.close()
+
+    archive.close()
+    yield sink.drain()
@@ -1,124 +1,167 @@
 import io
-from typing import List, Dict
+import itertools
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from generators.record_batch import iter_rows, record_fields
+from generators.schema import Schema, default_schema
 
-def generate_sql(data: List[Dict[str, str]], locale: str, fields: List[str] = None) -> str:
+DEFAULT_BATCH_SIZE = 1000
+
+class TableKey(NamedTuple):
+    """Key of the persons table, referenced by the addresses rows"""
+    field: str
+    column: str
+    # Column type without the PRIMARY KEY constraint
+    type: str
+
+    @property
+    def reference(self) -> str:
+        return f"person_{self.column}"
+
+def table_key(schema: Optional[Schema] = None) -> TableKey:
+    """Return the key of the persons table: its first column in the schema"""
+    field, column, column_type = (schema or default_schema()).table_columns("persons")[0]
+    return TableKey(field, column, column_type.replace("PRIMARY KEY", "").strip())
+
+def generate_sql(data: Sequence[Dict[str, str]], locale: str, fields: List[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, transaction: bool = False,
+                 schema: Optional[Schema] = None) -> str:
     """Generate SQL output with proper relational structure
-    
+
     Args:
-        data: List of generated records
+        data: RecordBatch or list of generated records
         locale: Locale code (e.g. 'pl', 'de')
         fields: List of field names to include (None for all fields)
-        
+        batch_size: Maximum number of rows per INSERT statement
+        transaction: Wrap all INSERT statements in a single transaction
+        schema: Schema with the table layout (the default schema if None)
+
     Returns:
         SQL string with CREATE TABLE and INSERT statements
     """
-    output = io.StringIO()
-    
+    return "".join(iter_sql([data], locale, fields, batch_size, transaction, schema))
+
+def resolve_fields(all_fields: Set[str], fields: List[str] = None) -> Set[str]:
+    """Match requested field names case-insensitively against the generated ones
+
+    Raises:
+        ValueError: If a requested field is not present in the generated data
+    """
+    if not fields:
+        return set(all_fields)
+    by_lower_name = {field.lower(): field for field in all_fields}
+    included_fields = set()
+    for field in fields:
+        actual_field = by_lower_name.get(field.lower())
+        if actual_field is None:
+            raise ValueError(f"Field '{field}' not found in generated data")
+        included_fields.add(actual_field)
+    return included_fields
+
+def table_layout(included_fields: Set[str],
+                 schema: Optional[Schema] = None) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Return the (field, column) pairs filled in the persons and addresses tables
+
+    The address rows reference their person through person_<key column>
+    when the key field (ID in the default schema) is included.
+    """
+    schema = schema or default_schema()
+    key = table_key(schema)
+    person_columns = [(field, column) for field, column, _ in schema.table_columns("persons")
+                      if field in included_fields]
+    address_columns = [(key.field, key.reference)] if key.field in included_fields else []
+    address_columns += [(field, column) for field, column, _ in schema.table_columns("addresses")
+                        if field in included_fields]
+    return person_columns, address_columns
+
+def write_schema(output: io.StringIO, included_fields: Set[str], schema: Optional[Schema] = None):
+    """Write the CREATE TABLE statements for the included fields"""
+    schema = schema or default_schema()
+    key = table_key(schema)
+    person_definitions = [f"{key.column} {key.type} PRIMARY KEY"]
+    person_definitions += [f"{column} {column_type}" for field, column, column_type
+                           in schema.table_columns("persons")[1:] if field in included_fields]
+    output.write("CREATE TABLE IF NOT EXISTS persons (\n    ")
+    output.write(",\n    ".join(person_definitions))
+    output.write("\n);\n\n")
+
+    address_definitions = [f"{key.reference} {key.type} REFERENCES persons({key.column})"]
+    address_definitions += [f"{column} {column_type}" for field, column, column_type
+                            in schema.table_columns("addresses") if field in included_fields]
+    address_definitions.append(f"PRIMARY KEY ({key.reference})")
+    output.write("CREATE TABLE IF NOT EXISTS addresses (\n    ")
+    output.write(",\n    ".join(address_definitions))
+    output.write("\n);\n\n")
+
+class _InsertTemplate:
+    """Statement prefix and row format of one table, compiled once per export"""
+
+    def __init__(self, table: str, columns: List[Tuple[str, str]]):
+        self.fields = [field for field, _ in columns]
+        self.prefix = f"INSERT INTO {table} ({', '.join(column for _, column in columns)}) VALUES\n"
+        self.row_format = "(" + ", ".join(["'{}'"] * len(columns)) + ")"
+
+    def rows(self, records: Sequence[Dict[str, str]]) -> List[str]:
+        row_format = self.row_format.format
+        return [row_format(*[str(value).replace("'", "''") for value in row])
+                for row in iter_rows(records, self.fields)]
+
+def iter_sql(chunks: Iterable[Sequence[Dict[str, str]]], locale: str, fields: List[str] = None,
+             batch_size: int = DEFAULT_BATCH_SIZE, transaction: bool = False,
+             schema: Optional[Schema] = None) -> Iterator[str]:
+    """Generate SQL output incrementally, one piece per chunk of records
+
+    The available fields are taken from the first chunk, as every chunk
+    of a generator has the same record layout. Rows are written as
+    multi-row INSERT statements of at most batch_size rows.
+
+    Args:
+        chunks: Iterable of RecordBatch chunks or record lists
+        locale: Locale code (e.g. 'pl', 'de')
+        fields: List of field names to include (None for all fields)
+        batch_size: Maximum number of rows per INSERT statement
+        transaction: Wrap all INSERT statements in a single transaction
+        schema: Schema with the table layout (the default schema if None)
+
+    Yields:
+        The CREATE TABLE statements, then the INSERT statements of each chunk
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be positive")
+    chunks = iter(chunks)
+    first_chunk = next(chunks, [])
+
     # Determine which fields to include
-    all_fields = set()
-    for record in data:
-        all_fields.update(record.keys())
-    
-    if fields:
-        # Normalize field names and validate
-        included_fields = set()
-        for field in fields:
-            # Match field names case-insensitively
-            matched = False
-            for actual_field in all_fields:
-                if field.lower() == actual_field.lower():
-                    included_fields.add(actual_field)
-                    matched = True
-                    break
-            if not matched:
-                raise ValueError(f"Field '{field}' not found in generated data")
-    else:
-        included_fields = all_fields
+    included_fields = resolve_fields(set(record_fields(first_chunk)), fields)
 
     # Create tables with only requested fields
-    output.write("CREATE TABLE IF NOT EXISTS persons (\n")
-    output.write("    id VARCHAR(50) PRIMARY KEY,\n")
-    if "Name" in included_fields:
-        output.write("    name VARCHAR(100),\n")
-    if "Surname" in included_fields:
-        output.write("    surname VARCHAR(100),\n")
-    if "Birth Date" in included_fields:
-        output.write("    birth_date DATE\n")
-    output.write(");\n\n")
-    
-    output.write("CREATE TABLE IF NOT EXISTS addresses (\n")
-    output.write("    person_id VARCHAR(50) REFERENCES persons(id),\n")
-    if "Street" in included_fields:
-        output.write("    street VARCHAR(100),\n")
-    if "City" in included_fields:
-        output.write("    city VARCHAR(100),\n")
-    if "Postal Code" in included_fields:
-        output.write("    postal_code VARCHAR(10),\n")
-    if "Country" in included_fields:
-        output.write("    country VARCHAR(100),\n")
-    output.write("    PRIMARY KEY (person_id)\n")
-    output.write(");\n\n")
-    
-    # Debug output showing selected fields
-    #output.write(f"-- Selected fields: {', '.join(sorted(included_fields)) or 'ALL'}\n\n")
-    
-    # Insert data
-    for i, record in enumerate(data, 1):
-        # Debug record number
-        #output.write(f"-- Record {i}\n")
-        
-        # Insert person with selected fields
-        person_fields = []
-        person_values = []
-        for field in included_fields:
-            if field == "ID":
-                person_fields.append("id")
-                person_values.append(f"'{record.get('ID', '')}'")
-            elif field == "Name":
-                person_fields.append("name")
-                person_values.append(f"'{record.get('Name', '')}'")
-            elif field == "Surname":
-                person_fields.append("surname")
-                person_values.append(f"'{record.get('Surname', '')}'")
-            elif field == "Birth Date":
-                person_fields.append("birth_date")
-                person_values.append(f"'{record.get('Birth Date', '')}'")
-        
-        if person_fields:
-            output.write(f"INSERT INTO persons ({', '.join(person_fields)}) VALUES (")
-            output.write(", ".join(person_values))
-            output.write(");\n")
-        else:
-            output.write("-- Skipping persons insert (no selected fields)\n")
-        
-        # Insert address with selected fields
-        address_fields = []
-        address_values = []
-        
-        # Always include person_id if ID is included
-        if "ID" in included_fields:
-            address_fields.append("person_id")
-            address_values.append(f"'{record.get('ID', '')}'")
-            
-        for field in included_fields:
-            if field == "Street":
-                address_fields.append("street")
-                address_values.append(f"'{record.get('Street', '')}'")
-            elif field == "City":
-                address_fields.append("city")
-                address_values.append(f"'{record.get('City', '')}'")
-            elif field == "Postal Code":
-                address_fields.append("postal_code")
-                address_values.append(f"'{record.get('Postal Code', '')}'")
-            elif field == "Country":
-                address_fields.append("country")
-                address_values.append(f"'{record.get('Country', '')}'")
-        
-        if len(address_fields) > 1:  # More than just person_id
-            output.write(f"INSERT INTO addresses ({', '.join(address_fields)}) VALUES (")
-            output.write(", ".join(address_values))
-            output.write(");\n")
-        else:
-            output.write("-- Skipping addresses insert (no selected fields)\n")
-    
-    return output.getvalue()
+    output = io.StringIO()
+    write_schema(output, included_fields, schema)
+    if transaction:
+        output.write("BEGIN;\n")
+    yield output.getvalue()
+
+    # Column order and value extraction are resolved once for the whole export
+    person_columns, address_columns = table_layout(included_fields, schema)
+    person_template = _InsertTemplate("persons", person_columns) if person_columns else None
+    # More than just person_id
+    address_template = _InsertTemplate("addresses", address_columns) if len(address_columns) > 1 else None
+
+    for data in itertools.chain([first_chunk], chunks):
+        output = io.StringIO()
+        for start in range(0, len(data), batch_size):
+            batch = data[start:start + batch_size]
+            _write_insert(output, person_template, batch, "persons")
+            _write_insert(output, address_template, batch, "addresses")
+        yield output.getvalue()
+
+    if transaction:
+        yield "COMMIT;\n"
+
+def _write_insert(output: io.StringIO, template: _InsertTemplate, batch: List[Dict[str, str]], table: str):
+    """Write one multi-row INSERT statement for a batch of records"""
+    if template is None:
+        output.write(f"-- Skipping {table} insert (no selected fields)\n")
+        return
+    output.write(template.prefix)
+    output.write(",\n".join(template.rows(batch)))
+    output.write(";\n")
@@ -0,0 +1,147 @@
+"""Direct SQLite database output
+
+Builds a ready-to-query database file with the persons/addresses tables of
+sql_generator. Rows are bound as parameters of executemany, so values need
+no escaping, and are inserted in large transactions with journaling and
+syncing switched off; the indexes are built once all rows are loaded.
+"""
+import os
+import sqlite3
+import itertools
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+from generators.record_batch import iter_rows, record_fields
+from generators.schema import Schema, default_schema
+from .sql_generator import resolve_fields, table_key, table_layout
+
+# Rows inserted per transaction
+DEFAULT_TRANSACTION_SIZE = 100000
+READ_BLOCK_SIZE = 1 << 20
+
+# Only safe while the database file is being created, a crash leaves a partial file anyway
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+)
+
+def _create_tables(connection: sqlite3.Connection, included_fields: Set[str], schema: Schema, unique_keys: bool):
+    """Create the persons and addresses tables
+
+    With unique keys the tables get the PRIMARY KEY and REFERENCES
+    constraints of sql_generator.write_schema. Random IDs may repeat, so
+    otherwise the keys are plain columns, indexed after loading, and the
+    foreign key is left out: SQLite rejects references to a parent column
+    that is not unique.
+    """
+    key = table_key(schema)
+    if unique_keys:
+        person_definitions = [f"{key.column} {key.type} PRIMARY KEY"]
+        address_definitions = [f"{key.reference} {key.type} REFERENCES persons({key.column})"]
+    else:
+        person_definitions = [f"{key.column} {key.type}"]
+        address_definitions = [f"{key.reference} {key.type}"]
+    person_definitions += [f"{column} {column_type}" for field, column, column_type
+                           in schema.table_columns("persons")[1:] if field in included_fields]
+    address_definitions += [f"{column} {column_type}" for field, column, column_type
+                            in schema.table_columns("addresses") if field in included_fields]
+    if unique_keys:
+        address_definitions.append(f"PRIMARY KEY ({key.reference})")
+    connection.execute(f"CREATE TABLE persons ({', '.join(person_definitions)})")
+    connection.execute(f"CREATE TABLE addresses ({', '.join(address_definitions)})")
+
+def _insert_statement(table: str, columns) -> str:
+    return (f"INSERT INTO {table} ({', '.join(column for _, column in columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})")
+
+def write_sqlite(chunks: Iterable[Sequence[Dict[str, str]]], path: str, locale: str,
+                 fields: List[str] = None, transaction_size: int = DEFAULT_TRANSACTION_SIZE,
+                 schema: Optional[Schema] = None, unique_keys: bool = False) -> str:
+    """Write chunks of records into a new SQLite database file
+
+    Args:
+        chunks: Iterable of RecordBatch chunks or record lists
+        path: Database file to create (an existing file is replaced)
+        locale: Locale code (e.g. 'pl', 'de')
+        fields: List of field names to include (None for all fields)
+        transaction_size: Number of rows inserted per transaction
+        schema: Schema with the table layout (the default schema if None)
+        unique_keys: The key field never repeats (e.g. unique IDs), so the tables get
+            the primary and foreign keys of sql_generator.write_schema
+
+    Returns:
+        Path of the written database
+
+    Raises:
+        ValueError: If a requested field is not present in the generated data
+    """
+    if transaction_size < 1:
+        raise ValueError("Transaction size must be positive")
+    schema = schema or default_schema()
+    chunks = iter(chunks)
+    first_chunk = next(chunks, [])
+    included_fields = resolve_fields(set(record_fields(first_chunk)), fields)
+    person_columns, address_columns = table_layout(included_fields, schema)
+    unique_keys = unique_keys and table_key(schema).field in included_fields
+    if os.path.exists(path):
+        os.remove(path)
+
+    # Transactions are managed explicitly
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.execute(pragma)
+        _create_tables(connection, included_fields, schema, unique_keys)
+        inserts = []
+        if person_columns:
+            inserts.append((_insert_statement("persons", person_columns), [field for field, _ in person_columns]))
+        # More than just person_id
+        if len(address_columns) > 1:
+            inserts.append((_insert_statement("addresses", address_columns), [field for field, _ in address_columns]))
+
+        pending = 0
+        connection.execute("BEGIN")
+        for data in itertools.chain([first_chunk], chunks):
+            for statement, table_fields in inserts:
+                connection.executemany(statement, iter_rows(data, table_fields))
+            pending += len(data)
+            if pending >= transaction_size:
+                connection.execute("COMMIT")
+                connection.execute("BEGIN")
+                pending = 0
+        connection.execute("COMMIT")
+
+        key = table_key(schema)
+        if key.field in included_fields and not unique_keys:
+            # Primary keys are indexed already
+            connection.execute(f"CREATE INDEX persons_{key.column} ON persons ({key.column})")
+            connection.execute(f"CREATE INDEX addresses_{key.reference} ON addresses ({key.reference})")
+        connection.execute("ANALYZE")
+        # Leave a database that opens with default settings
+        connection.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        connection.close()
+    return path
+
+def iter_sqlite(chunks: Iterable[Sequence[Dict[str, str]]], locale: str, fields: List[str] = None,
+                transaction_size: int = DEFAULT_TRANSACTION_SIZE, temp_dir: Optional[str] = None,
+                schema: Optional[Schema] = None, unique_keys: bool = False) -> Iterator[bytes]:
+    """Build a SQLite database in a temporary file and stream its contents
+
+    The database is only readable once complete, so nothing is yielded
+    until every chunk has been inserted.
+
+    Yields:
+        Blocks of the database file
+    """
+    fd, path = tempfile.mkstemp(suffix=".db", dir=temp_dir)
+    os.close(fd)
+    try:
+        write_sqlite(chunks, path, locale, fields, transaction_size, schema, unique_keys)
+        with open(path, "rb") as database:
+            for block in iter(lambda: database.read(READ_BLOCK_SIZE), b""):
+                yield block
+    finally:
+        os.remove(path)
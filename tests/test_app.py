@@ -0,0 +1,33 @@
+import os
+import sys
+import subprocess
+from generators.dataset_registry import get_registry
+
+def test_web_interface_does_not_import_the_gui():
+    code = "import sys; sys.modules['tkinter'] = None; import main; main.create_app(preload=False); " \
+           "assert 'desktop_gui.app' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def test_readiness_reports_warm_locales():
+    from main import create_app
+    client = create_app(preload=False).test_client()
+    registry = get_registry()
+    registry.invalidate()
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert {'pl', 'de'} <= set(response.get_json()['cold'])
+
+    registry.preload()
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
+    assert {'pl', 'de'} <= set(response.get_json()['warm'])
+
+def test_generation_error_returns_json_before_streaming():
+    from main import create_app
+    client = create_app(preload=False).test_client()
+
+    response = client.post('/generate', json={'locale': 'xx', 'quantity': 3, 'fields': ['Name'], 'format': 'csv'})
+    assert response.status_code == 500
+    assert 'error' in response.get_json()
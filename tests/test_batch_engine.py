@@ -0,0 +1,84 @@
+import random
+import pytest
+from generators import vectorized
+from generators.dataset_registry import DatasetRegistry
+from generators.modular_generator import ModularDataGenerator
+
+def _make_generator(tmp_path, locale):
+    locale_path = tmp_path / locale
+    locale_path.mkdir()
+    files = {
+        "ImionaMeskie.txt": "Jan\nPiotr\n",
+        "ImionaZenskie.txt": "Anna\nMaria\n",
+        "NazwiskaMeskie.txt": "Kowalski\nNowicki\n",
+        "NazwiskaZenskie.txt": "Kowalska\nNowicka\n",
+        "Nazwiska.txt": "Müller\nSchmidt\n",
+        "streets.txt": "Bracka\n",
+        "cities.txt": "Kraków\n",
+        "countries.txt": "Polska\n",
+    }
+    for filename, content in files.items():
+        (locale_path / filename).write_text(content, encoding="utf-8")
+    return ModularDataGenerator(locale, registry=DatasetRegistry(str(tmp_path)))
+
+def _use_numpy(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(vectorized, "numpy", None)
+    elif vectorized.numpy is None:
+        pytest.skip("NumPy is not installed")
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_columns_match_record_fields(tmp_path, monkeypatch, use_numpy):
+    _use_numpy(monkeypatch, use_numpy)
+    generator = _make_generator(tmp_path, "pl")
+    columns = generator.generate_columns(50)
+
+    assert list(columns) == list(generator.generate_record()), "Columns should follow generate_record field order"
+    assert all(len(values) == 50 for values in columns.values())
+    assert all(street.startswith("Bracka ") for street in columns["Street"])
+    assert all(1 <= int(street.split()[-1]) <= 150 for street in columns["Street"])
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_polish_surnames_match_gender(tmp_path, monkeypatch, use_numpy):
+    _use_numpy(monkeypatch, use_numpy)
+    generator = _make_generator(tmp_path, "pl")
+    columns = generator.generate_columns(200)
+
+    assert {"Anna", "Jan"} <= set(columns["Name"])
+    for name, surname, id_number in zip(columns["Name"], columns["Surname"], columns["ID"]):
+        assert int(id_number[9]) % 2 == (0 if name in ("Anna", "Maria") else 1), "IDs should follow the name gender"
+        if name in ("Anna", "Maria"):
+            assert surname in ("Kowalska", "Nowicka"), "Female names should get female surnames"
+        else:
+            assert surname in ("Kowalski", "Nowicki"), "Male names should get male surnames"
+
+def test_german_uses_shared_surnames(tmp_path):
+    generator = _make_generator(tmp_path, "de")
+    columns = generator.generate_columns(100)
+
+    assert set(columns["Surname"]) <= {"Müller", "Schmidt"}
+    assert all(len(id_number) >= 10 and id_number.isdigit() for id_number in columns["ID"])
+
+def test_generate_bulk_returns_records(tmp_path):
+    generator = _make_generator(tmp_path, "pl")
+    records = generator.generate_bulk(10)
+
+    assert len(records) == 10
+    assert all(set(record) == set(records[0]) for record in records)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_columns_are_reproducible_with_seeded_rng(tmp_path, monkeypatch, use_numpy):
+    _use_numpy(monkeypatch, use_numpy)
+    generator = _make_generator(tmp_path, "de")
+    first = generator.batch_engine.generate_columns(20, random.Random(7))
+    second = generator.batch_engine.generate_columns(20, random.Random(7))
+
+    assert first["Name"] == second["Name"]
+    assert first["Surname"] == second["Surname"]
+    assert first["ID"] == second["ID"]
+
+def test_generate_record_skips_unrequested_fields(tmp_path):
+    generator = _make_generator(tmp_path, "pl")
+
+    assert list(generator.generate_record(fields=["surname", "City"])) == ["Surname", "City"]
+    assert list(generator.generate_record(fields=["Birth Date"])) == ["ID", "Birth Date"]
@@ -0,0 +1,28 @@
+from benchmarks.run import Benchmark, compare, load_baseline, measure, save_baseline
+
+def test_measure_reports_rate_and_memory():
+    result = measure(Benchmark("list", 1000, lambda: lambda: list(range(1000))), repeat=2)
+
+    assert result["records"] == 1000
+    assert result["records_per_sec"] > 0
+    assert result["peak_memory_bytes"] > 0
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = {"a": {"records_per_sec": 1000, "peak_memory_bytes": 100},
+                "b": {"records_per_sec": 1000, "peak_memory_bytes": 100}}
+    results = {"a": {"records_per_sec": 900, "peak_memory_bytes": 110},
+               "b": {"records_per_sec": 700, "peak_memory_bytes": 200},
+               "new": {"records_per_sec": 1}}
+
+    regressions = compare(results, baseline, threshold=0.25)
+
+    assert len(regressions) == 2
+    assert all(regression.startswith("b:") for regression in regressions)
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    results = {"a": {"records": 10, "seconds": 0.5, "records_per_sec": 20.0}}
+
+    assert load_baseline(path) is None
+    save_baseline(path, results)
+    assert load_baseline(path) == results
@@ -0,0 +1,35 @@
+import io
+import zipfile
+from sql.bulk_load import iter_mysql_load_data, iter_pg_copy
+
+RECORDS = [
+    {"ID": "1", "Name": "Jan", "Surname": "D'Arc\\x", "City": "Kraków\tNowa Huta"},
+    {"ID": "2", "Name": "Anna", "Surname": "Nowak", "City": "Gdańsk\nOliwa"},
+]
+FIELDS = ["ID", "Name", "Surname", "City"]
+
+def test_pg_copy_blocks_are_escaped():
+    script = "".join(iter_pg_copy([RECORDS[:1], RECORDS[1:]], "pl", FIELDS))
+
+    assert script.count("COPY persons (id, name, surname) FROM STDIN;\n") == 2, "One block per chunk expected"
+    assert script.count("COPY addresses (person_id, city) FROM STDIN;\n") == 2
+    assert script.count("\\.\n") == 4
+    assert "1\tJan\tD'Arc\\\\x\n" in script
+    assert "1\tKraków\\tNowa Huta\n" in script
+    assert "2\tGdańsk\\nOliwa\n" in script
+
+def test_mysql_archive_contains_script_and_data_files():
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_mysql_load_data([RECORDS[:1], RECORDS[1:]], "pl", FIELDS))))
+
+    assert archive.namelist() == ["load_data.sql", "persons.tsv", "addresses.tsv"]
+    script = archive.read("load_data.sql").decode("utf-8")
+    assert "CREATE TABLE IF NOT EXISTS persons" in script
+    assert "LOAD DATA LOCAL INFILE 'persons.tsv' INTO TABLE persons" in script
+    assert "(person_id, city);" in script
+    assert archive.read("persons.tsv").decode("utf-8") == "1\tJan\tD'Arc\\\\x\n2\tAnna\tNowak\n"
+    assert archive.read("addresses.tsv").decode("utf-8") == "1\tKraków\\tNowa Huta\n2\tGdańsk\\nOliwa\n"
+
+def test_mysql_archive_without_address_fields():
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_mysql_load_data([RECORDS], "pl", ["ID", "Name"]))))
+
+    assert archive.namelist() == ["load_data.sql", "persons.tsv"]
@@ -0,0 +1,52 @@
+import os
+import sys
+import gzip
+import argparse
+import subprocess
+import pytest
+from cli import add_generate_command
+from generators.exporters import iter_export
+from generators.modular_generator import ModularDataGenerator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIELDS = ["Name", "Surname", "ID", "City"]
+
+def run(argv):
+    parser = argparse.ArgumentParser()
+    add_generate_command(parser.add_subparsers())
+    args = parser.parse_args(argv)
+    return args.command(args)
+
+def test_seeded_output_matches_iter_export(tmp_path):
+    path = tmp_path / "out.csv"
+    assert run(["generate", "--locale", "de", "--count", "2500", "--fields", ",".join(FIELDS),
+                "--seed", "11", "--chunk-size", "1000", "--out", str(path), "-q"]) == 0
+
+    expected = "".join(iter_export(ModularDataGenerator("de", fields=FIELDS), 2500, FIELDS, 'csv',
+                                   chunk_size=1000, seed=11))
+    assert path.read_bytes() == expected.encode("utf-8")
+
+def test_compression_is_taken_from_the_file_name(tmp_path):
+    path = tmp_path / "out.sql.gz"
+    assert run(["generate", "--count", "100", "--format", "sql", "--out", str(path), "-q"]) == 0
+    assert b"INSERT INTO persons" in gzip.decompress(path.read_bytes())
+
+@pytest.mark.parametrize("argv", [
+    ["--count", "0"],
+    ["--count", "10", "--fields", "Name,Shoe Size"],
+    ["--count", "10", "--locale", "xx"],
+    ["--count", "10", "--offset", "5"],
+    ["--count", "10", "--format", "mysql", "--out", "out.mysql.zip.gz"],
+])
+def test_invalid_options_exit_with_usage_error(argv):
+    with pytest.raises(SystemExit) as error:
+        run(["generate"] + argv)
+    assert error.value.code == 2
+
+def test_stdout_and_summary():
+    result = subprocess.run([sys.executable, "main.py", "generate", "--count", "20", "--fields", "Name,City"],
+                            cwd=ROOT, capture_output=True, check=True)
+    lines = result.stdout.decode("utf-8").splitlines()
+    assert lines[0] == "Name,City"
+    assert len(lines) == 21
+    assert "records/s" in result.stderr.decode("utf-8")
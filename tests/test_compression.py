@@ -0,0 +1,71 @@
+import gzip
+import pytest
+from generators import compression
+from generators.compression import iter_compressed, negotiate, open_text
+from generators.exporters import iter_export
+from generators.modular_generator import ModularDataGenerator
+
+FIELDS = ["ID", "Name", "Surname", "City"]
+
+def test_gzip_round_trip():
+    pieces = ["naïve,", b"bytes,", "x" * 100000]
+    blocks = list(iter_compressed(pieces, 'gzip'))
+    assert gzip.decompress(b"".join(blocks)) == "".join(["naïve,", "bytes,", "x" * 100000]).encode("utf-8")
+
+def test_negotiate():
+    assert negotiate(None) is None
+    assert negotiate("br") is None
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("gzip, deflate") == 'gzip'
+    assert negotiate("*") in compression.available_compressions()
+
+def test_unavailable_compression_is_rejected(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    with pytest.raises(ValueError):
+        iter_compressed([], 'zstd')
+    with pytest.raises(ValueError):
+        iter_compressed([], 'lzma')
+    assert negotiate("zstd, gzip;q=0.5") == 'gzip'
+
+@pytest.mark.parametrize("format", ['csv', 'sql'])
+def test_compressed_export_matches_plain_export(format):
+    generator = ModularDataGenerator("pl", fields=FIELDS)
+    plain = "".join(iter_export(generator, 2500, FIELDS, format, chunk_size=1000, seed=7))
+    compressed = b"".join(iter_export(generator, 2500, FIELDS, format, chunk_size=1000, seed=7, compression='gzip'))
+    assert gzip.decompress(compressed).decode("utf-8") == plain
+
+def test_to_csv_compresses_by_extension(tmp_path):
+    generator = ModularDataGenerator("de", fields=FIELDS)
+    data = generator.generate_bulk(10)
+    generator.to_csv(data, str(tmp_path / "plain.csv"))
+    generator.to_csv(data, str(tmp_path / "packed.csv.gz"))
+    assert gzip.decompress((tmp_path / "packed.csv.gz").read_bytes()) == (tmp_path / "plain.csv").read_bytes()
+
+def test_open_text_writes_gzip(tmp_path):
+    path = str(tmp_path / "out.sql.gz")
+    with open_text(path, 'gzip') as f:
+        f.write("INSERT INTO persons VALUES ('Łódź');\n")
+    assert gzip.open(path, "rt", encoding="utf-8").read() == "INSERT INTO persons VALUES ('Łódź');\n"
+
+def test_generate_endpoint_compression():
+    from main import create_app
+    client = create_app(preload=False).test_client()
+    body = {'locale': 'pl', 'quantity': 20, 'fields': FIELDS, 'format': 'csv'}
+
+    response = client.post('/generate', json=body, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(gzip.decompress(response.get_data()).decode("utf-8").splitlines()) == 21
+
+    response = client.post('/generate', json=dict(body, compression='gzip'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.mimetype == 'application/gzip'
+    assert 'generated_data_pl.csv.gz' in response.headers['Content-Disposition']
+    gzip.decompress(response.get_data())
+
+    assert client.post('/generate', json=dict(body, compression='lzma')).status_code == 400
+
+def test_already_compressed_format_is_rejected():
+    generator = ModularDataGenerator("pl", fields=FIELDS)
+    with pytest.raises(ValueError):
+        iter_export(generator, 10, FIELDS, 'mysql', compression='gzip')
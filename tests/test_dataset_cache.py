@@ -0,0 +1,81 @@
+import os
+import json
+from generators.data_loader import DataLoader
+from generators import dataset_cache
+from generators.dataset_cache import PackedStringList, load_cache
+
+def _write_locale(base_path, locale="xx"):
+    locale_path = base_path / locale
+    locale_path.mkdir()
+    (locale_path / "NazwiskaMeskie.txt").write_text("Nowak\nWiśniewski\n\n  Wójcik  \n", encoding="utf-8")
+    (locale_path / "countries.txt").write_text("Polska\n", encoding="utf-8")
+    return locale_path
+
+def _touch(path, seconds=1):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+def test_compiled_cache_matches_text_loading(tmp_path):
+    _write_locale(tmp_path)
+    loader = DataLoader(str(tmp_path))
+    text_data = DataLoader(str(tmp_path), use_cache=False).discover_data_types("xx")
+
+    loader.compile_cache("xx")
+    cached_data = loader.discover_data_types("xx")
+
+    for data_type, values in text_data.items():
+        assert list(cached_data[data_type]) == values
+
+    packed_data = load_cache(str(tmp_path / "xx"), eager_limit=0)
+    surnames = packed_data["NazwiskaMeskie"]
+    assert isinstance(surnames, PackedStringList), "Large data types should stay memory-mapped"
+    assert list(surnames) == text_data["NazwiskaMeskie"]
+    assert surnames[-1] == "Wójcik"
+    assert surnames[0:2] == ["Nowak", "Wiśniewski"]
+    assert surnames.take([2, 0, 2]) == ["Wójcik", "Nowak", "Wójcik"]
+
+def test_stale_cache_falls_back_to_text(tmp_path):
+    locale_path = _write_locale(tmp_path)
+    loader = DataLoader(str(tmp_path))
+    loader.compile_cache("xx")
+
+    (locale_path / "countries.txt").write_text("Niemcy\n", encoding="utf-8")
+    _touch(locale_path / "countries.txt")
+
+    assert load_cache(str(locale_path)) is None, "Modified sources should invalidate the cache"
+    assert loader.discover_data_types("xx")["countries"] == ["Niemcy"]
+
+def test_touched_sources_keep_cache_valid(tmp_path):
+    locale_path = _write_locale(tmp_path)
+    DataLoader(str(tmp_path)).compile_cache("xx")
+
+    _touch(locale_path / "countries.txt")
+
+    assert load_cache(str(locale_path)) is not None, "Unchanged content should pass the checksum check"
+
+def test_checksum_match_refreshes_the_signature(tmp_path, monkeypatch):
+    locale_path = _write_locale(tmp_path)
+    DataLoader(str(tmp_path)).compile_cache("xx")
+    _touch(locale_path / "countries.txt")
+    assert list(load_cache(str(locale_path))["countries"]) == ["Polska"]
+
+    def fail(path):
+        raise AssertionError("The refreshed signature should make the checksum unnecessary")
+    monkeypatch.setattr(dataset_cache, "source_checksum", fail)
+    data = load_cache(str(locale_path))
+    assert list(data["countries"]) == ["Polska"]
+    assert list(data["NazwiskaMeskie"]) == ["Nowak", "Wiśniewski", "Wójcik"]
+
+def test_incomplete_manifest_is_treated_as_stale(tmp_path):
+    locale_path = _write_locale(tmp_path)
+    DataLoader(str(tmp_path)).compile_cache("xx")
+    cache_path = locale_path / dataset_cache.CACHE_FILENAME
+    content = cache_path.read_bytes()
+    magic, manifest_len = dataset_cache._HEADER.unpack_from(content, 0)
+    manifest = json.loads(content[dataset_cache._HEADER.size:dataset_cache._HEADER.size + manifest_len])
+    del manifest["checksum"]
+    encoded = json.dumps(manifest).encode("utf-8")
+    cache_path.write_bytes(dataset_cache._HEADER.pack(magic, len(encoded)) + encoded)
+
+    assert load_cache(str(locale_path)) is None
+    assert DataLoader(str(tmp_path)).discover_data_types("xx")["countries"] == ["Polska"]
@@ -0,0 +1,102 @@
+import os
+import threading
+from generators.dataset_registry import DatasetRegistry
+from generators.modular_generator import ModularDataGenerator
+
+def _write_locale(base_path, locale="xx"):
+    locale_path = base_path / locale
+    locale_path.mkdir()
+    (locale_path / "ImionaMeskie.txt").write_text("Jan\nPiotr\n", encoding="utf-8")
+    (locale_path / "ImionaZenskie.txt").write_text("Anna\n", encoding="utf-8")
+    return locale_path
+
+def test_registry_loads_locale_once(tmp_path):
+    _write_locale(tmp_path)
+    registry = DatasetRegistry(str(tmp_path))
+
+    first = registry.get_data_types("xx")
+    second = registry.get_data_types("xx")
+
+    assert first is second, "Cached data types should be reused"
+    assert first["ImionaMeskie"] == ["Jan", "Piotr"]
+    assert registry.stats()["misses"] == 1
+    assert registry.stats()["hits"] == 1
+
+def test_registry_reloads_changed_file(tmp_path):
+    locale_path = _write_locale(tmp_path)
+    registry = DatasetRegistry(str(tmp_path))
+    registry.get_data_types("xx")
+
+    names_file = locale_path / "ImionaMeskie.txt"
+    names_file.write_text("Jan\nPiotr\nAdam\n", encoding="utf-8")
+    stat = names_file.stat()
+    os.utime(names_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert registry.get_data_types("xx")["ImionaMeskie"] == ["Jan", "Piotr", "Adam"]
+    assert registry.stats()["misses"] == 2
+
+def test_registry_concurrent_access_loads_once(tmp_path):
+    _write_locale(tmp_path)
+    registry = DatasetRegistry(str(tmp_path))
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(registry.get_data_types("xx"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result is results[0] for result in results)
+    assert registry.stats()["misses"] == 1
+
+def test_registry_preload(tmp_path):
+    _write_locale(tmp_path, "xx")
+    _write_locale(tmp_path, "yy")
+    registry = DatasetRegistry(str(tmp_path))
+
+    registry.preload()
+
+    assert registry.stats()["locales"] == ["xx", "yy"]
+    assert sorted(registry.get_data_types("xx").loaded()) == ["ImionaMeskie", "ImionaZenskie"]
+
+def test_data_types_load_on_first_access(tmp_path):
+    _write_locale(tmp_path)
+    data_types = DatasetRegistry(str(tmp_path)).get_data_types("xx")
+
+    assert "ImionaMeskie" in data_types and "Nope" not in data_types
+    assert data_types.loaded() == [], "Discovery should not read the files"
+    assert data_types["ImionaZenskie"] == ["Anna"]
+    assert data_types.loaded() == ["ImionaZenskie"]
+
+def test_generator_loads_only_requested_fields(tmp_path):
+    _write_locale(tmp_path, "pl")
+    generator = ModularDataGenerator("pl", registry=DatasetRegistry(str(tmp_path)), fields=["id", "birth date"])
+
+    batch = generator.generate_bulk(5)
+    assert batch.fields == ["ID", "Birth Date"]
+    assert generator.data_types.loaded() == []
+
+def test_generators_share_registry(tmp_path):
+    _write_locale(tmp_path)
+    registry = DatasetRegistry(str(tmp_path))
+
+    first = ModularDataGenerator("xx", registry=registry)
+    second = ModularDataGenerator("xx", registry=registry)
+
+    assert first.data_types is second.data_types
+
+def test_background_preload_marks_locales_warm(tmp_path):
+    locale_path = _write_locale(tmp_path)
+    registry = DatasetRegistry(str(tmp_path))
+    registry.get_data_types("xx")
+
+    assert registry.warm_locales() == [], "Discovered but unloaded locales are not warm"
+    registry.start_preload().join(10)
+    assert registry.warm_locales() == ["xx"]
+
+    names_file = locale_path / "ImionaMeskie.txt"
+    names_file.write_text("Jan\n", encoding="utf-8")
+    stat = names_file.stat()
+    os.utime(names_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    registry.get_data_types("xx")
+    assert registry.warm_locales() == [], "Reloaded locales are cold until loaded again"
@@ -0,0 +1,48 @@
+import csv
+import gzip
+import sqlite3
+from desktop_gui.export_worker import ExportWorker
+from generators.modular_generator import ModularDataGenerator
+
+FIELDS = ["ID", "Name", "Surname", "City"]
+
+def test_csv_is_written_chunk_by_chunk(tmp_path):
+    path = str(tmp_path / "out.csv")
+    worker = ExportWorker(ModularDataGenerator("pl", fields=FIELDS), 2500, FIELDS, 'csv', path, chunk_size=1000).start()
+    worker.join()
+
+    assert worker.finished and worker.error is None
+    assert worker.records == 2500
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == FIELDS
+    assert len(rows) == 2501
+
+def test_compressed_and_sqlite_outputs(tmp_path):
+    generator = ModularDataGenerator("de", fields=FIELDS)
+    sql_path = str(tmp_path / "out.sql.gz")
+    db_path = str(tmp_path / "out.db")
+    ExportWorker(generator, 300, FIELDS, 'sql', sql_path, compression='gzip', chunk_size=100).start().join()
+    ExportWorker(generator, 300, FIELDS, 'sqlite', db_path, chunk_size=100).start().join()
+
+    assert gzip.open(sql_path, "rt", encoding="utf-8").read().count("INSERT INTO persons") >= 1
+    with sqlite3.connect(db_path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM persons").fetchone() == (300,)
+
+def test_cancel_removes_the_partial_file(tmp_path):
+    path = tmp_path / "out.csv"
+    worker = ExportWorker(ModularDataGenerator("pl", fields=FIELDS), 5000000, FIELDS, 'csv', str(path), chunk_size=1000)
+    worker.start()
+    worker.cancel()
+    worker.join()
+
+    assert worker.finished and worker.cancelled
+    assert worker.records < 5000000
+    assert not path.exists()
+
+def test_failure_is_reported(tmp_path):
+    path = str(tmp_path / "missing" / "out.csv")
+    worker = ExportWorker(ModularDataGenerator("pl", fields=FIELDS), 10, FIELDS, 'csv', path).start()
+    worker.join()
+    assert worker.finished and not worker.cancelled
+    assert isinstance(worker.error, OSError)
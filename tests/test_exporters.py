@@ -0,0 +1,36 @@
+import csv
+import io
+import pytest
+from generators.exporters import iter_csv, iter_export
+from generators.modular_generator import ModularDataGenerator
+from sql.sql_generator import generate_sql, iter_sql
+
+RECORDS = [
+    {"Name": "Jan", "Surname": "Kowalski", "ID": "1", "Birth Date": "2000-01-01", "City": "Kraków"},
+    {"Name": "Anna", "Surname": "Nowak", "ID": "2", "Birth Date": "1999-12-31", "City": "Gdańsk, Oliwa"},
+]
+
+def test_iter_csv_streams_header_with_first_chunk():
+    pieces = list(iter_csv([RECORDS[:1], RECORDS[1:]], ["Name", "City"]))
+
+    assert len(pieces) == 2, "One piece per chunk, the header in the first one, expected"
+    rows = list(csv.reader(io.StringIO("".join(pieces))))
+    assert rows == [["Name", "City"], ["Jan", "Kraków"], ["Anna", "Gdańsk, Oliwa"]]
+    assert list(iter_csv([], ["Name", "City"])) == ["Name,City\r\n"]
+
+def test_iter_sql_matches_generate_sql():
+    fields = ["ID", "Name", "City"]
+    streamed = "".join(iter_sql([RECORDS[:1], RECORDS[1:]], "pl", fields, batch_size=1))
+
+    assert streamed == generate_sql(RECORDS, "pl", fields, batch_size=1)
+
+def test_iter_sql_rejects_unknown_field():
+    with pytest.raises(ValueError, match="Field 'Nope' not found"):
+        next(iter_sql([RECORDS], "pl", ["Nope"]))
+
+def test_iter_export_generates_in_chunks():
+    generator = ModularDataGenerator("pl")
+    pieces = list(iter_export(generator, 25, ["Name", "ID"], "csv", chunk_size=10))
+
+    assert len(pieces) == 3, "Three chunks of at most 10 records expected"
+    assert len("".join(pieces).splitlines()) == 26
@@ -0,0 +1,124 @@
+import random
+import pytest
+from datetime import date
+from generators import vectorized
+from generators.id_generators import pesel_de, pesel_pl
+from generators.modular_generator import ModularDataGenerator
+
+class _FixedRandom:
+    """Stands in for the random module so the scalar generators reproduce a given ID"""
+
+    def __init__(self, values, gender_digit=None):
+        self.values = list(values)
+        self.gender_digit = gender_digit
+
+    def randint(self, a, b):
+        value = self.values.pop(0)
+        assert a <= value <= b
+        return value
+
+    def choice(self, seq):
+        assert self.gender_digit in seq
+        return self.gender_digit
+
+def _use_numpy(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(vectorized, "numpy", None)
+    elif vectorized.numpy is None:
+        pytest.skip("NumPy is not installed")
+
+def _split_date(birth_date):
+    year, month, day = birth_date.split("-")
+    return int(year), int(month), int(day)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("gender_mask", [None, [True, False] * 250])
+def test_pesel_batch_matches_scalar(monkeypatch, gender_mask, use_numpy):
+    _use_numpy(monkeypatch, use_numpy)
+    pesels, birth_dates = pesel_pl.generate_id_numbers(500, gender_mask=gender_mask, rng=random.Random(1))
+
+    assert len(pesels) == len(birth_dates) == 500
+    for i, (pesel, birth_date) in enumerate(zip(pesels, birth_dates)):
+        gender_digit = int(pesel[9])
+        if gender_mask is None:
+            gender = None
+            monkeypatch.setattr(pesel_pl, "random", _FixedRandom([int(pesel[6:9]), gender_digit]))
+        else:
+            gender = "K" if gender_mask[i] else "M"
+            assert gender_digit % 2 == (0 if gender_mask[i] else 1), "Gender digit should follow the mask"
+            monkeypatch.setattr(pesel_pl, "random", _FixedRandom([int(pesel[6:9])], gender_digit))
+        expected = pesel_pl.generate_pesel(*_split_date(birth_date), gender)
+        assert (pesel, birth_date) == expected
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_german_id_batch_matches_scalar(monkeypatch, use_numpy):
+    _use_numpy(monkeypatch, use_numpy)
+    # Enough IDs for random parts shorter than nine digits
+    id_numbers, birth_dates = pesel_de.generate_id_numbers(2000, rng=random.Random(2))
+    assert len({len(id_number) for id_number in id_numbers}) > 1
+
+    for id_number, birth_date in zip(id_numbers, birth_dates):
+        monkeypatch.setattr(pesel_de, "random", _FixedRandom([int(id_number[6:-1])]))
+        expected = pesel_de.generate_id_number(*_split_date(birth_date))
+        assert (id_number, birth_date) == expected
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_covers_whole_date_range(monkeypatch, use_numpy):
+    _use_numpy(monkeypatch, use_numpy)
+    _, birth_dates = pesel_pl.generate_id_numbers(5000, rng=random.Random(3))
+    years = [_split_date(birth_date)[0] for birth_date in birth_dates]
+
+    assert 1800 <= min(years) < 1850
+    assert 2250 < max(years) <= 2299
+
+def _pesel_is_valid(pesel):
+    weights = [1, 3, 7, 9, 1, 3, 7, 9, 1, 3]
+    return (10 - sum(int(d) * w for d, w in zip(pesel, weights)) % 10) % 10 == int(pesel[10])
+
+def test_unique_pesels_are_distinct_and_valid():
+    space = pesel_pl.UniqueIdSpace(key=11)
+    gender_mask = [i % 3 == 0 for i in range(20000)]
+    pesels, birth_dates = space.id_numbers(0, 20000, gender_mask)
+
+    assert len(set(pesels)) == 20000
+    assert all(_pesel_is_valid(pesel) for pesel in pesels)
+    assert all(int(pesel[9]) % 2 == (0 if is_female else 1) for pesel, is_female in zip(pesels, gender_mask))
+    for pesel, birth_date in zip(pesels[:500], birth_dates[:500]):
+        assert pesel_pl.generate_pesel(*_split_date(birth_date), "M")[0][:6] == pesel[:6]
+
+def test_unique_ids_exhaust_a_small_date_range():
+    start = end = date(2000, 2, 29)
+    space = pesel_pl.UniqueIdSpace(key=3, start=start, end=end)
+
+    assert space.capacity == pesel_pl.capacity(start, end) == 5000
+    pesels, birth_dates = space.id_numbers(0, 5000, [False] * 5000)
+    assert len(set(pesels)) == 5000
+    assert set(birth_dates) == {"2000-02-29"}
+    with pytest.raises(ValueError):
+        space.id_numbers(4999, 5001)
+
+def test_unique_german_ids_across_centuries():
+    space = pesel_de.UniqueIdSpace(key=4, start=date(1999, 12, 31), end=date(2000, 1, 1))
+    id_numbers, birth_dates = space.id_numbers(0, 20000)
+
+    assert len(set(id_numbers)) == 20000
+    assert set(birth_dates) == {"1999-12-31", "2000-01-01"}
+    assert all(sum(int(d) for d in id_number[:-1]) % 10 == int(id_number[-1]) for id_number in id_numbers)
+
+def test_generator_unique_ids_are_positional():
+    generator = ModularDataGenerator("pl", fields=["ID"], unique_ids=True)
+    unseeded = generator.generate_bulk(3000).column("ID")
+    seeded = generator.generate_bulk(3000, seed=8).column("ID")
+
+    assert len(set(unseeded) | set(generator.generate_bulk(3000).column("ID"))) == 6000
+    assert len(set(seeded)) == 3000
+    assert list(generator.generate_bulk(10, seed=8, offset=2500).column("ID")) == list(seeded[2500:2510])
+
+def test_generate_record_id_matches_name_gender():
+    generator = ModularDataGenerator("pl", fields=["Name", "ID"])
+    female_names = set(generator.data_types["ImionaZenskie"])
+    male_names = set(generator.data_types["ImionaMeskie"])
+    for _ in range(200):
+        record = generator.generate_record()
+        if record["Name"] in female_names ^ male_names:
+            assert int(record["ID"][9]) % 2 == (0 if record["Name"] in female_names else 1)
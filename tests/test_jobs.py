@@ -0,0 +1,112 @@
+import os
+import sys
+import subprocess
+import threading
+import pytest
+from generators.jobs import CANCELLED, COMPLETED, JobManager, JobQueueFull
+from generators.modular_generator import ModularDataGenerator
+
+FIELDS = ["Name", "Surname"]
+
+def _make_manager(tmp_path, **options):
+    return JobManager(spool_dir=str(tmp_path / "spool"), **options)
+
+def test_job_writes_result_file(tmp_path):
+    manager = _make_manager(tmp_path)
+    job = manager.submit_export(ModularDataGenerator("pl", fields=FIELDS), 2500, FIELDS, seed=1)
+    job.wait(30)
+
+    assert job.status == COMPLETED
+    assert job.rows_done == 2500
+    with open(job.path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "Name,Surname"
+    assert len(lines) == 2501
+    assert not os.path.exists(job.path + ".part")
+    manager.shutdown()
+
+def test_cancel_queued_job(tmp_path):
+    manager = _make_manager(tmp_path, max_workers=1)
+    release = threading.Event()
+    blocker = manager._executor.submit(release.wait)
+    job = manager.submit_export(ModularDataGenerator("pl", fields=FIELDS), 10, FIELDS)
+
+    manager.cancel(job.id)
+    release.set()
+    blocker.result(10)
+
+    assert job.status == CANCELLED
+    assert not os.path.exists(job.path)
+    manager.shutdown()
+
+def test_pending_jobs_are_bounded(tmp_path):
+    manager = _make_manager(tmp_path, max_workers=1, max_pending=1)
+    release = threading.Event()
+    manager._executor.submit(release.wait)
+    generator = ModularDataGenerator("pl", fields=FIELDS)
+    manager.submit_export(generator, 10, FIELDS)
+
+    with pytest.raises(JobQueueFull):
+        manager.submit_export(generator, 10, FIELDS)
+    release.set()
+    manager.shutdown()
+
+def test_cleanup_removes_expired_results(tmp_path):
+    manager = _make_manager(tmp_path, result_ttl=60)
+    job = manager.submit_export(ModularDataGenerator("pl", fields=FIELDS), 10, FIELDS)
+    job.wait(30)
+
+    manager.cleanup(now=job.finished_at + 30)
+    assert manager.get(job.id) is job and os.path.exists(job.path)
+    manager.cleanup(now=job.finished_at + 60)
+    assert manager.get(job.id) is None
+    assert not os.path.exists(job.path)
+    manager.shutdown()
+
+def test_unsupported_format_is_rejected(tmp_path):
+    manager = _make_manager(tmp_path)
+
+    with pytest.raises(ValueError):
+        manager.submit_export(ModularDataGenerator("pl", fields=FIELDS), 10, FIELDS, format="xml")
+    manager.shutdown()
+
+def test_stale_spool_files_are_swept_on_startup(tmp_path):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    stale = spool / ("a" * 32 + ".csv.gz")
+    partial = spool / ("b" * 32 + ".sql.part")
+    fresh = spool / ("c" * 32 + ".csv")
+    foreign = spool / "notes.csv"
+    for path in (stale, partial, fresh, foreign):
+        path.write_text("x")
+    for path in (stale, partial, foreign):
+        os.utime(path, (0, 0))
+
+    _make_manager(tmp_path, result_ttl=60).shutdown()
+
+    assert not stale.exists() and not partial.exists()
+    assert fresh.exists() and foreign.exists()
+
+def _exit_while_running(tmp_path, code):
+    # The job would take minutes to finish; the process has to exit at once and leave nothing behind
+    code += "; job.rows_done or time.sleep(0.5); assert job.status == 'running', job.status"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code, str(tmp_path / "spool")], check=True, cwd=root, timeout=20,
+                   env=dict(os.environ, DATA_GENERATOR_SPOOL_DIR=str(tmp_path / "spool")))
+    assert not os.listdir(tmp_path / "spool")
+
+def test_running_jobs_do_not_block_exit(tmp_path):
+    _exit_while_running(tmp_path, (
+        "import sys, time; from generators.jobs import JobManager; "
+        "from generators.modular_generator import ModularDataGenerator; "
+        "manager = JobManager(sys.argv[1]); "
+        "job = manager.submit_export(ModularDataGenerator('pl', fields=['Name']), 10**9, ['Name']); "
+        "time.sleep(0.5)"))
+
+def test_web_jobs_do_not_block_exit(tmp_path):
+    _exit_while_running(tmp_path, (
+        "import sys, time; import main; "
+        "client = main.create_app(preload=False).test_client(); "
+        "response = client.post('/jobs', json={'locale': 'pl', 'quantity': 10**9, 'fields': ['Name']}); "
+        "job = main.get_job_manager().get(response.get_json()['id']); "
+        "time.sleep(0.5)"))
@@ -0,0 +1,67 @@
+from generators import metrics
+from generators.dataset_registry import DatasetRegistry
+from generators.exporters import iter_export
+from generators.modular_generator import ModularDataGenerator
+
+def test_render_prometheus_text_format():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("records_total", "Records", ("locale",))
+    histogram = registry.histogram("stage_seconds", "Stages", ("stage",), buckets=(0.1, 1.0))
+    counter.inc(5, locale='p"l')
+    histogram.observe(0.05, stage="generation")
+    histogram.observe(2.0, stage="generation")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE records_total counter" in lines
+    assert 'records_total{locale="p\\"l"} 5' in lines
+    assert 'stage_seconds_bucket{stage="generation",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="generation",le="1.0"} 1' in lines
+    assert 'stage_seconds_bucket{stage="generation",le="+Inf"} 2' in lines
+    assert 'stage_seconds_sum{stage="generation"} 2.05' in lines
+    assert 'stage_seconds_count{stage="generation"} 2' in lines
+
+def test_export_counts_records_and_bytes():
+    generator = ModularDataGenerator("pl", fields=["Name"])
+    records = metrics.RECORDS.value(locale="pl", format="csv")
+    output_bytes = metrics.BYTES.value(locale="pl", format="csv")
+    generations = metrics.STAGE_SECONDS.count(stage="generation", locale="pl", format="csv")
+
+    output = "".join(iter_export(generator, 250, ["Name"], 'csv'))
+
+    assert metrics.RECORDS.value(locale="pl", format="csv") - records == 250
+    assert metrics.BYTES.value(locale="pl", format="csv") - output_bytes == len(output.encode("utf-8"))
+    assert metrics.STAGE_SECONDS.count(stage="generation", locale="pl", format="csv") == generations + 1
+
+def test_disabled_metrics_are_not_updated():
+    counter = metrics.Counter("disabled_total", "Disabled")
+    metrics.disable()
+    try:
+        counter.inc()
+        assert metrics.export_trace("pl", "csv") is None
+    finally:
+        metrics.enable()
+
+    assert counter.value() == 0
+
+def test_binary_export_counts_written_bytes():
+    generator = ModularDataGenerator("pl", fields=["Name"])
+    output_bytes = metrics.BYTES.value(locale="pl", format="csv")
+
+    output = list(iter_export(generator, 250, ["Name"], 'csv', binary=True))
+
+    assert all(isinstance(piece, bytes) for piece in output)
+    assert metrics.BYTES.value(locale="pl", format="csv") - output_bytes == len(b"".join(output))
+
+def test_unknown_locales_share_one_label():
+    assert metrics.locale_label("pl") == "pl"
+    assert metrics.locale_label("no-such-locale") == metrics.locale_label(None) == metrics.OTHER_LOCALE
+
+def test_dataset_loads_are_timed_by_the_registry():
+    registry = DatasetRegistry()
+    loads = metrics.DATASET_LOAD_SECONDS.count(locale="de")
+
+    data_types = registry.get_data_types("de")
+    assert metrics.DATASET_LOAD_SECONDS.count(locale="de") == loads + 1
+    data_types["ImionaMeskie"]
+    assert metrics.DATASET_LOAD_SECONDS.count(locale="de") == loads + 2
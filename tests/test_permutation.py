@@ -0,0 +1,22 @@
+import pytest
+from generators.permutation import FeistelPermutation
+
+@pytest.mark.parametrize("size", [1, 2, 7, 100, 1000, 4097])
+def test_permutation_is_a_bijection(size):
+    permutation = FeistelPermutation(size, key=5)
+
+    assert sorted(permutation.take(0, size)) == list(range(size))
+
+def test_permutation_depends_on_key_and_is_stable():
+    first = FeistelPermutation(10000, key=1).take(0, 100)
+
+    assert first == FeistelPermutation(10000, key=1).take(0, 100)
+    assert first != FeistelPermutation(10000, key=2).take(0, 100)
+    assert first != list(range(100)), "Values should come out shuffled"
+
+def test_ranges_match_single_positions():
+    permutation = FeistelPermutation(123457, key=9)
+
+    assert permutation.take(500, 510) == [permutation[i] for i in range(500, 510)]
+    with pytest.raises(IndexError):
+        permutation.take(0, 123458)
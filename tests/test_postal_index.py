@@ -0,0 +1,93 @@
+import random
+import pytest
+from generators.dataset_registry import DatasetRegistry
+from generators.modular_generator import ModularDataGenerator
+from generators.postal_index import HOUSE_CHOICE, HOUSE_FIXED, HOUSE_RANGE, PostalIndex, compile_house_numbers
+
+LINES = [
+    "30-001;Kraków;Bracka;1-10;Kraków;Kraków;małopolskie",
+    "30-002;Kraków;;2, 4, 6;Kraków;Kraków;małopolskie",
+    "34-300;Żywiec;Kościuszki;12a;Żywiec;żywiecki;śląskie",
+    "malformed;line",
+]
+
+def test_house_number_specifications_compile_once():
+    assert compile_house_numbers(None) == (HOUSE_RANGE, (1, 150))
+    assert compile_house_numbers("1-10") == (HOUSE_RANGE, (1, 10))
+    assert compile_house_numbers("2, 4") == (HOUSE_CHOICE, ("2", "4"))
+    assert compile_house_numbers("1a-3") == (HOUSE_FIXED, "1a-3"), "Malformed ranges are used as is"
+    assert compile_house_numbers("12a") == (HOUSE_FIXED, "12a")
+
+def test_index_interns_fields_and_keeps_entries():
+    index = PostalIndex(LINES)
+
+    assert len(index) == 3, "Malformed lines should be skipped"
+    assert index[1] == {"pna": "30-002", "miejscowosc": "Kraków", "ulica": None, "numery": "2, 4, 6",
+                        "gmina": "Kraków", "powiat": "Kraków", "wojewodztwo": "małopolskie"}
+    assert index.categorical("wojewodztwo", [0, 1, 2]).categories == ["małopolskie", "śląskie"]
+
+def test_streets_use_samplers():
+    index = PostalIndex(LINES)
+    rng = random.Random(1)
+
+    for _ in range(50):
+        number = int(index.street(0, index.house_number(0, rng)).split()[-1])
+        assert 1 <= number <= 10
+        assert index.street(1, index.house_number(1, rng)) in ("Kraków 2", "Kraków 4", "Kraków 6")
+    assert index.streets([2], rng) == ["Kościuszki 12a"]
+
+def _make_generator(tmp_path, region=None):
+    locale_path = tmp_path / "pl"
+    locale_path.mkdir()
+    (locale_path / "ImionaMeskie.txt").write_text("Jan\n", encoding="utf-8")
+    (locale_path / "ImionaZenskie.txt").write_text("Anna\n", encoding="utf-8")
+    (locale_path / "NazwiskaMeskie.txt").write_text("Kowalski\n", encoding="utf-8")
+    (locale_path / "NazwiskaZenskie.txt").write_text("Kowalska\n", encoding="utf-8")
+    (locale_path / "kody_pocztowe.txt").write_text("\n".join(LINES[:3]) + "\n", encoding="utf-8")
+    return ModularDataGenerator("pl", registry=DatasetRegistry(str(tmp_path)), region=region)
+
+def test_generator_uses_postal_index(tmp_path):
+    generator = _make_generator(tmp_path)
+
+    batch = generator.generate_bulk(30)
+    assert set(batch.column("Postal Code")) <= {"30-001", "30-002", "34-300"}
+    for record in batch:
+        assert record["Country"] == "Poland"
+        assert (record["City"] == "Żywiec") == (record["Wojewodztwo"] == "śląskie")
+    record = generator.generate_record()
+    assert record["Gmina"] in ("Kraków", "Żywiec")
+
+def test_region_samplers_cover_only_the_region():
+    lines = [f"00-{i:03d};City{i % 3};Street;;Gmina{i % 2};Powiat{i % 2};{'mazowieckie' if i % 4 else 'śląskie'}"
+             for i in range(40)]
+    index = PostalIndex(lines)
+    rng = random.Random(3)
+
+    for region in ({"wojewodztwo": "Śląskie"}, {"powiat": "Powiat1"}, {"gmina": "gmina0", "city": "City2"},
+                   {"wojewodztwo": "mazowieckie", "city": "City1"}):
+        expected = {row for row in range(len(index))
+                    if all(index.value({"city": "miejscowosc"}.get(name, name), row).casefold() == value.casefold()
+                           for name, value in region.items())}
+        sampler = index.sampler(region)
+        assert len(sampler) == len(expected)
+        assert set(sampler.sample(500, rng)) == expected
+    assert index.sampler({"powiat": "Powiat1"}) is index.sampler({"powiat": "powiat1"}), "Samplers are built once"
+
+def test_unknown_regions_are_rejected():
+    index = PostalIndex(LINES)
+
+    with pytest.raises(ValueError, match="Unknown region filter"):
+        index.sampler({"county": "x"})
+    with pytest.raises(ValueError, match="No postal code entries"):
+        index.sampler({"wojewodztwo": "śląskie", "city": "Kraków"})
+
+def test_generator_filters_by_region(tmp_path):
+    generator = _make_generator(tmp_path, region={"wojewodztwo": "małopolskie"})
+
+    batch = generator.generate_bulk(50, seed=1)
+    assert set(batch.column("City")) == {"Kraków"}
+    assert generator.registry.get_postal_index("pl") is generator.parsed_postal_codes_data
+
+def test_region_requires_postal_data():
+    with pytest.raises(ValueError, match="require postal code data"):
+        ModularDataGenerator("de", region={"city": "Berlin"})
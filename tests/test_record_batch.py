@@ -0,0 +1,44 @@
+import pickle
+from generators.modular_generator import ModularDataGenerator
+from generators.record_batch import CategoricalColumn, ConcatenatedValues, RecordBatch, iter_rows, merge_columns
+
+def test_categorical_column_decodes_codes():
+    column = CategoricalColumn([2, 0, 1, 2], ["a", "b", "c"])
+
+    assert list(column) == ["c", "a", "b", "c"]
+    assert column[1:3] == ["a", "b"]
+    assert isinstance(column[1:3], CategoricalColumn), "Slices should stay compact"
+    assert pickle.loads(pickle.dumps(column)) == ["c", "a", "b", "c"]
+
+def test_concatenated_values_take():
+    values = ConcatenatedValues(["a", "b"], ["c"])
+
+    assert len(values) == 3
+    assert values[2] == "c" and values[-3] == "a"
+    assert values.take([2, 0, 1]) == ["c", "a", "b"]
+
+def test_merge_keeps_shared_categories():
+    categories = ["x", "y"]
+    merged = merge_columns([{"A": CategoricalColumn([0], categories)}, {"A": CategoricalColumn([1], categories)}])
+
+    assert isinstance(merged["A"], CategoricalColumn)
+    assert merged["A"] == ["x", "y"]
+
+def test_record_batch_behaves_like_list_of_dicts():
+    batch = RecordBatch({"Name": CategoricalColumn([1, 0], ["Anna", "Jan"]), "ID": ["1", "2"]})
+
+    assert len(batch) == 2
+    assert batch[0] == {"Name": "Jan", "ID": "1"}
+    assert dict(batch[-1]) == {"Name": "Anna", "ID": "2"}
+    assert "ID" in batch[0] and "City" not in batch[0]
+    assert batch == [{"Name": "Jan", "ID": "1"}, {"Name": "Anna", "ID": "2"}]
+    assert batch[1:] == batch.to_dicts()[1:]
+    assert list(iter_rows(batch, ["ID", "City"])) == [("1", ""), ("2", "")]
+
+def test_generated_names_are_categorical():
+    batch = ModularDataGenerator("pl").generate_bulk(100, seed=3)
+
+    assert isinstance(batch, RecordBatch)
+    assert isinstance(batch.columns["Name"], CategoricalColumn)
+    assert isinstance(batch.columns["Surname"], CategoricalColumn)
+    assert batch.column("Surname") == [record["Surname"] for record in batch]
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import pytest
+from generators import schema as schema_module
+from generators.modular_generator import ModularDataGenerator
+from generators.schema import TRANSFORMS, Schema, default_schema, load_schema
+from sql.sql_generator import generate_sql
+
+CONTACTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemas", "contacts.json")
+
+def test_default_schema_matches_built_in_fields():
+    generator = ModularDataGenerator("pl")
+    assert generator.schema_plan.identity
+    assert generator.generate_bulk(50, seed=3) == ModularDataGenerator("pl", schema=default_schema()).generate_bulk(50, seed=3)
+    assert default_schema().default_fields() == ["Name", "Surname", "ID", "Birth Date", "Street", "City", "Country"]
+
+def test_derived_columns():
+    generator = ModularDataGenerator("pl", schema=load_schema(CONTACTS))
+    batch = generator.generate_bulk(200, seed=5)
+
+    assert batch.fields == ["ID", "First Name", "Last Name", "Email", "City", "Nationality", "Status"]
+    for record in batch:
+        expected = TRANSFORMS['ascii_lower'](f"{record['First Name']}.{record['Last Name']}@example.com")
+        assert record["Email"] == expected and expected.isascii()
+        assert record["Status"] == "active"
+        assert record["Nationality"] in generator.data_types["countries"]
+    assert set(generator.generate_record()) == set(batch.fields)
+
+def test_unused_sources_are_dropped():
+    generator = ModularDataGenerator("de", schema=load_schema(CONTACTS), fields=["email"])
+    assert generator.fields == {"Name", "Surname"}
+    assert not generator.plan.ids and not generator.plan.address
+    assert generator.generate_bulk(10).fields == ["Email"]
+
+def test_seeded_output_does_not_depend_on_workers():
+    generator = ModularDataGenerator("de", schema=load_schema(CONTACTS))
+    assert generator.generate_bulk(25000, seed=9, workers=2) == generator.generate_bulk(25000, seed=9)
+
+@pytest.mark.parametrize("columns, message", [
+    ([{"name": "A", "source": "format", "template": "{B}"}, {"name": "B", "source": "format", "template": "{A}"}],
+     "cycle"),
+    ([{"name": "A", "source": "format", "template": "{Name.__class__}"}, {"name": "Name", "source": "field"}],
+     "unknown column"),
+    ([{"name": "A", "source": "format", "template": "{Name!r}"}, {"name": "Name", "source": "field"}],
+     "by name"),
+    ([{"name": "A", "source": "random"}], "unsupported source"),
+    ([{"name": "A", "source": "field"}], "unknown field"),
+])
+def test_invalid_schemas_are_rejected(columns, message):
+    with pytest.raises(ValueError, match=message):
+        Schema.from_dict({"columns": columns, "tables": {"persons": [[columns[0]["name"], "a", "TEXT"]]}})
+
+def test_missing_data_file_is_rejected():
+    schema = Schema.from_dict({"columns": [{"name": "ID", "source": "field"},
+                                           {"name": "Planet", "source": "data", "data_type": "planets"}],
+                               "tables": {"persons": [["ID", "id", "VARCHAR(50) PRIMARY KEY"]]}})
+    with pytest.raises(ValueError, match="planets"):
+        ModularDataGenerator("pl", schema=schema)
+
+def test_sql_uses_the_schema_tables():
+    schema = load_schema(CONTACTS)
+    generator = ModularDataGenerator("pl", schema=schema)
+    sql = generate_sql(generator.generate_bulk(20), "pl", ["ID", "Email", "City"], schema=schema)
+
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(sql)
+    assert connection.execute("SELECT COUNT(*) FROM persons JOIN addresses ON person_id = id "
+                              "WHERE email LIKE '%@example.com'").fetchone() == (20,)
+
+def test_schema_endpoint():
+    from main import create_app
+    response = create_app(preload=False).test_client().get('/schema')
+    assert Schema.from_dict(response.get_json()).column_names == default_schema().column_names
+
+@pytest.mark.parametrize("schema, message", [
+    ({"columns": [{"name": "ID"}], "tables": {"persons": [["ID", "id", "TEXT"]]}}, "Column ID: missing source"),
+    ({"columns": [{"name": "ID", "source": "field"}], "tables": {"persons": ["ID"]}}, "Table persons"),
+])
+def test_malformed_request_schemas_get_400(schema, message):
+    from main import create_app
+    client = create_app(preload=False).test_client()
+    body = {'locale': 'pl', 'quantity': 5, 'fields': ['ID'], 'format': 'csv', 'schema': schema}
+
+    for endpoint in ('/generate', '/jobs'):
+        response = client.post(endpoint, json=body)
+        assert response.status_code == 400
+        assert message in response.get_json()['error']
+
+def test_request_schemas_share_transformed_categories(monkeypatch):
+    calls = []
+    ascii_lower = TRANSFORMS['ascii_lower']
+    monkeypatch.setitem(TRANSFORMS, 'ascii_lower', lambda value: calls.append(value) or ascii_lower(value))
+    monkeypatch.setattr(schema_module, "_transformed", {})
+    document = load_schema(CONTACTS).to_dict()
+
+    first = ModularDataGenerator("pl", schema=Schema.from_dict(document), fields=["Email"]).generate_bulk(100)
+    transformed = len(calls)
+    second = ModularDataGenerator("pl", schema=Schema.from_dict(document), fields=["Email"]).generate_bulk(100)
+
+    assert transformed > 100, "Whole category lists should have been transformed once"
+    assert len(calls) - transformed < 10, "Only the template literals of the new schema should be transformed"
+    assert all(email.endswith("@example.com") for email in list(first.column("Email")) + list(second.column("Email")))
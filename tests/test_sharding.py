@@ -0,0 +1,61 @@
+from generators.modular_generator import ModularDataGenerator
+from generators.record_batch import RecordBatch
+from generators.sharding import BLOCK_SIZE, SHARD_SIZE, derive_seed, iter_shards
+
+def test_shards_cover_quantity():
+    shards = list(iter_shards(0, 2 * SHARD_SIZE + 5))
+
+    assert shards == [(0, SHARD_SIZE), (SHARD_SIZE, 2 * SHARD_SIZE), (2 * SHARD_SIZE, 2 * SHARD_SIZE + 5)]
+
+def test_shards_are_aligned_for_offsets():
+    assert list(iter_shards(SHARD_SIZE - 3, SHARD_SIZE + 2)) == [(SHARD_SIZE - 3, SHARD_SIZE), (SHARD_SIZE, SHARD_SIZE + 2)]
+
+def test_derive_seed_is_stable_and_distinct():
+    assert derive_seed(42, 0) == derive_seed(42, 0)
+    assert derive_seed(42, 0) != derive_seed(42, 1)
+    assert derive_seed(42, 0) != derive_seed(43, 0)
+
+def test_same_seed_same_records_for_any_worker_count():
+    generator = ModularDataGenerator("pl")
+    quantity = 2 * SHARD_SIZE + 10
+
+    single = generator.generate_bulk(quantity, seed=123)
+    parallel = generator.generate_bulk(quantity, seed=123, workers=2)
+
+    assert len(single) == quantity
+    assert single == parallel, "Worker count must not change seeded output"
+
+def test_different_seeds_differ():
+    generator = ModularDataGenerator("de")
+
+    assert generator.generate_bulk(20, seed=1) != generator.generate_bulk(20, seed=2)
+
+def test_seeded_chunks_follow_shards():
+    generator = ModularDataGenerator("de")
+    chunks = list(generator.iter_bulk(SHARD_SIZE + 1, seed=9))
+
+    assert [len(chunk) for chunk in chunks] == [SHARD_SIZE, 1]
+    assert RecordBatch.concat(chunks) == generator.generate_bulk(SHARD_SIZE + 1, seed=9)
+
+def test_range_matches_full_run():
+    generator = ModularDataGenerator("pl")
+    full = generator.generate_bulk(3 * BLOCK_SIZE, seed=5)
+
+    start, stop = BLOCK_SIZE - 7, 2 * BLOCK_SIZE + 3
+    assert RecordBatch(generator.generate_range(5, start, stop)) == full[start:stop]
+    assert RecordBatch(generator.generate_range(5, 1234, 1235))[0] == full[1234]
+
+def test_offset_pages_concatenate_to_full_run():
+    generator = ModularDataGenerator("de")
+    full = generator.generate_bulk(2500, seed=11)
+
+    pages = [generator.generate_bulk(500, seed=11, offset=offset) for offset in range(0, 2500, 500)]
+    assert RecordBatch.concat(pages) == full
+
+def test_seeded_fields_do_not_depend_on_projection():
+    full = ModularDataGenerator("pl").generate_bulk(1500, seed=21)
+    projected = ModularDataGenerator("pl", fields=["Surname", "City"]).generate_bulk(1500, seed=21)
+
+    assert projected.fields == ["Surname", "City"]
+    assert projected.column("Surname") == full.column("Surname")
+    assert projected.column("City") == full.column("City")
@@ -0,0 +1,43 @@
+import sqlite3
+from sql.sql_generator import generate_sql
+
+RECORDS = [
+    {"ID": str(i), "Name": "Jan", "Surname": "D'Arc" if i == 0 else "Nowak", "Birth Date": "2000-01-01",
+     "Street": "Bracka 1", "City": "Kraków", "Country": "Polska"}
+    for i in range(5)
+]
+
+def _load(sql):
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(sql)
+    return connection
+
+def test_multi_row_inserts_are_batched():
+    sql = generate_sql(RECORDS, "pl", ["ID", "Name", "City"], batch_size=2)
+
+    assert sql.count("INSERT INTO persons (id, name) VALUES") == 3, "5 rows in batches of 2 need 3 statements"
+    assert sql.count("INSERT INTO addresses (person_id, city) VALUES") == 3
+
+def test_generated_sql_loads_into_database():
+    connection = _load(generate_sql(RECORDS, "pl", ["ID", "Name", "Surname", "Birth Date", "City"]))
+
+    assert connection.execute("SELECT COUNT(*) FROM persons").fetchone() == (5,)
+    assert connection.execute("SELECT surname FROM persons WHERE id = '0'").fetchone() == ("D'Arc",)
+    assert connection.execute("SELECT city FROM addresses WHERE person_id = '4'").fetchone() == ("Kraków",)
+
+def test_column_order_follows_table_layout():
+    sql = generate_sql(RECORDS, "pl", ["country", "surname", "id", "name"])
+
+    assert "INSERT INTO persons (id, name, surname) VALUES" in sql
+    assert "INSERT INTO addresses (person_id, country) VALUES" in sql
+
+def test_transaction_wraps_inserts():
+    sql = generate_sql(RECORDS, "pl", ["ID", "Name"], transaction=True)
+
+    assert sql.index("BEGIN;") < sql.index("INSERT INTO persons")
+    assert sql.rstrip().endswith("COMMIT;")
+    assert _load(sql).execute("SELECT COUNT(*) FROM persons").fetchone() == (5,)
+
+def test_addresses_need_person_reference():
+    assert "INSERT INTO addresses (person_id, street) VALUES" in generate_sql(RECORDS, "pl", ["ID", "Street"])
+    assert "-- Skipping addresses insert" in generate_sql(RECORDS, "pl", ["Name", "Street"])
@@ -0,0 +1,60 @@
+import sqlite3
+import pytest
+from generators.exporters import iter_export
+from generators.modular_generator import ModularDataGenerator
+from sql.sqlite_writer import write_sqlite
+
+RECORDS = [
+    {"ID": "1", "Name": "Jan", "Surname": "D'Arc\\x", "City": "Kraków\tNowa Huta"},
+    {"ID": "2", "Name": "Anna", "Surname": "O''Neil; DROP TABLE persons", "City": "Gdańsk\nOliwa"},
+]
+
+def test_values_are_stored_verbatim(tmp_path):
+    path = write_sqlite([RECORDS[:1], RECORDS[1:]], str(tmp_path / "out.db"), "pl", ["ID", "Name", "Surname", "City"],
+                        transaction_size=1)
+
+    with sqlite3.connect(path) as connection:
+        persons = connection.execute("SELECT id, name, surname FROM persons ORDER BY id").fetchall()
+        addresses = connection.execute("SELECT person_id, city FROM addresses ORDER BY person_id").fetchall()
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    assert persons == [("1", "Jan", "D'Arc\\x"), ("2", "Anna", "O''Neil; DROP TABLE persons")]
+    assert addresses == [("1", "Kraków\tNowa Huta"), ("2", "Gdańsk\nOliwa")]
+    assert indexes == {"persons_id", "addresses_person_id"}
+
+def test_sqlite_export_format(tmp_path):
+    generator = ModularDataGenerator("de", fields=["ID", "Name", "City"])
+    path = tmp_path / "export.db"
+    path.write_bytes(b"".join(iter_export(generator, 2500, ["ID", "Name", "City"], 'sqlite')))
+
+    with sqlite3.connect(str(path)) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM persons").fetchone() == (2500,)
+        assert connection.execute("SELECT COUNT(*) FROM addresses").fetchone() == (2500,)
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(persons)")]
+    assert columns == ["id", "name"]
+
+def _check_foreign_keys(path):
+    with sqlite3.connect(str(path)) as connection:
+        connection.execute("PRAGMA foreign_keys = ON")
+        assert connection.execute("PRAGMA foreign_key_check").fetchall() == []
+        person_id = connection.execute("SELECT id FROM persons LIMIT 1").fetchone()[0]
+        connection.execute("DELETE FROM addresses WHERE person_id = ?", (person_id,))
+        connection.execute("INSERT INTO addresses (person_id, city) VALUES (?, 'Berlin')", (person_id,))
+        return connection.execute("SELECT sql FROM sqlite_master WHERE name = 'persons'").fetchone()[0]
+
+def test_unique_ids_get_the_generate_sql_keys(tmp_path):
+    generator = ModularDataGenerator("de", fields=["ID", "Name", "City"], unique_ids=True)
+    path = tmp_path / "unique.db"
+    path.write_bytes(b"".join(iter_export(generator, 2500, ["ID", "Name", "City"], 'sqlite')))
+
+    assert "PRIMARY KEY" in _check_foreign_keys(path)
+    with sqlite3.connect(str(path)) as connection:
+        connection.execute("PRAGMA foreign_keys = ON")
+        with pytest.raises(sqlite3.IntegrityError):
+            connection.execute("INSERT INTO addresses (person_id, city) VALUES ('missing', 'Berlin')")
+
+def test_random_ids_open_with_foreign_keys_on(tmp_path):
+    generator = ModularDataGenerator("pl", fields=["ID", "Name", "City"])
+    path = write_sqlite(generator.iter_bulk(500), str(tmp_path / "random.db"), "pl", ["ID", "Name", "City"])
+
+    assert "PRIMARY KEY" not in _check_foreign_keys(path)
@@ -0,0 +1,63 @@
+import random
+from collections import Counter
+import pytest
+from generators import vectorized
+from generators.data_loader import DataLoader
+from generators.dataset_cache import load_cache, write_cache
+from generators.dataset_registry import DatasetRegistry
+from generators.modular_generator import ModularDataGenerator
+from generators.weighted import AliasTable, WeightedValues, parse_lines
+
+def test_alias_table_follows_weights():
+    table = AliasTable.from_weights([1, 0, 3, 4])
+    counts = Counter(table.sample(80000, random.Random(5)))
+
+    assert counts[1] == 0, "Zero weights must never be drawn"
+    for index, weight in ((0, 1), (2, 3), (3, 4)):
+        assert abs(counts[index] / 80000 - weight / 8) < 0.01
+
+def test_alias_table_rejects_invalid_weights():
+    with pytest.raises(ValueError):
+        AliasTable.from_weights([1, -1])
+    with pytest.raises(ValueError):
+        AliasTable.from_weights([0, 0])
+
+def test_parse_lines():
+    assert parse_lines(["Nowak", "Kowalski"]) == ["Nowak", "Kowalski"], "Unweighted files stay plain lists"
+    values = parse_lines(["Nowak\t3", "Kowalski"])
+    assert isinstance(values, WeightedValues)
+    assert list(values) == ["Nowak", "Kowalski"]
+    with pytest.raises(ValueError, match="Invalid weight"):
+        parse_lines(["Nowak\tmany"])
+
+def _write_locale(tmp_path):
+    locale_path = tmp_path / "de"
+    locale_path.mkdir()
+    (locale_path / "ImionaMeskie.txt").write_text("Hans\t1\nJonas\t0\n", encoding="utf-8")
+    (locale_path / "ImionaZenskie.txt").write_text("Anna\n", encoding="utf-8")
+    (locale_path / "Nazwiska.txt").write_text("Müller\t9\nSchmidt\t1\n", encoding="utf-8")
+    return locale_path
+
+def test_weighted_data_types_survive_the_cache(tmp_path):
+    locale_path = _write_locale(tmp_path)
+    data_types = DataLoader(str(tmp_path), use_cache=False).discover_data_types("de")
+    write_cache(str(locale_path), data_types)
+
+    for eager_limit in (0, 100):
+        cached = load_cache(str(locale_path), eager_limit=eager_limit)
+        assert cached["Nazwiska"] == data_types["Nazwiska"], "Values and alias tables should round-trip"
+        assert cached["ImionaZenskie"] == ["Anna"]
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_generator_samples_by_weight(tmp_path, monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(vectorized, "numpy", None)
+    elif vectorized.numpy is None:
+        pytest.skip("NumPy is not installed")
+    _write_locale(tmp_path)
+    generator = ModularDataGenerator("de", registry=DatasetRegistry(str(tmp_path)))
+    batch = generator.generate_bulk(2000, seed=1)
+
+    assert "Jonas" not in batch.column("Name")
+    assert 0.85 < batch.column("Surname").count("Müller") / 2000 < 0.95
+    assert generator.generate_record()["Name"] in ("Hans", "Anna")